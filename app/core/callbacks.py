@@ -46,7 +46,7 @@ async def process_new_gift(app: Client, gift_data: Dict[str, Any]) -> None:
 
     is_eligible, processing_data = await GiftProcessor.evaluate_gift(gift_data)
 
-    return await send_notification(app, gift_id, **processing_data) if not is_eligible and processing_data else \
+    return send_notification(app, gift_id, **processing_data) if not is_eligible and processing_data else \
         await _distribute_gifts(app, gift_id, processing_data.get("quantity", 1), processing_data.get("recipients", []))
 
 
@@ -58,7 +58,7 @@ async def _distribute_gifts(app: Client, gift_id: int, quantity: int, recipients
             await buy_gift(app, recipient_id, gift_id, quantity)
         except Exception as ex:
             warn(t("console.purchase_error", gift_id=gift_id, chat_id=recipient_id))
-            await send_notification(app, gift_id, error_message=str(ex))
+            send_notification(app, gift_id, error_message=str(ex))
         await asyncio.sleep(0.5)
 
 
@@ -46,7 +46,7 @@ class ErrorHandler:
 
         error(t("console.gift_send_error", gift_id=gift_id, chat_id=chat_id))
         error(str(ex))
-        await send_notification(app, gift_id, error_message=f"<pre>{str(ex)}</pre>")
+        send_notification(app, gift_id, error_message=f"<pre>{str(ex)}</pre>")
 
     @staticmethod
     async def _process_error(app: Client, gift_id: int,
@@ -57,7 +57,7 @@ class ErrorHandler:
         )
 
         notification_key = handler['notification_key']
-        notification_key in notification_data and await send_notification(
+        notification_key in notification_data and send_notification(
             app, gift_id, **notification_data[notification_key])
 
 
@@ -1,12 +1,25 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any
+
 from pyrogram import Client
-from pyrogram.errors import RPCError
+from pyrogram.errors import FloodWait, RPCError
 
-from app.utils.helper import get_user_balance, format_user_reference
-from app.utils.logger import error
+from app.utils.helper import format_user_reference, get_user_balance
+from app.utils.logger import error, warn
 from data.config import config, t
 
+MAX_MESSAGE_LENGTH = 4096
+
 
 class NotificationManager:
+    _digests: dict[int, dict[str, Any]] = {}
+    _skip_counts: dict[str, int] = {'sold_out_item': 0, 'non_limited_item': 0, 'non_upgradable_item': 0}
+    _outbox: deque[str] = deque()
+    _flusher: asyncio.Task | None = None
+    _next_send: float = 0.0
+
     @staticmethod
     async def send_message(app: Client, message: str) -> None:
         if not config.CHANNEL_ID:
@@ -18,8 +31,94 @@ class NotificationManager:
             error(f'Failed to send message to channel {config.CHANNEL_ID}: {str(ex)}')
 
     @staticmethod
-    async def send_notification(app: Client, gift_id: int, **kwargs) -> None:
-        total_gifts = kwargs.get('total_gifts', 1)
+    def post(message: str) -> None:
+        config.CHANNEL_ID and message and NotificationManager._outbox.append(message)
+
+    @staticmethod
+    def start(app: Client) -> None:
+        flusher = NotificationManager._flusher
+        if flusher is None or flusher.done():
+            NotificationManager._flusher = asyncio.create_task(NotificationManager._flush_loop(app))
+
+    @staticmethod
+    async def stop(app: Client, timeout: float = 5.0) -> None:
+        flusher = NotificationManager._flusher
+        NotificationManager._flusher = None
+        if flusher:
+            flusher.cancel()
+            await asyncio.gather(flusher, return_exceptions=True)
+
+        try:
+            await asyncio.wait_for(NotificationManager.flush(app), timeout=timeout)
+        except TimeoutError:
+            warn(f'Dropped {len(NotificationManager._outbox)} pending notifications on shutdown')
+
+    @staticmethod
+    async def flush(app: Client) -> None:
+        NotificationManager._collect()
+
+        while NotificationManager._outbox:
+            await NotificationManager._deliver(app, NotificationManager._outbox.popleft())
+
+    @staticmethod
+    async def _flush_loop(app: Client) -> None:
+        while True:
+            await asyncio.sleep(config.NOTIFY_INTERVAL)
+            try:
+                await NotificationManager.flush(app)
+            except Exception as ex:
+                error(f'Notification flush failed: {str(ex)}')
+
+    @staticmethod
+    async def _deliver(app: Client, message: str) -> None:
+        delay = NotificationManager._next_send - time.monotonic()
+        delay > 0 and await asyncio.sleep(delay)
+        NotificationManager._next_send = time.monotonic() + 60 / config.NOTIFY_RATE
+
+        try:
+            await app.send_message(config.CHANNEL_ID, message, disable_web_page_preview=True)
+        except FloodWait as ex:
+            NotificationManager._outbox.appendleft(message)
+            NotificationManager._next_send = time.monotonic() + ex.value
+        except RPCError as ex:
+            error(f'Failed to send message to channel {config.CHANNEL_ID}: {str(ex)}')
+
+    @staticmethod
+    def _collect() -> None:
+        digests, NotificationManager._digests = NotificationManager._digests, {}
+
+        for gift_id, digest in digests.items():
+            for message in NotificationManager._render_digest(gift_id, digest):
+                NotificationManager.post(message)
+
+        skip_counts = NotificationManager._skip_counts
+        summary_parts = [
+            t(f"telegram.{skip_type}", count=count)
+            for skip_type, count in skip_counts.items()
+            if count > 0
+        ]
+        summary_parts and NotificationManager.post(t("telegram.skip_summary_header") + "\n" + "\n".join(summary_parts))
+        NotificationManager._skip_counts = dict.fromkeys(skip_counts, 0)
+
+    @staticmethod
+    def _render_digest(gift_id: int, digest: dict[str, Any]) -> list[str]:
+        sent = digest['sent']
+        lines = [t("telegram.success_digest", gift_id=gift_id, count=sum(sent.values()))] if sent else []
+        lines += [f"• {recipient} × {count}" for recipient, count in sent.items()]
+        lines += digest['notes']
+
+        messages, current = [], ""
+        for line in lines:
+            candidate = f"{current}\n{line}" if current else line
+            if len(candidate) > MAX_MESSAGE_LENGTH and current:
+                messages.append(current)
+                candidate = line
+            current = candidate[:MAX_MESSAGE_LENGTH]
+
+        return messages + [current] if current else messages
+
+    @staticmethod
+    def send_notification(_app: Client, gift_id: int, **kwargs) -> None:
         supply_text = f" | {t('telegram.available')}: {kwargs.get('total_amount')}" if kwargs.get('total_amount',
                                                                                                   0) > 0 else ""
 
@@ -33,9 +132,6 @@ class NotificationManager:
                                      price=kwargs.get('gift_price'),
                                      supply=kwargs.get('total_amount'),
                                      supply_text=supply_text),
-            'success_message': lambda: t("telegram.success_message", current=kwargs.get('current_gift'),
-                                         total=total_gifts, gift_id=gift_id, recipient='') +
-                                       format_user_reference(kwargs.get('user_id'), kwargs.get('username')),
             'partial_purchase': lambda: t("telegram.partial_purchase", gift_id=gift_id,
                                           purchased=kwargs.get('purchased', 0),
                                           requested=kwargs.get('requested', 0),
@@ -43,16 +139,17 @@ class NotificationManager:
                                           current_balance=kwargs.get('current_balance', 0))
         }
 
-        for key, value in kwargs.items():
-            value and key in message_types and await NotificationManager._send_with_error_handling(
-                app, message_types[key]().strip())
+        notes = [message_types[key]().strip() for key, value in kwargs.items() if value and key in message_types]
+        success = kwargs.get('success_message')
+        if not (notes or success):
+            return
 
-    @staticmethod
-    async def _send_with_error_handling(app: Client, message: str) -> None:
-        try:
-            await NotificationManager.send_message(app, message)
-        except RPCError as ex:
-            error(f'Failed to send notification: {str(ex)}')
+        digest = NotificationManager._digests.setdefault(gift_id, {'sent': {}, 'notes': []})
+        digest['notes'].extend(notes)
+
+        if success:
+            recipient = format_user_reference(kwargs.get('user_id'), kwargs.get('username'))
+            digest['sent'][recipient] = digest['sent'].get(recipient, 0) + 1
 
     @staticmethod
     async def send_start_message(client: Client) -> None:
@@ -70,8 +167,8 @@ class NotificationManager:
         await NotificationManager.send_message(client, message)
 
     @staticmethod
-    async def send_summary_message(app: Client, sold_out_count: int = 0,
-                                   non_limited_count: int = 0, non_upgradable_count: int = 0) -> None:
+    def send_summary_message(_app: Client, sold_out_count: int = 0,
+                             non_limited_count: int = 0, non_upgradable_count: int = 0) -> None:
 
         skip_types = {
             'sold_out_item': sold_out_count,
@@ -79,14 +176,8 @@ class NotificationManager:
             'non_upgradable_item': non_upgradable_count
         }
 
-        summary_parts = [
-            t(f"telegram.{skip_type}", count=count)
-            for skip_type, count in skip_types.items()
-            if count > 0
-        ]
-
-        summary_parts and await NotificationManager.send_message(
-            app, t("telegram.skip_summary_header") + "\n" + "\n".join(summary_parts))
+        for skip_type, count in skip_types.items():
+            NotificationManager._skip_counts[skip_type] += count
 
 
 send_message = NotificationManager.send_message
@@ -42,9 +42,9 @@ class GiftPurchaser:
                 await app.send_gift(chat_id=chat_id, gift_id=gift_id, hide_my_name=True)
                 info(t("console.gift_sent", current=current_gift, total=quantity,
                           gift_id=gift_id, recipient=recipient_info))
-                await send_notification(app, gift_id, user_id=chat_id, username=username,
-                                        current_gift=current_gift, total_gifts=quantity,
-                                        success_message=True)
+                send_notification(app, gift_id, user_id=chat_id, username=username,
+                                  current_gift=current_gift, total_gifts=quantity,
+                                  success_message=True)
             except RPCError as ex:
                 current_balance = await get_user_balance(app)
                 await handle_gift_error(app, ex, gift_id, chat_id,
@@ -57,10 +57,10 @@ class GiftPurchaser:
         warn(t("console.insufficient_balance_for_quantity",
                gift_id=gift_id, requested=requested_quantity,
                price=gift_price, balance=current_balance))
-        await send_notification(app, gift_id,
-                                balance_error=True,
-                                gift_price=gift_price * requested_quantity,
-                                current_balance=current_balance)
+        send_notification(app, gift_id,
+                          balance_error=True,
+                          gift_price=gift_price * requested_quantity,
+                          current_balance=current_balance)
 
     @staticmethod
     async def _notify_partial_purchase(app: Client, gift_id: int, requested: int,
@@ -69,12 +69,12 @@ class GiftPurchaser:
                gift_id=gift_id, purchased=purchased, requested=requested,
                remaining_needed=(requested - purchased) * gift_price,
                current_balance=remaining_balance))
-        await send_notification(app, gift_id,
-                                partial_purchase=True,
-                                purchased=purchased,
-                                requested=requested,
-                                remaining_cost=(requested - purchased) * gift_price,
-                                current_balance=remaining_balance)
+        send_notification(app, gift_id,
+                          partial_purchase=True,
+                          purchased=purchased,
+                          requested=requested,
+                          remaining_cost=(requested - purchased) * gift_price,
+                          current_balance=remaining_balance)
 
 
 buy_gift = GiftPurchaser.buy_gift
@@ -98,7 +98,7 @@ class GiftMonitor:
             gift_data['id'] = gift_id
             await callback(app, gift_data)
 
-        await send_summary_message(app, **skip_counts)
+        send_summary_message(app, **skip_counts)
 
         any(skip_counts.values()) and info(t("console.skip_summary",
                                              sold_out=skip_counts['sold_out_count'],
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Benchmark detection-to-send_gift latency of the monitor cycle."""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Settings require credentials; the benchmark never connects
+os.environ.setdefault("TELEGRAM_API_ID", "12345")
+os.environ.setdefault("TELEGRAM_API_HASH", "benchmark")
+os.environ.setdefault("TELEGRAM_PHONE_NUMBER", "+1234567890")
+
+from src.core.monitor import GiftMonitor, Snapshot
+from src.observability import setup_logging
+from src.storage import database
+from src.storage.database import get_or_create_gift
+
+CYCLES = 50
+NEW_GIFTS_PER_CYCLE = 40
+
+
+class FakeClient:
+    """Stands in for TelegramClientWrapper and timestamps each stage."""
+
+    def __init__(self) -> None:
+        self.catalog: list[dict[str, Any]] = []
+        self.detected_at = 0.0
+        self.latencies: list[float] = []
+        self.sent = asyncio.Event()
+
+    async def get_available_gifts(self) -> list[dict[str, Any]]:
+        self.detected_at = time.perf_counter()
+        return self.catalog
+
+    async def send_gift(self, _gift_id: int, _recipient_id: int) -> bool:
+        self.latencies.append((time.perf_counter() - self.detected_at) * 1000)
+        self.sent.set()
+        return True
+
+
+class InlineMonitor(GiftMonitor):
+    """The previous cycle order: persist every gift, then dispatch."""
+
+    async def _process_snapshot(self, snapshot: Snapshot) -> None:
+        gifts = snapshot.gifts
+        new_gifts, matching_gifts = self._scan(gifts)
+        await self._slow_path(gifts, new_gifts, matching_gifts, 0.0)
+        self._dispatch(matching_gifts)
+
+    async def _store_gifts(self, gifts: list[Any]) -> None:
+        async with database.get_session() as session:
+            for gift in gifts:
+                await get_or_create_gift(
+                    session,
+                    gift["id"],
+                    name=gift["title"],
+                    price=gift["stars"],
+                    total_amount=gift["total_amount"],
+                )
+
+
+def build_catalog(cycle: int) -> list[dict[str, Any]]:
+    """Catalog with a batch of never-seen gifts, one of them matching."""
+    gifts = []
+    for i in range(NEW_GIFTS_PER_CYCLE):
+        gift_id = cycle * NEW_GIFTS_PER_CYCLE + i + 1
+        gifts.append({
+            "id": gift_id,
+            "title": f"Gift {gift_id}",
+            "stars": 100 if i == 0 else 50000,
+            "total_amount": 10000,
+            "available_amount": 9000,
+            "is_limited": True,
+            "is_sold_out": False,
+        })
+    return gifts
+
+
+async def bench(label: str, monitor_class: type[GiftMonitor]) -> None:
+    """Run cycles through one monitor implementation."""
+    with tempfile.TemporaryDirectory() as tmp:
+        database.configure_engine(path=Path(tmp) / "bench.db")
+        await database.init_db()
+
+        client = FakeClient()
+        monitor = monitor_class(
+            client,
+            on_gift_batch=lambda gifts: asyncio.create_task(
+                client.send_gift(gifts[0]["id"], 1)
+            ),
+        )
+
+        for cycle in range(CYCLES):
+            client.catalog = build_catalog(cycle)
+            client.sent.clear()
+            gifts = await client.get_available_gifts()
+            await monitor._process_snapshot(Snapshot(gifts, time.perf_counter()))
+            await client.sent.wait()
+
+        await database.close_db()
+
+    latencies = sorted(client.latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"  {label:<22} median={statistics.median(latencies):8.3f} ms  "
+        f"p99={p99:8.3f} ms"
+    )
+
+
+async def run() -> None:
+    """Compare both cycle orderings."""
+    await bench("persist-then-dispatch", InlineMonitor)
+    await bench("fast path", GiftMonitor)
+
+
+def main() -> None:
+    """Run the detection latency benchmark."""
+    print("=" * 50)
+    print("Gift Hunter - Detection Latency Benchmark")
+    print("=" * 50)
+    print(f"  {CYCLES} cycles, {NEW_GIFTS_PER_CYCLE} new gifts per cycle")
+
+    setup_logging("WARNING")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
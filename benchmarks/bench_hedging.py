@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Benchmark catalog fetch tail latency with and without hedging."""
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Settings require credentials; the benchmark never connects
+os.environ.setdefault("TELEGRAM_API_ID", "12345")
+os.environ.setdefault("TELEGRAM_API_HASH", "benchmark")
+os.environ.setdefault("TELEGRAM_PHONE_NUMBER", "+1234567890")
+
+from src.core.client import TelegramClientWrapper
+from src.observability.metrics import HEDGE_WINS, HEDGED_REQUESTS
+
+FETCHES = 1000
+
+# Latencies are scaled down 10x from observed production figures
+BASE_LATENCY = (0.003, 0.006)
+SLOW_LATENCY = (0.015, 0.040)
+STALL_LATENCY = (0.100, 0.200)
+
+
+class FakeSession:
+    """Pyrogram client stand-in with a heavy-tailed latency profile."""
+
+    def __init__(self, seed: int) -> None:
+        self.name = f"session-{seed}"
+        self.rng = random.Random(seed)
+
+    async def invoke(self, _query: dict) -> SimpleNamespace:
+        roll = self.rng.random()
+        if roll < 0.02:
+            bounds = STALL_LATENCY  # DC hop / reconnect
+        elif roll < 0.12:
+            bounds = SLOW_LATENCY
+        else:
+            bounds = BASE_LATENCY
+        await asyncio.sleep(self.rng.uniform(*bounds))
+        return SimpleNamespace(gifts=[], hash=0)
+
+
+async def bench(label: str, hedge: bool) -> None:
+    """Time sequential catalog fetches through the client wrapper."""
+    wrapper = TelegramClientWrapper()
+    wrapper.client = FakeSession(seed=1)
+    wrapper.hedge_client = FakeSession(seed=2) if hedge else None
+    wrapper._catalog_latency.min_delay = 0.001
+
+    hedged_before = HEDGED_REQUESTS.labels(method="get_available_gifts")._value.get()
+    wins_before = HEDGE_WINS.labels(method="get_available_gifts")._value.get()
+
+    latencies = []
+    for _ in range(FETCHES):
+        start = time.perf_counter()
+        await wrapper.get_available_gifts()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    hedged = HEDGED_REQUESTS.labels(method="get_available_gifts")._value.get() - hedged_before
+    wins = HEDGE_WINS.labels(method="get_available_gifts")._value.get() - wins_before
+
+    latencies.sort()
+    p90 = latencies[int(len(latencies) * 0.90) - 1]
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"  {label:<10} median={statistics.median(latencies):6.1f} ms  p90={p90:6.1f} ms  "
+        f"p99={p99:6.1f} ms  hedge rate={hedged / FETCHES:5.1%}  wins={int(wins)}"
+    )
+
+
+async def run() -> None:
+    """Compare single-session and hedged fetches."""
+    await bench("single", hedge=False)
+    await bench("hedged", hedge=True)
+
+
+def main() -> None:
+    """Run the hedging benchmark."""
+    print("=" * 50)
+    print("Gift Hunter - Hedged Fetch Benchmark")
+    print("=" * 50)
+    print(f"  {FETCHES} catalog fetches, 10% slow and 2% stalled responses")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Benchmark the purchase planner across catalog sizes."""
+import gc
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.core.planner import PlanCandidate, PurchasePlanner, rarity_score
+
+PRICES = [15, 25, 50, 100, 350, 500, 1000, 2500, 10000, 20000]
+RECIPIENTS = ["@alice", "@bob", 123456789]
+RUNS = 200
+
+
+def build_catalog(size: int, rng: random.Random) -> list[PlanCandidate]:
+    """Build a synthetic catalog of (gift, recipient) candidates."""
+    candidates = []
+    for gift_id in range(size):
+        price = rng.choice(PRICES)
+        total_amount = rng.randint(1000, 500000)
+        for recipient in rng.sample(RECIPIENTS, rng.randint(1, len(RECIPIENTS))):
+            candidates.append(PlanCandidate(
+                gift_id=gift_id,
+                gift_name=f"Gift {gift_id}",
+                price=price,
+                recipient=recipient,
+                quantity=rng.randint(1, 10),
+                score=rarity_score(price, total_amount),
+            ))
+    return candidates
+
+
+def bench(size: int, budget_ratio: float) -> None:
+    """Time planning for one catalog size and budget pressure."""
+    rng = random.Random(size)
+    candidates = build_catalog(size, rng)
+    demand = sum(c.price * c.quantity for c in candidates)
+    balance = int(demand * budget_ratio)
+    planner = PurchasePlanner()
+
+    timings = []
+    plan = None
+    gc.disable()
+    try:
+        for _ in range(RUNS):
+            start = time.perf_counter()
+            plan = planner.plan(candidates, balance=balance)
+            timings.append((time.perf_counter() - start) * 1000)
+    finally:
+        gc.enable()
+
+    timings.sort()
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    print(
+        f"  gifts={size:>6}  candidates={len(candidates):>6}  budget={budget_ratio:>4.0%}  "
+        f"median={statistics.median(timings):8.3f} ms  p99={p99:8.3f} ms  "
+        f"optimal={plan.optimal}"
+    )
+
+
+def main() -> None:
+    """Run the planner benchmark."""
+    print("=" * 50)
+    print("Gift Hunter - Purchase Planner Benchmark")
+    print("=" * 50)
+
+    for size in (5, 20, 100, 1000, 5000):
+        for budget_ratio in (1.0, 0.3):
+            bench(size, budget_ratio)
+
+
+if __name__ == "__main__":
+    main()
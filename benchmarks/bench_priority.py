@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Benchmark velocity-aware gift prioritization."""
+import gc
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Settings require credentials; the benchmark never connects
+os.environ.setdefault("TELEGRAM_API_ID", "12345")
+os.environ.setdefault("TELEGRAM_API_HASH", "benchmark")
+os.environ.setdefault("TELEGRAM_PHONE_NUMBER", "+1234567890")
+
+from src.core.monitor import GiftMonitor
+
+RUNS = 200
+
+
+def build_gifts(size: int, rng: random.Random) -> list[dict]:
+    """Build a synthetic catalog of limited gifts."""
+    gifts = []
+    for gift_id in range(1, size + 1):
+        total = rng.choice([1000, 10000, 100000, 500000])
+        gifts.append({
+            "id": gift_id,
+            "total_amount": total,
+            "available_amount": rng.randint(total // 10, total),
+            # Most of the catalog is idle; a fifth is actively selling
+            "sell_rate": rng.randint(1, 200) if rng.random() < 0.2 else 0,
+        })
+    return gifts
+
+
+def bench(size: int) -> None:
+    """Time tracker updates and ordering for one catalog size."""
+    rng = random.Random(size)
+    monitor = GiftMonitor(client=None)
+    gifts = build_gifts(size, rng)
+
+    update_timings = []
+    sort_timings = []
+    gc.disable()
+    try:
+        for cycle in range(RUNS):
+            for gift in gifts:
+                sold = rng.randint(gift["sell_rate"] // 2, gift["sell_rate"])
+                gift["available_amount"] = max(gift["available_amount"] - sold, 0)
+
+            gift_ids = [gift["id"] for gift in gifts]
+
+            start = time.perf_counter()
+            priorities = [
+                monitor.depletion.observe(
+                    gift["id"], gift["available_amount"], gift["total_amount"],
+                    delay=monitor.interval, ts=cycle * monitor.interval,
+                )
+                for gift in gifts
+            ]
+            update_timings.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            monitor._sort_by_priority(gifts, gift_ids, priorities)
+            sort_timings.append((time.perf_counter() - start) * 1000)
+    finally:
+        gc.enable()
+
+    for label, timings in (("update", update_timings), ("order", sort_timings)):
+        timings.sort()
+        p99 = timings[int(len(timings) * 0.99) - 1]
+        print(
+            f"  candidates={size:>6}  {label:<6}  median={statistics.median(timings):7.3f} ms  "
+            f"p99={p99:7.3f} ms  per-gift={statistics.median(timings) * 1000 / size:6.3f} us"
+        )
+
+
+def main() -> None:
+    """Run the prioritization benchmark."""
+    print("=" * 50)
+    print("Gift Hunter - Prioritization Benchmark")
+    print("=" * 50)
+
+    for size in (100, 1000, 10000):
+        bench(size)
+
+
+if __name__ == "__main__":
+    main()
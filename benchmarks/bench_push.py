@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Benchmark drop detection latency: polling vs. update-driven fetches."""
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Settings require credentials; the benchmark never connects
+os.environ.setdefault("TELEGRAM_API_ID", "12345")
+os.environ.setdefault("TELEGRAM_API_HASH", "benchmark")
+os.environ.setdefault("TELEGRAM_PHONE_NUMBER", "+1234567890")
+
+from src.core.monitor import GiftMonitor
+from src.observability import setup_logging
+from src.storage import database
+
+DROPS = 20
+POLL_INTERVAL = 1.0
+RPC_LATENCY = 0.05
+
+
+class UpdateNewMessage:
+    """Synthetic update announcing a gift, as a service message would."""
+
+    def __init__(self) -> None:
+        self.message = MessageService()
+
+
+class MessageService:
+    def __init__(self) -> None:
+        self.action = MessageActionStarGift()
+
+
+class MessageActionStarGift:
+    pass
+
+
+class FakeClient:
+    """Local stand-in for the Telegram client with a fixed RPC latency."""
+
+    def __init__(self) -> None:
+        self.catalog: list[dict[str, Any]] = []
+        self.update_handler = None
+
+    async def get_available_gifts(self) -> list[dict[str, Any]]:
+        await asyncio.sleep(RPC_LATENCY)
+        return list(self.catalog)
+
+    def add_update_handler(self, callback: Any) -> Any:
+        self.update_handler = callback
+        return callback
+
+    def remove_update_handler(self, _handle: Any) -> None:
+        self.update_handler = None
+
+    async def announce(self) -> None:
+        """Deliver a synthetic update, as Telegram would after a drop."""
+        if self.update_handler:
+            await asyncio.sleep(RPC_LATENCY / 2)
+            await self.update_handler(self, UpdateNewMessage(), {}, {})
+
+
+def gift(gift_id: int) -> dict[str, Any]:
+    """A limited gift matching the default price ranges."""
+    return {
+        "id": gift_id,
+        "title": f"Gift {gift_id}",
+        "stars": 100,
+        "total_amount": 10000,
+        "available_amount": 10000,
+        "is_limited": True,
+        "is_sold_out": False,
+    }
+
+
+async def bench(label: str, push: bool) -> None:
+    """Publish drops at random times and time their detection."""
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        database.configure_engine(path=Path(tmp) / "bench.db")
+        await database.init_db()
+
+        client = FakeClient()
+        published: dict[int, float] = {}
+        latencies: list[float] = []
+
+        def on_batch(gifts: list[dict[str, Any]]) -> None:
+            now = time.perf_counter()
+            for matched in gifts:
+                start = published.pop(matched["id"], None)
+                if start is not None:
+                    latencies.append((now - start) * 1000)
+
+        monitor = GiftMonitor(client, on_gift_batch=on_batch)
+        if push:
+            monitor.updates.attach()
+        else:
+            monitor.updates = None
+        monitor.interval = POLL_INTERVAL
+        monitor._running = True
+
+        fetcher = asyncio.create_task(monitor._fetch_loop())
+        processor = asyncio.create_task(monitor._process_loop())
+
+        for gift_id in range(1, DROPS + 1):
+            await asyncio.sleep(rng.uniform(0.3, 1.2))
+            client.catalog.append(gift(gift_id))
+            published[gift_id] = time.perf_counter()
+            await client.announce()
+
+        # Let the last drop be picked up by the next poll
+        await asyncio.sleep(POLL_INTERVAL + RPC_LATENCY * 2)
+
+        monitor._running = False
+        monitor._snapshots.close()
+        fetcher.cancel()
+        await processor
+        await database.close_db()
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"  {label:<8} median={statistics.median(latencies):8.1f} ms  "
+        f"p99={p99:8.1f} ms  detected={len(latencies)}/{DROPS}"
+    )
+
+
+async def run() -> None:
+    """Compare both detection modes."""
+    await bench("polling", push=False)
+    await bench("push", push=True)
+
+
+def main() -> None:
+    """Run the push detection benchmark."""
+    print("=" * 50)
+    print("Gift Hunter - Push Detection Benchmark")
+    print("=" * 50)
+    print(f"  {DROPS} drops, poll interval {POLL_INTERVAL}s, RPC latency {RPC_LATENCY * 1000:.0f} ms")
+
+    setup_logging("WARNING")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Benchmark the per-call overhead of RPC latency and error metrics."""
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Settings require credentials; the benchmark never connects
+os.environ.setdefault("TELEGRAM_API_ID", "12345")
+os.environ.setdefault("TELEGRAM_API_HASH", "benchmark")
+os.environ.setdefault("TELEGRAM_PHONE_NUMBER", "+1234567890")
+
+import contextlib
+
+from pyrogram.errors import FloodWait
+
+from src.core.rpc import instrumented
+
+CALLS = 100_000
+ROUNDS = 5
+
+
+async def answer() -> int:
+    """An RPC that answers without awaiting the network."""
+    return 0
+
+
+async def flood() -> int:
+    """An RPC that fails with FLOOD_WAIT."""
+    raise FloodWait(value=3)
+
+
+async def direct(calls: int) -> float:
+    """Seconds for calls bare awaits."""
+    start = time.perf_counter()
+    for _ in range(calls):
+        await answer()
+    return time.perf_counter() - start
+
+
+async def wrapped(calls: int) -> float:
+    """Seconds for calls instrumented awaits."""
+    start = time.perf_counter()
+    for _ in range(calls):
+        await instrumented("payments.getStarGifts", "bench", answer())
+    return time.perf_counter() - start
+
+
+async def flooded(calls: int) -> tuple[float, float]:
+    """Seconds for calls failing awaits, bare and instrumented."""
+    start = time.perf_counter()
+    for _ in range(calls):
+        with contextlib.suppress(FloodWait):
+            await flood()
+    bare = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        with contextlib.suppress(FloodWait):
+            await instrumented("payments.sendStarsForm", "bench", flood())
+    return bare, time.perf_counter() - start
+
+
+async def run() -> None:
+    """Report the best of several rounds for each path."""
+    bare = min([await direct(CALLS) for _ in range(ROUNDS)])
+    timed = min([await wrapped(CALLS) for _ in range(ROUNDS)])
+    print(f"  answered:  bare={bare / CALLS * 1e6:5.2f} us  instrumented={timed / CALLS * 1e6:5.2f} us  "
+          f"overhead={(timed - bare) / CALLS * 1e6:5.2f} us/call")
+
+    errors = CALLS // 10
+    bare, timed = min([await flooded(errors) for _ in range(ROUNDS)], key=lambda r: r[1])
+    print(f"  FloodWait: bare={bare / errors * 1e6:5.2f} us  instrumented={timed / errors * 1e6:5.2f} us  "
+          f"overhead={(timed - bare) / errors * 1e6:5.2f} us/call")
+
+
+def main() -> None:
+    """Run the RPC metrics benchmark."""
+    print("=" * 50)
+    print("Gift Hunter - RPC Metrics Overhead Benchmark")
+    print("=" * 50)
+    print(f"  {CALLS} answered and {CALLS // 10} FloodWait calls, best of {ROUNDS} rounds")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
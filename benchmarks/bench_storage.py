@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Benchmark SQLite commit throughput and latency per engine mode."""
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy.exc import OperationalError
+
+from src.storage import database
+from src.storage.database import get_daily_stats, record_purchase
+
+WRITERS = 4
+COMMITS_PER_WRITER = 250
+READERS = 4
+
+
+async def writer(worker: int, latencies: list[float], failures: list[int]) -> None:
+    """Commit purchases one transaction at a time."""
+    for i in range(COMMITS_PER_WRITER):
+        start = time.perf_counter()
+        try:
+            async with database.get_session() as session:
+                await record_purchase(
+                    session,
+                    gift_id=i,
+                    gift_name=f"Gift {i}",
+                    recipient_id=worker,
+                    price=100,
+                    quantity=1,
+                )
+        except OperationalError:
+            # "database is locked" under contention
+            failures[0] += 1
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def reader(stop: asyncio.Event, counter: list[int]) -> None:
+    """Issue analytics-style reads while writers run."""
+    while not stop.is_set():
+        try:
+            async with database.get_read_session() as session:
+                await get_daily_stats(session, "2026-01-06")
+            counter[0] += 1
+        except OperationalError:
+            pass
+        await asyncio.sleep(0)
+
+
+async def bench(mode: str) -> None:
+    """Run the mixed workload against one engine mode."""
+    with tempfile.TemporaryDirectory() as tmp:
+        database.configure_engine(mode=mode, path=Path(tmp) / "bench.db")
+        await database.init_db()
+
+        latencies: list[float] = []
+        failures = [0]
+        reads = [0]
+        stop = asyncio.Event()
+        read_tasks = [asyncio.create_task(reader(stop, reads)) for _ in range(READERS)]
+
+        start = time.perf_counter()
+        await asyncio.gather(*(writer(w, latencies, failures) for w in range(WRITERS)))
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        await asyncio.gather(*read_tasks)
+        await database.close_db()
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"  mode={mode:<8} commits/s={len(latencies) / elapsed:8.1f}  "
+        f"median={statistics.median(latencies):7.2f} ms  p99={p99:7.2f} ms  "
+        f"locked={failures[0]}  reads={reads[0]}"
+    )
+
+
+async def run() -> None:
+    """Benchmark every engine mode."""
+    for mode in ("default", "wal"):
+        await bench(mode)
+
+
+def main() -> None:
+    """Run the storage benchmark."""
+    print("=" * 50)
+    print("Gift Hunter - Storage Engine Benchmark")
+    print("=" * 50)
+    print(f"  {WRITERS} writers x {COMMITS_PER_WRITER} commits, {READERS} concurrent readers")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -34,6 +34,8 @@ class Config:
 
         self.INTERVAL = self.parser.getfloat('Bot', 'INTERVAL', fallback=15.0)
         self.LANGUAGE = self.parser.get('Bot', 'LANGUAGE', fallback='EN').lower()
+        self.NOTIFY_INTERVAL = self.parser.getfloat('Bot', 'NOTIFY_INTERVAL', fallback=5.0)
+        self.NOTIFY_RATE = self.parser.getint('Bot', 'NOTIFY_RATE', fallback=20)
 
         self.GIFT_RANGES = self._parse_gift_ranges()
         self.PURCHASE_ONLY_UPGRADABLE_GIFTS = self.parser.getboolean('Gifts', 'PURCHASE_ONLY_UPGRADABLE_GIFTS',
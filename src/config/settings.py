@@ -1,4 +1,5 @@
 """Application settings with Pydantic validation."""
+from datetime import time
 from functools import lru_cache
 from pathlib import Path
 from typing import Literal
@@ -49,6 +50,24 @@ class NotificationSettings(BaseModel):
         ge=0,
         description="Balance threshold for low balance alerts"
     )
+    max_messages_per_minute: int = Field(
+        default=20,
+        ge=1,
+        description="Channel message rate limit of the notification sender"
+    )
+    digest_window_seconds: float = Field(
+        default=10.0,
+        gt=0,
+        description="Informational notifications within this window are sent as one digest"
+    )
+    daily_summary_time: time = Field(
+        default=time(23, 55),
+        description="UTC time of day the daily summary is sent"
+    )
+    stats_command: bool = Field(
+        default=True,
+        description="Answer /stats sent from the account itself"
+    )
 
 
 class GiftRange(BaseModel):
@@ -97,6 +116,15 @@ class GiftSettings(BaseModel):
         default=True,
         description="Process rare gifts first"
     )
+    optimize_purchase_plan: bool = Field(
+        default=True,
+        description="Allocate each cycle's budget across all matching gifts at once"
+    )
+    payment_form_ttl_seconds: int = Field(
+        default=300,
+        ge=10,
+        description="Seconds a prefetched payment form is considered valid"
+    )
     blacklist_gifts: list[int] = Field(
         default_factory=list,
         description="Gift IDs to skip"
@@ -122,6 +150,86 @@ class BudgetSettings(BaseModel):
     )
 
 
+class StorageSettings(BaseModel):
+    """Database engine and write settings."""
+
+    engine_mode: Literal["wal", "default"] = Field(
+        default="wal",
+        description="wal: single serialized writer plus read-only pool; default: one plain engine"
+    )
+    synchronous: Literal["OFF", "NORMAL", "FULL"] = Field(
+        default="NORMAL",
+        description="SQLite synchronous level in WAL mode"
+    )
+    cache_size_kib: int = Field(
+        default=16384,
+        ge=0,
+        description="Page cache per connection in KiB"
+    )
+    mmap_size_mb: int = Field(
+        default=64,
+        ge=0,
+        description="Memory-mapped I/O size in MiB"
+    )
+    busy_timeout_ms: int = Field(
+        default=5000,
+        ge=0,
+        description="Time to wait on a locked database"
+    )
+    read_pool_size: int = Field(
+        default=4,
+        ge=1,
+        description="Read-only connections in WAL mode"
+    )
+    availability_raw_retention_hours: int = Field(
+        default=24,
+        ge=1,
+        description="Hours of full-resolution availability history before minute buckets"
+    )
+    availability_minute_retention_days: int = Field(
+        default=30,
+        ge=1,
+        description="Days of minute buckets before hour buckets"
+    )
+    journal_batch_size: int = Field(
+        default=50,
+        ge=1,
+        description="Journaled purchases that trigger an immediate flush"
+    )
+    journal_flush_interval: float = Field(
+        default=1.0,
+        gt=0,
+        description="Max seconds a purchase waits in the journal"
+    )
+    journal_max_attempts: int = Field(
+        default=5,
+        ge=1,
+        description="Failed writes after which a journaled purchase is dead-lettered"
+    )
+    journal_dead_letter_path: str = Field(
+        default="data/purchase_dead_letters.jsonl",
+        description="File receiving journaled purchases that could not be saved"
+    )
+    shutdown_flush_timeout: float = Field(
+        default=5.0,
+        gt=0,
+        description="Deadline for flushing the journal on shutdown"
+    )
+    intent_journal_path: str = Field(
+        default="data/purchase_intents.log",
+        description="Append-only log of purchase intents used for crash recovery"
+    )
+    intent_journal_fsync: bool = Field(
+        default=False,
+        description="fsync every intent record (survives power loss, adds latency)"
+    )
+    intent_journal_compact_after: int = Field(
+        default=1000,
+        ge=1,
+        description="Finished intents logged before the intent log is compacted"
+    )
+
+
 class TelegramBotSettings(BaseModel):
     """Bot behavior settings."""
     
@@ -140,6 +248,185 @@ class TelegramBotSettings(BaseModel):
         ge=0.5,
         description="Initial retry delay"
     )
+    push_updates: bool = Field(
+        default=True,
+        description="Fetch the catalog as soon as an update signals a change"
+    )
+    fallback_interval_seconds: int = Field(
+        default=60,
+        ge=5,
+        description="Safety-net polling interval while push updates are enabled"
+    )
+    announcement_chats: list[int] = Field(
+        default_factory=list,
+        description="Chat IDs whose new posts trigger a catalog fetch"
+    )
+    push_update_types: list[str] = Field(
+        default_factory=list,
+        description="Extra raw update class names that trigger a catalog fetch"
+    )
+    hedge_session: str | None = Field(
+        default=None,
+        description="Second session name for hedged catalog fetches (None to disable)"
+    )
+    hedge_quantile: float = Field(
+        default=0.9,
+        gt=0.5,
+        lt=1.0,
+        description="Primary latency quantile after which a catalog fetch is hedged"
+    )
+    hedge_min_delay_ms: int = Field(
+        default=50,
+        ge=0,
+        description="Minimum wait before hedging a catalog fetch"
+    )
+    keepalive_interval_seconds: float = Field(
+        default=5.0,
+        ge=1.0,
+        description="Seconds between keep-alive pings"
+    )
+    keepalive_timeout_seconds: float = Field(
+        default=2.0,
+        gt=0,
+        description="Seconds before an unanswered ping marks the connection dead"
+    )
+    reconnect_floor_seconds: float = Field(
+        default=0.1,
+        gt=0,
+        description="First reconnect retry delay; doubles on each failure"
+    )
+    reconnect_max_seconds: float = Field(
+        default=30.0,
+        gt=0,
+        description="Maximum reconnect retry delay"
+    )
+    warmup_interval_seconds: float = Field(
+        default=60.0,
+        ge=1.0,
+        description="Seconds between payments path warm-up requests"
+    )
+    error_verdicts: dict[str, Literal["terminal", "retry_now", "backoff", "reroute"]] = Field(
+        default_factory=dict,
+        description="Per Telegram error ID overrides of the built-in retry verdicts"
+    )
+    gift_breaker_cooldown_seconds: float = Field(
+        default=3600.0,
+        ge=0,
+        description="How long purchases of a gift stop after a terminal gift error"
+    )
+    recipient_breaker_cooldown_seconds: float = Field(
+        default=3600.0,
+        ge=0,
+        description="How long sends to a recipient stop after a terminal recipient error"
+    )
+    account_breaker_cooldown_seconds: float = Field(
+        default=300.0,
+        ge=0,
+        description="How long all purchases stop after an account-level error"
+    )
+
+
+class MetricsSettings(BaseModel):
+    """Prometheus label cardinality limits."""
+
+    label_limit: int = Field(
+        default=20,
+        ge=1,
+        description="Distinct values kept per open-ended label; the rest are reported as 'other'"
+    )
+    allow: dict[str, list[str]] = Field(
+        default_factory=dict,
+        description="Label values that always keep their own series, per label name"
+    )
+
+
+class TracingSettings(BaseModel):
+    """Span tracing of monitor cycles and purchases."""
+
+    enabled: bool = Field(
+        default=False,
+        description="Record sampled traces to a local OTLP JSONL file"
+    )
+    sample_rate: float = Field(
+        default=0.05,
+        gt=0,
+        le=1.0,
+        description="Fraction of catalog fetches whose trace is recorded"
+    )
+    path: str = Field(
+        default="data/traces.jsonl",
+        description="Span file, one OTLP/JSON export per line"
+    )
+    flush_interval: float = Field(
+        default=1.0,
+        gt=0,
+        description="Seconds between span file writes"
+    )
+    max_queue: int = Field(
+        default=10000,
+        ge=100,
+        description="Spans held between writes; further spans are dropped"
+    )
+    max_file_mb: int = Field(
+        default=100,
+        ge=1,
+        description="Size at which the span file is rotated"
+    )
+
+
+class MemorySettings(BaseModel):
+    """Memory guard thresholds."""
+
+    limit_mb: int = Field(
+        default=0,
+        ge=0,
+        description="Memory limit in MB (0 = read the container's cgroup limit)"
+    )
+    soft_limit_ratio: float = Field(
+        default=0.85,
+        gt=0,
+        lt=1.0,
+        description="Fraction of the limit at which optional work is shed"
+    )
+    resume_ratio: float = Field(
+        default=0.75,
+        gt=0,
+        lt=1.0,
+        description="Fraction of the limit below which shedding stops"
+    )
+    check_interval_seconds: float = Field(
+        default=5.0,
+        gt=0,
+        description="Seconds between memory checks"
+    )
+
+    @field_validator("resume_ratio")
+    @classmethod
+    def validate_resume_ratio(cls, v: float, info) -> float:
+        """Ensure resume_ratio < soft_limit_ratio."""
+        soft_limit_ratio = info.data.get("soft_limit_ratio", 1.0)
+        if v >= soft_limit_ratio:
+            raise ValueError(f"resume_ratio ({v}) must be < soft_limit_ratio ({soft_limit_ratio})")
+        return v
+
+
+class EventLoopSettings(BaseModel):
+    """Event loop lag monitoring."""
+
+    enabled: bool = Field(
+        default=True,
+        description="Probe event loop lag and capture the stack of stalls"
+    )
+    probe_interval_ms: float = Field(
+        default=10.0,
+        ge=1,
+        description="Milliseconds between lag probes"
+    )
+    stall_threshold_ms: float = Field(
+        default=100.0,
+        ge=10,
+        description="Lag at which the stalled code's stack is captured and logged"
+    )
 
 
 class AppConfig(BaseModel):
@@ -149,6 +436,11 @@ class AppConfig(BaseModel):
     notifications: NotificationSettings = Field(default_factory=NotificationSettings)
     gifts: GiftSettings = Field(default_factory=GiftSettings)
     budget: BudgetSettings = Field(default_factory=BudgetSettings)
+    storage: StorageSettings = Field(default_factory=StorageSettings)
+    metrics: MetricsSettings = Field(default_factory=MetricsSettings)
+    tracing: TracingSettings = Field(default_factory=TracingSettings)
+    memory: MemorySettings = Field(default_factory=MemorySettings)
+    event_loop: EventLoopSettings = Field(default_factory=EventLoopSettings)
     language: Literal["EN", "RU", "AR"] = Field(default="EN")
 
 
@@ -164,8 +456,12 @@ class Settings(BaseSettings):
     # From environment variables
     telegram: TelegramSettings = Field(default_factory=TelegramSettings)
     log_level: Literal["DEBUG", "INFO", "WARNING", "ERROR"] = Field(default="INFO")
-    metrics_port: int = Field(default=9090, ge=1, le=65535)
     health_port: int = Field(default=8080, ge=1, le=65535)
+    metrics_cache_seconds: float = Field(default=1.0, ge=0)
+    profiling_enabled: bool = Field(default=False)
+    profiling_max_seconds: float = Field(default=60.0, gt=0, le=600)
+    profiling_interval_ms: float = Field(default=5.0, ge=1)
+    memory_debug_enabled: bool = Field(default=False)
     
     # From config.yaml
     app: AppConfig = Field(default_factory=AppConfig)
@@ -1,6 +1,7 @@
 """Core engine components."""
 from .client import TelegramClientWrapper
 from .monitor import GiftMonitor
+from .planner import PurchasePlanner
 from .purchase import PurchaseEngine
 
-__all__ = ["TelegramClientWrapper", "GiftMonitor", "PurchaseEngine"]
+__all__ = ["TelegramClientWrapper", "GiftMonitor", "PurchaseEngine", "PurchasePlanner"]
@@ -1,16 +1,40 @@
 """Telegram client wrapper with retry and error handling."""
 import asyncio
-from typing import Any
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+from typing import Any, NamedTuple
 
-from pyrogram import Client
+from pyrogram import Client, filters
 from pyrogram.errors import FloodWait, RPCError
+from pyrogram.handlers import MessageHandler, RawUpdateHandler
 
 from src.config import get_settings
 from src.observability import get_logger, set_health_status
-from src.observability.metrics import API_REQUESTS
+from src.observability.metrics import (
+    API_REQUESTS,
+    CATALOG_FETCH_DURATION,
+    PURCHASES_FAILED,
+    SEND_ERRORS,
+)
+
+from .connection import ConnectionSupervisor
+from .errors import CircuitBreaker, ErrorPolicy, Scope, Verdict, classify, error_id
+from .forms import PaymentForm, PaymentFormCache
+from .hedging import LatencyTracker, hedged
+from .rpc import instrumented
 
 logger = get_logger(__name__)
 
+# Handler group for internal raw update listeners; runs ahead of group 0
+_RAW_UPDATE_GROUP = -1
+
+
+class GiftReceipt(NamedTuple):
+    """Confirmation of a paid gift unit."""
+    form_id: int
+    transaction_id: str | None
+
 
 class TelegramClientWrapper:
     """Wrapper around Pyrogram client with enhanced error handling."""
@@ -27,9 +51,52 @@ class TelegramClientWrapper:
             workdir="data/sessions",
         )
         
+        self._started = False
         self._connected = False
         self._max_retries = settings.app.telegram.max_retries
         self._retry_delay = settings.app.telegram.retry_delay_seconds
+
+        # Last catalog and its hash, for not-modified fetches
+        self._catalog: list[Any] = []
+        self._catalog_hash = 0
+
+        # Optional second session that races slow catalog fetches
+        telegram_config = settings.app.telegram
+        self.hedge_client: Client | None = None
+        if telegram_config.hedge_session:
+            self.hedge_client = Client(
+                name=telegram_config.hedge_session,
+                api_id=settings.telegram.api_id,
+                api_hash=settings.telegram.api_hash.get_secret_value(),
+                phone_number=settings.telegram.phone_number,
+                workdir="data/sessions",
+                no_updates=True,
+            )
+        self._catalog_latency = LatencyTracker(
+            quantile=telegram_config.hedge_quantile,
+            min_delay=telegram_config.hedge_min_delay_ms / 1000,
+        )
+
+        # Retry verdicts and breakers for purchase errors
+        self._error_verdicts = {
+            name: Verdict(verdict) for name, verdict in telegram_config.error_verdicts.items()
+        }
+        self.breakers = {
+            Scope.GIFT: CircuitBreaker(Scope.GIFT, telegram_config.gift_breaker_cooldown_seconds),
+            Scope.RECIPIENT: CircuitBreaker(Scope.RECIPIENT, telegram_config.recipient_breaker_cooldown_seconds),
+            Scope.ACCOUNT: CircuitBreaker(Scope.ACCOUNT, telegram_config.account_breaker_cooldown_seconds),
+        }
+        # Prepared payment forms, dropped when a gift's breaker opens (set by the purchase engine)
+        self.forms: PaymentFormCache | None = None
+
+        self.supervisor = ConnectionSupervisor(
+            self,
+            ping_interval=telegram_config.keepalive_interval_seconds,
+            ping_timeout=telegram_config.keepalive_timeout_seconds,
+            reconnect_floor=telegram_config.reconnect_floor_seconds,
+            reconnect_max=telegram_config.reconnect_max_seconds,
+            warmup_interval=telegram_config.warmup_interval_seconds,
+        )
     
     async def start(self) -> None:
         """Start the Telegram client and establish connection."""
@@ -37,6 +104,7 @@ class TelegramClientWrapper:
         
         try:
             await self.client.start()
+            self._started = True
             self._connected = True
             set_health_status(status="healthy", telegram_connected=True)
             
@@ -52,13 +120,30 @@ class TelegramClientWrapper:
             set_health_status(status="unhealthy", telegram_connected=False)
             logger.error("telegram_connection_failed", error=str(e))
             raise
+
+        if self.hedge_client:
+            try:
+                await self.hedge_client.start()
+                logger.info("hedge_session_connected", session=self.hedge_client.name)
+            except Exception as e:
+                # Hedging is optional; carry on with the primary session
+                logger.warning("hedge_session_failed", error=str(e))
+                self.hedge_client = None
+
+        self.supervisor.start()
     
     async def stop(self) -> None:
         """Stop the Telegram client gracefully."""
-        if self._connected:
+        await self.supervisor.stop()
+
+        # Started, not connected: the clients of a dropped session still run
+        if self._started:
             logger.info("stopping_telegram_client")
             await self.client.stop()
+            self._started = False
             self._connected = False
+            if self.hedge_client:
+                await self.hedge_client.stop()
             set_health_status(telegram_connected=False)
     
     async def __aenter__(self) -> "TelegramClientWrapper":
@@ -75,25 +160,116 @@ class TelegramClientWrapper:
         """Check if client is connected."""
         return self._connected
     
+    def set_connected(self, connected: bool) -> None:
+        """Record the connection state reported by the supervisor."""
+        self._connected = connected
+        set_health_status(
+            status="healthy" if connected else "degraded",
+            telegram_connected=connected,
+        )
+
+    async def reconnect(self) -> None:
+        """Re-establish the MTProto session without re-authorizing."""
+        await self.client.session.restart()
+
+    def add_update_handler(
+        self,
+        callback: Callable[[Any, Any, dict, dict], Awaitable[None]],
+    ) -> tuple[RawUpdateHandler, int]:
+        """Register a raw update listener.
+
+        Args:
+            callback: Coroutine called with (client, update, users, chats)
+
+        Returns:
+            Handle to pass to remove_update_handler
+        """
+        return self.client.add_handler(RawUpdateHandler(callback), group=_RAW_UPDATE_GROUP)
+
+    def remove_update_handler(self, handle: tuple[RawUpdateHandler, int]) -> None:
+        """Unregister a raw update listener."""
+        self.client.remove_handler(*handle)
+
+    def add_command_handler(
+        self,
+        command: str,
+        callback: Callable[[Any, Any], Awaitable[None]],
+    ) -> tuple[MessageHandler, int]:
+        """Register a /command sent by the account owner.
+
+        Messages from anyone else are ignored, including members of the
+        notification chat.
+
+        Args:
+            command: Command name without the slash
+            callback: Coroutine called with (client, message)
+
+        Returns:
+            Handle to pass to remove_update_handler
+        """
+        return self.client.add_handler(MessageHandler(callback, filters.command(command) & filters.me))
+
+    def _invoke(self, query: Any, client: Client | None = None) -> Awaitable[Any]:
+        """Invoke a raw request with per-method latency and error metrics.
+
+        Args:
+            query: Raw request; dict placeholders name their method in "_"
+            client: Session to send it on (the primary by default)
+
+        Returns:
+            Awaitable RPC result
+        """
+        client = client or self.client
+        method = query["_"] if isinstance(query, dict) else type(query).QUALNAME
+        return instrumented(method, client.name, client.invoke(query))
+
     async def get_available_gifts(self) -> list[Any]:
         """Get list of available gifts from Telegram.
         
+        The request carries the hash of the last catalog, so an unchanged
+        catalog costs a not-modified reply instead of the full list. With
+        a hedge session configured, a fetch slower than the primary's
+        usual tail is re-sent there and the first answer wins.
+
         Returns:
             List of gift objects
         """
         API_REQUESTS.labels(method="get_available_gifts").inc()
         
+        # Using raw method call - adjust based on actual Pyrogram API
+        # This is a placeholder - actual method depends on Telegram API
+        query = {"_": "payments.getStarGifts", "hash": self._catalog_hash}
+
         try:
-            # Using raw method call - adjust based on actual Pyrogram API
-            result = await self.client.invoke(
-                # This is a placeholder - actual method depends on Telegram API
-                {"_": "payments.getStarGifts", "hash": 0}
-            )
-            return result.gifts if hasattr(result, 'gifts') else []
+            start = time.perf_counter()
+            if self.hedge_client:
+                hedge_client = self.hedge_client
+                result = await hedged(
+                    "get_available_gifts",
+                    lambda: self._invoke(query),
+                    lambda: self._invoke(query, hedge_client),
+                    self._catalog_latency,
+                )
+            else:
+                result = await self._invoke(query)
+            CATALOG_FETCH_DURATION.observe(time.perf_counter() - start)
+
+            gifts = getattr(result, "gifts", None)
+            if gifts is None:
+                # StarGiftsNotModified: the cached catalog is current
+                return self._catalog
+
+            self._catalog = gifts
+            self._catalog_hash = getattr(result, "hash", 0)
+            return gifts
         except FloodWait as e:
             logger.warning("flood_wait", wait_seconds=e.value)
             await asyncio.sleep(e.value)
             return await self.get_available_gifts()
+        except (TimeoutError, OSError):
+            # Transport-level failure: have the supervisor verify the link now
+            self.supervisor.check_now()
+            raise
         except RPCError as e:
             logger.error("api_error", error_message=str(e))
             return []
@@ -108,7 +284,7 @@ class TelegramClientWrapper:
         
         try:
             # Placeholder - actual API call depends on Telegram API structure
-            result = await self.client.invoke(
+            result = await self._invoke(
                 {"_": "payments.getStarsStatus", "peer": {"_": "inputPeerSelf"}}
             )
             return result.balance if hasattr(result, 'balance') else 0
@@ -116,57 +292,243 @@ class TelegramClientWrapper:
             logger.error("balance_fetch_failed", error=str(e))
             return 0
     
+    async def get_payment_form(
+        self,
+        gift_id: int,
+        recipient_id: int,
+        hide_name: bool = True,
+    ) -> PaymentForm | None:
+        """Request the payment form for one unit of a gift.
+
+        Args:
+            gift_id: ID of the gift to send
+            recipient_id: User ID of the recipient
+            hide_name: Whether to hide sender's name
+
+        Returns:
+            PaymentForm, or None if the form could not be obtained
+        """
+        API_REQUESTS.labels(method="get_payment_form").inc()
+
+        # Placeholder - actual invoice structure depends on Telegram API
+        invoice = {
+            "_": "inputInvoiceStarGift",
+            "gift_id": gift_id,
+            "user_id": recipient_id,
+            "hide_name": hide_name,
+        }
+
+        try:
+            result = await self._invoke({"_": "payments.getPaymentForm", "invoice": invoice})
+        except RPCError as e:
+            # Prefetches run in bursts; their flood waits must not block real purchases
+            self._on_purchase_error(e, gift_id, recipient_id, trip_account=False)
+            return None
+
+        return PaymentForm(
+            form_id=getattr(result, "form_id", 0),
+            invoice=invoice,
+            fetched_at=time.monotonic(),
+        )
+
     async def send_gift(
         self,
         gift_id: int,
         recipient_id: int,
         hide_name: bool = True,
-    ) -> bool:
+        form: PaymentForm | None = None,
+        on_submit: Callable[[PaymentForm], None] | None = None,
+    ) -> GiftReceipt | None:
         """Send a gift to a recipient.
         
+        With a prepared form only the submission goes over the wire;
+        otherwise the form is requested first. A form pays for one unit
+        only, so after a transport failure the same form is resubmitted:
+        if the first submission did go through, the retry cannot buy a
+        second unit. Telegram errors are handled per their ErrorPolicy;
+        terminal ones open a circuit breaker and are never retried.
+
         Args:
             gift_id: ID of the gift to send
             recipient_id: User ID of the recipient
             hide_name: Whether to hide sender's name
+            form: Payment form prepared in advance
+            on_submit: Called with the form right before each submission
             
         Returns:
-            True if successful, False otherwise
+            GiftReceipt if successful, None if the payment was refused
+
+        Raises:
+            OSError, asyncio.TimeoutError: The last submission's outcome
+                is unknown
         """
         API_REQUESTS.labels(method="send_gift").inc()
         
+        if not self.can_send(gift_id, recipient_id):
+            PURCHASES_FAILED.labels(reason="circuit_open").inc()
+            return None
+
         for attempt in range(self._max_retries):
+            if form is None:
+                form = await self.get_payment_form(gift_id, recipient_id, hide_name)
+                if form is None:
+                    # Terminal form errors have opened a breaker by now
+                    if attempt < self._max_retries - 1 and self.can_send(gift_id, recipient_id):
+                        await asyncio.sleep(self._retry_delay * (2 ** attempt))
+                        continue
+                    return None
+
+            if on_submit:
+                on_submit(form)
+
             try:
-                await self.client.invoke({
-                    "_": "payments.sendStarsGift",
-                    "gift_id": gift_id,
-                    "user_id": recipient_id,
-                    "hide_name": hide_name,
+                result = await self._invoke({
+                    "_": "payments.sendStarsForm",
+                    "form_id": form.form_id,
+                    "invoice": form.invoice,
                 })
-                return True
-                
-            except FloodWait as e:
-                logger.warning(
-                    "flood_wait_during_purchase",
-                    wait_seconds=e.value,
-                    attempt=attempt + 1,
+                return GiftReceipt(
+                    form_id=form.form_id,
+                    transaction_id=getattr(result, "transaction_id", None),
                 )
-                await asyncio.sleep(e.value)
                 
             except RPCError as e:
-                logger.error(
-                    "gift_send_failed",
+                policy = self._on_purchase_error(e, gift_id, recipient_id, attempt)
+
+                if policy.verdict in (Verdict.TERMINAL, Verdict.REROUTE):
+                    return None
+                if attempt == self._max_retries - 1:
+                    return None
+
+                if policy.refresh_form:
+                    form = None
+                if policy.verdict == Verdict.BACKOFF:
+                    await asyncio.sleep(self._retry_delay * (2 ** attempt))
+
+            except (TimeoutError, OSError) as e:
+                logger.warning(
+                    "gift_send_outcome_unknown",
                     gift_id=gift_id,
-                    recipient_id=recipient_id,
-                    error=str(e),
+                    form_id=form.form_id,
+                    error=str(e) or type(e).__name__,
                     attempt=attempt + 1,
                 )
+                self.supervisor.check_now()
                 
-                if attempt < self._max_retries - 1:
-                    await asyncio.sleep(self._retry_delay * (2 ** attempt))
-                else:
-                    return False
+                if attempt == self._max_retries - 1:
+                    raise
+                await asyncio.sleep(self._retry_delay * (2 ** attempt))
+
+        return None
+
+    def can_send(self, gift_id: int, recipient_id: int | None = None) -> bool:
+        """Check the circuit breakers for a purchase.
+
+        Args:
+            gift_id: Gift ID
+            recipient_id: Recipient user ID (not checked if None)
+
+        Returns:
+            False if the account, gift or recipient breaker is open
+        """
+        return (
+            self.breakers[Scope.ACCOUNT].allow(self.client.name)
+            and self.breakers[Scope.GIFT].allow(gift_id)
+            and (recipient_id is None or self.breakers[Scope.RECIPIENT].allow(recipient_id))
+        )
+
+    def _on_purchase_error(
+        self,
+        error: RPCError,
+        gift_id: int,
+        recipient_id: int,
+        attempt: int = 0,
+        trip_account: bool = True,
+    ) -> ErrorPolicy:
+        """Classify a purchase error, record it and trip breakers.
+
+        Args:
+            error: Error raised by the request
+            gift_id: Gift ID
+            recipient_id: Recipient user ID
+            attempt: Zero-based attempt number
+            trip_account: Whether an account-scoped error opens the account breaker
+
+        Returns:
+            The error's policy
+        """
+        name = error_id(error)
+        policy = classify(error, self._error_verdicts)
+        SEND_ERRORS.labels(error=name, verdict=policy.verdict.value).inc()
+
+        logger.error(
+            "gift_send_failed",
+            gift_id=gift_id,
+            recipient_id=recipient_id,
+            error=name,
+            verdict=policy.verdict.value,
+            attempt=attempt + 1,
+        )
+
+        if (
+            policy.verdict in (Verdict.TERMINAL, Verdict.REROUTE)
+            and policy.scope != Scope.REQUEST
+            and (trip_account or policy.scope != Scope.ACCOUNT)
+        ):
+            key = {
+                Scope.GIFT: gift_id,
+                Scope.RECIPIENT: recipient_id,
+                Scope.ACCOUNT: self.client.name,
+            }[policy.scope]
+            # A flood wait says exactly how long the account is blocked
+            cooldown = error.value if isinstance(error, FloodWait) else None
+            self.breakers[policy.scope].trip(key, cooldown)
+            if policy.scope == Scope.GIFT and self.forms is not None:
+                self.forms.invalidate(gift_id)
         
-        return False
+        return policy
+
+    async def find_gift_payments(
+        self,
+        gift_id: int,
+        recipient_id: int,
+        since: datetime,
+    ) -> list[str]:
+        """Look up outgoing star-gift payments in the transaction history.
+
+        Args:
+            gift_id: Gift ID
+            recipient_id: Recipient user ID
+            since: Earliest payment time to consider (UTC)
+
+        Returns:
+            Transaction IDs of matching payments, newest first
+        """
+        API_REQUESTS.labels(method="find_gift_payments").inc()
+
+        # Placeholder - actual API call depends on Telegram API structure
+        result = await self._invoke({
+            "_": "payments.getStarsTransactions",
+            "peer": {"_": "inputPeerSelf"},
+            "outbound": True,
+            "offset": "",
+            "limit": 100,
+        })
+
+        found = []
+        for transaction in getattr(result, "history", []):
+            stargift = getattr(transaction, "stargift", None)
+            peer_id = getattr(getattr(transaction, "peer", None), "user_id", None)
+            date = getattr(transaction, "date", None)
+            if (
+                getattr(stargift, "id", None) == gift_id
+                and peer_id == recipient_id
+                and date is not None
+                and datetime.utcfromtimestamp(date) >= since
+            ):
+                found.append(str(getattr(transaction, "id", "")))
+
+        return found
     
     async def send_message(
         self,
@@ -183,16 +545,25 @@ class TelegramClientWrapper:
             
         Returns:
             True if successful
+
+        Raises:
+            FloodWait: The caller decides how long to hold off
         """
         API_REQUESTS.labels(method="send_message").inc()
         
         try:
-            await self.client.send_message(
-                chat_id=chat_id,
-                text=text,
-                parse_mode=parse_mode,
+            await instrumented(
+                "messages.sendMessage",
+                self.client.name,
+                self.client.send_message(
+                    chat_id=chat_id,
+                    text=text,
+                    parse_mode=parse_mode,
+                ),
             )
             return True
+        except FloodWait:
+            raise
         except RPCError as e:
             logger.error("message_send_failed", chat_id=chat_id, error=str(e))
             return False
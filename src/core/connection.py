@@ -0,0 +1,145 @@
+"""Connection supervision for the Telegram client."""
+import asyncio
+import contextlib
+import random
+import time
+from typing import TYPE_CHECKING
+
+from pyrogram.raw.functions import Ping
+
+from src.observability import get_logger
+from src.observability.metrics import RECONNECT_DURATION, RECONNECTS
+
+from .rpc import instrumented
+
+if TYPE_CHECKING:
+    from .client import TelegramClientWrapper
+
+logger = get_logger(__name__)
+
+
+class ConnectionSupervisor:
+    """Keeps the Telegram connection alive and warm.
+
+    A background task pings the server every ping_interval seconds with
+    a short timeout, so a dead socket is noticed by the supervisor rather
+    than by the next catalog fetch or purchase. On failure it reconnects
+    in the background, retrying with exponential backoff that starts at
+    reconnect_floor, and re-warms the payments path before reporting the
+    connection healthy again.
+    """
+
+    def __init__(
+        self,
+        wrapper: "TelegramClientWrapper",
+        ping_interval: float = 5.0,
+        ping_timeout: float = 2.0,
+        reconnect_floor: float = 0.1,
+        reconnect_max: float = 30.0,
+        warmup_interval: float = 60.0,
+    ) -> None:
+        """Initialize the supervisor.
+
+        Args:
+            wrapper: Client wrapper to supervise
+            ping_interval: Seconds between keep-alive pings
+            ping_timeout: Seconds before a ping counts as failed
+            reconnect_floor: First reconnect retry delay in seconds
+            reconnect_max: Upper bound of the retry delay
+            warmup_interval: Seconds between payments path warm-ups
+        """
+        self.wrapper = wrapper
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.reconnect_floor = reconnect_floor
+        self.reconnect_max = reconnect_max
+        self.warmup_interval = warmup_interval
+
+        self._task: asyncio.Task[None] | None = None
+        self._check_now = asyncio.Event()
+        self._last_warmup = 0.0
+
+    def start(self) -> None:
+        """Start supervising in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop supervising."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def check_now(self) -> None:
+        """Ping immediately, e.g. after a request failed at transport level."""
+        self._check_now.set()
+
+    async def ping(self) -> bool:
+        """Send one keep-alive ping.
+
+        Returns:
+            True if the server answered within ping_timeout
+        """
+        try:
+            client = self.wrapper.client
+            await instrumented(
+                "ping",
+                client.name,
+                client.invoke(Ping(ping_id=random.getrandbits(63)), retries=0, timeout=self.ping_timeout),
+            )
+            return True
+        except Exception as e:
+            logger.warning("keepalive_ping_failed", error=str(e) or type(e).__name__)
+            return False
+
+    async def warm_up(self) -> None:
+        """Touch the payments path so the first purchase finds it warm."""
+        self._last_warmup = time.monotonic()
+        try:
+            await self.wrapper.get_balance()
+        except Exception as e:
+            logger.warning("payments_warmup_failed", error=str(e))
+
+    async def reconnect(self) -> None:
+        """Reconnect until it succeeds, backing off exponentially."""
+        start = time.perf_counter()
+        delay = self.reconnect_floor
+        attempts = 0
+
+        self.wrapper.set_connected(False)
+
+        while True:
+            attempts += 1
+            try:
+                await self.wrapper.reconnect()
+                if await self.ping():
+                    break
+            except Exception as e:
+                logger.warning("reconnect_attempt_failed", attempt=attempts, error=str(e))
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.reconnect_max)
+
+        await self.warm_up()
+        self.wrapper.set_connected(True)
+
+        duration = time.perf_counter() - start
+        RECONNECTS.inc()
+        RECONNECT_DURATION.observe(duration)
+        logger.info("telegram_reconnected", attempts=attempts, duration_seconds=duration)
+
+    async def _run(self) -> None:
+        """Supervision loop."""
+        await self.warm_up()
+
+        while True:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._check_now.wait(), self.ping_interval)
+            self._check_now.clear()
+
+            if not await self.ping():
+                await self.reconnect()
+            elif time.monotonic() - self._last_warmup >= self.warmup_interval:
+                await self.warm_up()
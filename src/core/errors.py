@@ -0,0 +1,147 @@
+"""Telegram error taxonomy and circuit breakers for purchases."""
+import re
+import time
+from collections.abc import Hashable
+from enum import StrEnum
+from typing import NamedTuple
+
+from pyrogram.errors import RPCError
+
+from src.observability.metrics import BREAKER_TRIPS
+
+
+class Verdict(StrEnum):
+    """What to do after a failed request."""
+    TERMINAL = "terminal"          # Will never succeed; stop now
+    RETRY_NOW = "retry_now"        # Transient; retry without waiting
+    BACKOFF = "backoff"            # Transient; retry after exponential backoff
+    REROUTE = "reroute"            # This account cannot do it; another one might
+
+
+class Scope(StrEnum):
+    """What a terminal or reroute verdict says is broken."""
+    REQUEST = "request"            # Only this attempt
+    GIFT = "gift"                  # The gift (sold out, removed)
+    RECIPIENT = "recipient"        # The recipient (invalid, privacy)
+    ACCOUNT = "account"            # The sending account (balance, restrictions)
+
+
+class ErrorPolicy(NamedTuple):
+    """How an error is handled."""
+    verdict: Verdict
+    scope: Scope = Scope.REQUEST
+    refresh_form: bool = False     # The payment form itself was rejected
+
+
+# Error IDs as returned by Telegram, most specific first
+ERROR_POLICIES: dict[str, ErrorPolicy] = {
+    # Gift is gone
+    "STARGIFT_USAGE_LIMITED": ErrorPolicy(Verdict.TERMINAL, Scope.GIFT),
+    "STARGIFT_INVALID": ErrorPolicy(Verdict.TERMINAL, Scope.GIFT),
+    "STARGIFT_NOT_FOUND": ErrorPolicy(Verdict.TERMINAL, Scope.GIFT),
+    # Recipient cannot receive
+    "PEER_ID_INVALID": ErrorPolicy(Verdict.TERMINAL, Scope.RECIPIENT),
+    "USER_ID_INVALID": ErrorPolicy(Verdict.TERMINAL, Scope.RECIPIENT),
+    "USER_IS_BLOCKED": ErrorPolicy(Verdict.TERMINAL, Scope.RECIPIENT),
+    "USER_PRIVACY_RESTRICTED": ErrorPolicy(Verdict.TERMINAL, Scope.RECIPIENT),
+    # Sending account cannot pay
+    "BALANCE_TOO_LOW": ErrorPolicy(Verdict.REROUTE, Scope.ACCOUNT),
+    "USER_RESTRICTED": ErrorPolicy(Verdict.REROUTE, Scope.ACCOUNT),
+    "FLOOD_WAIT_X": ErrorPolicy(Verdict.REROUTE, Scope.ACCOUNT),
+    "SLOWMODE_WAIT_X": ErrorPolicy(Verdict.BACKOFF),
+    # Stale payment form: fetch a new one and go again
+    "FORM_EXPIRED": ErrorPolicy(Verdict.RETRY_NOW, refresh_form=True),
+    "FORM_ID_EMPTY": ErrorPolicy(Verdict.RETRY_NOW, refresh_form=True),
+    "FORM_UNSUPPORTED": ErrorPolicy(Verdict.TERMINAL, Scope.GIFT),
+    # Server side hiccups
+    "RPC_CALL_FAIL": ErrorPolicy(Verdict.RETRY_NOW),
+    "TIMEOUT": ErrorPolicy(Verdict.RETRY_NOW),
+    "INTERNAL_SERVER_ERROR": ErrorPolicy(Verdict.BACKOFF),
+}
+
+# Fallback by RPC error code when the ID is not listed
+CODE_POLICIES: dict[int, ErrorPolicy] = {
+    400: ErrorPolicy(Verdict.TERMINAL),
+    401: ErrorPolicy(Verdict.TERMINAL, Scope.ACCOUNT),
+    403: ErrorPolicy(Verdict.TERMINAL),
+    406: ErrorPolicy(Verdict.TERMINAL),
+    420: ErrorPolicy(Verdict.REROUTE, Scope.ACCOUNT),
+    500: ErrorPolicy(Verdict.BACKOFF),
+    503: ErrorPolicy(Verdict.RETRY_NOW),
+}
+
+_DEFAULT_POLICY = ErrorPolicy(Verdict.BACKOFF)
+_ERROR_ID = re.compile(r"\b([A-Z][A-Z0-9_]{2,})\b")
+
+
+def error_id(error: RPCError) -> str:
+    """Telegram error ID, also for errors Pyrogram does not know by name."""
+    if error.ID:
+        return error.ID
+
+    # Unknown errors carry "[400 SOME_ERROR_ID]" as their value
+    match = _ERROR_ID.search(str(error.value or ""))
+    return match.group(1) if match else f"CODE_{error.CODE}"
+
+
+def classify(error: RPCError, overrides: dict[str, Verdict] | None = None) -> ErrorPolicy:
+    """Look up how to handle an RPC error.
+
+    Args:
+        error: Error raised by Pyrogram
+        overrides: Verdicts configured per error ID, taking precedence
+
+    Returns:
+        ErrorPolicy for the error
+    """
+    name = error_id(error)
+    policy = ERROR_POLICIES.get(name) or CODE_POLICIES.get(error.CODE, _DEFAULT_POLICY)
+
+    if overrides and name in overrides:
+        policy = policy._replace(verdict=overrides[name])
+    return policy
+
+
+class CircuitBreaker:
+    """Per-key breaker that opens on a terminal verdict.
+
+    While open, requests for the key are refused without touching the
+    network. After the cooldown one request is let through again; a
+    further terminal verdict re-opens the breaker.
+    """
+
+    def __init__(self, scope: Scope, cooldown: float) -> None:
+        """Initialize the breaker.
+
+        Args:
+            scope: Scope label for metrics
+            cooldown: Seconds the breaker stays open
+        """
+        self.scope = scope
+        self.cooldown = cooldown
+
+        self._open_until: dict[Hashable, float] = {}
+
+    def allow(self, key: Hashable) -> bool:
+        """Check whether a request for key may be sent."""
+        until = self._open_until.get(key)
+        if until is None:
+            return True
+        if time.monotonic() >= until:
+            del self._open_until[key]
+            return True
+        return False
+
+    def trip(self, key: Hashable, cooldown: float | None = None) -> None:
+        """Open the breaker for key.
+
+        Args:
+            key: Gift ID, recipient ID or account name
+            cooldown: Seconds to stay open (defaults to the breaker's)
+        """
+        self._open_until[key] = time.monotonic() + (self.cooldown if cooldown is None else cooldown)
+        BREAKER_TRIPS.labels(scope=self.scope.value).inc()
+
+    def reset(self, key: Hashable) -> None:
+        """Close the breaker for key."""
+        self._open_until.pop(key, None)
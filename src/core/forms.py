@@ -0,0 +1,138 @@
+"""Payment forms prepared ahead of purchase time."""
+import asyncio
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from src.observability import get_logger
+from src.observability.metrics import PAYMENT_FORMS
+
+if TYPE_CHECKING:
+    from .client import TelegramClientWrapper
+
+logger = get_logger(__name__)
+
+
+class PaymentForm(NamedTuple):
+    """A payment form ready to be submitted for one gift unit."""
+    form_id: int
+    invoice: dict[str, Any]
+    fetched_at: float
+
+
+class PaymentFormCache:
+    """Fetches payment forms before they are needed.
+
+    A star-gift purchase is a payment form request followed by the form
+    submission. Preparing forms as soon as units are allocated to a
+    (gift, recipient) pair leaves only the submission on the critical path.
+    Each form pays for one unit and is consumed by take(); forms older
+    than ttl seconds are discarded rather than risk a rejected payment.
+    A failed fetch only leaves the pair without a prepared form, so the
+    purchase falls back to requesting one itself.
+    """
+
+    def __init__(self, client: "TelegramClientWrapper", ttl: float = 300.0) -> None:
+        """Initialize the cache.
+
+        Args:
+            client: Telegram client wrapper
+            ttl: Seconds a prepared form stays usable
+        """
+        self.client = client
+        self.ttl = ttl
+
+        self._ready: dict[tuple[int, int], deque[PaymentForm]] = {}
+        self._pending: dict[tuple[int, int], list[asyncio.Task[PaymentForm | None]]] = {}
+
+    def prepare(self, gift_id: int, recipient_id: int, count: int = 1) -> None:
+        """Make sure count forms for the pair are ready or being fetched.
+
+        Args:
+            gift_id: Gift ID
+            recipient_id: Recipient user ID
+            count: Number of units that may be bought
+        """
+        key = (gift_id, recipient_id)
+        missing = count - len(self._fresh(key)) - len(self._pending.get(key, ()))
+        if missing <= 0:
+            return
+
+        pending = self._pending.setdefault(key, [])
+        for _ in range(missing):
+            pending.append(asyncio.create_task(self._fetch(key)))
+
+    async def take(self, gift_id: int, recipient_id: int) -> PaymentForm | None:
+        """Consume a prepared form, waiting for one still in flight.
+
+        Returns:
+            A fresh form, or None if none was prepared for the pair
+        """
+        key = (gift_id, recipient_id)
+
+        while True:
+            ready = self._fresh(key)
+            if ready:
+                PAYMENT_FORMS.labels(result="hit").inc()
+                form = ready.popleft()
+                if not ready:
+                    del self._ready[key]
+                return form
+
+            pending = self._pending.get(key)
+            if not pending:
+                PAYMENT_FORMS.labels(result="miss").inc()
+                return None
+
+            # _fetch never raises, so there is no result to retrieve
+            await asyncio.wait(pending[:1])
+
+    def invalidate(self, gift_id: int, recipient_id: int | None = None) -> None:
+        """Drop prepared forms and cancel fetches, e.g. after a gift sold out.
+
+        Args:
+            gift_id: Gift ID
+            recipient_id: Only this recipient's forms (all if None)
+        """
+        for key in list(self._ready):
+            if key[0] == gift_id and recipient_id in (None, key[1]):
+                del self._ready[key]
+
+        for key in list(self._pending):
+            if key[0] == gift_id and recipient_id in (None, key[1]):
+                for task in self._pending.pop(key):
+                    task.cancel()
+
+    async def _fetch(self, key: tuple[int, int]) -> PaymentForm | None:
+        """Fetch one form and file it under the pair."""
+        try:
+            form = await self.client.get_payment_form(*key)
+        except Exception as e:
+            # RPC errors are handled by the client; this is the transport failing
+            logger.warning("payment_form_prefetch_failed", gift_id=key[0], error=str(e) or type(e).__name__)
+            form = None
+        finally:
+            pending = self._pending.get(key)
+            task = asyncio.current_task()
+            if pending and task in pending:
+                pending.remove(task)
+                if not pending:
+                    del self._pending[key]
+
+        if form is not None:
+            self._ready.setdefault(key, deque()).append(form)
+        return form
+
+    def _fresh(self, key: tuple[int, int]) -> deque[PaymentForm]:
+        """Forms for the pair with expired ones removed."""
+        ready = self._ready.get(key)
+        if ready:
+            cutoff = time.monotonic() - self.ttl
+            while ready and ready[0].fetched_at < cutoff:
+                ready.popleft()
+                PAYMENT_FORMS.labels(result="expired").inc()
+        if ready:
+            return ready
+
+        self._ready.pop(key, None)
+        return deque()
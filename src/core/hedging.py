@@ -0,0 +1,110 @@
+"""Hedged requests for latency-critical Telegram calls."""
+import asyncio
+import math
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from src.observability.metrics import HEDGE_WINS, HEDGED_REQUESTS
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """Rolling window of request latencies used to pick the hedge delay."""
+
+    def __init__(
+        self,
+        quantile: float = 0.9,
+        window: int = 200,
+        min_samples: int = 20,
+        min_delay: float = 0.05,
+        initial_delay: float = 1.0,
+    ) -> None:
+        """Initialize the tracker.
+
+        Args:
+            quantile: Latency quantile used as the hedge threshold
+            window: Number of recent samples kept
+            min_samples: Samples needed before the quantile is trusted
+            min_delay: Lower bound of the threshold in seconds
+            initial_delay: Threshold used until min_samples are collected
+        """
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.initial_delay = initial_delay
+
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        """Add one latency sample."""
+        self._samples.append(seconds)
+
+    def threshold(self) -> float:
+        """Seconds to wait on the primary before sending a hedge."""
+        if len(self._samples) < self.min_samples:
+            return self.initial_delay
+
+        ordered = sorted(self._samples)
+        index = min(math.ceil(self.quantile * len(ordered)) - 1, len(ordered) - 1)
+        return max(ordered[index], self.min_delay)
+
+
+async def hedged(
+    method: str,
+    primary: Callable[[], Awaitable[T]],
+    backup: Callable[[], Awaitable[T]],
+    tracker: LatencyTracker,
+) -> T:
+    """Run primary; if it is slower than the tracker threshold, race a backup.
+
+    The first successful response wins and the other request is
+    cancelled. The primary's latency feeds the tracker; when it loses
+    the race, the time it had been running is recorded instead, which
+    keeps the threshold from drifting down as hedges succeed.
+
+    Args:
+        method: Method label for metrics
+        primary: Starts the request on the primary session
+        backup: Starts the same request on the backup session
+        tracker: Latency history of the primary
+
+    Returns:
+        The winning response
+
+    Raises:
+        The primary's exception if it fails before the hedge is sent,
+        or if both requests fail
+    """
+    start = time.perf_counter()
+    first = asyncio.ensure_future(primary())
+    second: asyncio.Future[T] | None = None
+
+    try:
+        done, _ = await asyncio.wait({first}, timeout=tracker.threshold())
+        if done:
+            tracker.record(time.perf_counter() - start)
+            return first.result()
+
+        HEDGED_REQUESTS.labels(method=method).inc()
+        second = asyncio.ensure_future(backup())
+        pending: set[asyncio.Future[T]] = {first, second}
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    continue
+
+                tracker.record(time.perf_counter() - start)
+                if task is second:
+                    HEDGE_WINS.labels(method=method).inc()
+                return task.result()
+
+        raise first.exception()
+    finally:
+        first.cancel()
+        if second is not None:
+            second.cancel()
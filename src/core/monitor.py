@@ -1,24 +1,95 @@
 """Gift monitoring service."""
 import asyncio
+import time
+from collections.abc import Callable
 from datetime import datetime
-from typing import Callable, Any
+from typing import Any, NamedTuple
 
 from src.config import get_settings
 from src.observability import get_logger, set_health_status
+from src.observability.latency import ENQUEUED, FIRST_SEEN, MATCHED, drop_latency
 from src.observability.metrics import (
-    GIFTS_CHECKED,
-    GIFTS_AVAILABLE,
-    CHECK_CYCLE_DURATION,
     ACTIVE_MONITORING,
+    CHECK_CYCLE_DURATION,
+    GIFTS_AVAILABLE,
+    GIFTS_CHECKED,
+    PIPELINE_LAG,
+    SNAPSHOTS_DROPPED,
 )
-from src.storage import get_session, init_db
-from src.storage.database import get_or_create_gift
+from src.observability.tracing import tracer
+from src.storage import get_read_session, get_session, init_db, stats_buffer
+from src.storage.database import upsert_gifts
+from src.storage.timeseries import AvailabilityRecorder
 
 from .client import TelegramClientWrapper
+from .priority import DepletionTracker
+from .updates import UpdateDetector
 
 logger = get_logger(__name__)
 
 
+class Snapshot(NamedTuple):
+    """One fetched catalog and when the fetch completed (perf_counter)."""
+    gifts: list[Any]
+    fetched_at: float
+    trace: Any = None  # Fetch span; processing continues its trace
+
+
+class SnapshotChannel:
+    """One-slot channel between the fetch and process stages.
+
+    Putting never blocks: a snapshot the consumer has not taken yet is
+    replaced by the newer one, since only the latest catalog matters.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty channel."""
+        self._snapshot: Snapshot | None = None
+        self._closed = False
+        self._ready = asyncio.Event()
+
+    def put(self, snapshot: Snapshot) -> bool:
+        """Offer a snapshot, superseding any unconsumed one.
+
+        Returns:
+            True if an older snapshot was dropped
+        """
+        if self._closed:
+            SNAPSHOTS_DROPPED.labels(reason="stopped").inc()
+            return False
+
+        superseded = self._snapshot is not None
+        if superseded:
+            SNAPSHOTS_DROPPED.labels(reason="superseded").inc()
+
+        self._snapshot = snapshot
+        self._ready.set()
+        return superseded
+
+    def close(self) -> None:
+        """Drop any pending snapshot and make get() return None."""
+        if self._snapshot is not None:
+            SNAPSHOTS_DROPPED.labels(reason="stopped").inc()
+            self._snapshot = None
+        self._closed = True
+        self._ready.set()
+
+    async def get(self) -> Snapshot | None:
+        """Wait for the newest snapshot.
+
+        Returns:
+            Snapshot, or None after the channel is closed
+        """
+        while self._snapshot is None:
+            if self._closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+
+        snapshot, self._snapshot = self._snapshot, None
+        return snapshot
+
+
 class GiftMonitor:
     """Monitors Telegram for new gifts and triggers purchases."""
     
@@ -26,26 +97,61 @@ class GiftMonitor:
         self,
         client: TelegramClientWrapper,
         on_new_gift: Callable[[dict[str, Any]], None] | None = None,
+        on_gift_batch: Callable[[list[Any]], None] | None = None,
     ) -> None:
         """Initialize the gift monitor.
         
         Args:
             client: Telegram client wrapper
             on_new_gift: Callback for new gift discovery
+            on_gift_batch: Callback receiving all matching gifts of a cycle
         """
         self.client = client
         self.on_new_gift = on_new_gift
+        self.on_gift_batch = on_gift_batch
         
         settings = get_settings()
-        self.interval = settings.app.telegram.interval_seconds
+        telegram_config = settings.app.telegram
         self.gift_config = settings.app.gifts
         
+        # With push detection, polling is only a safety net
+        self.updates: UpdateDetector | None = None
+        if telegram_config.push_updates:
+            self.updates = UpdateDetector(
+                client,
+                on_signal=self.wake,
+                announcement_chats=telegram_config.announcement_chats,
+                update_types=telegram_config.push_update_types,
+            )
+            self.interval = telegram_config.fallback_interval_seconds
+        else:
+            self.interval = telegram_config.interval_seconds
+
+        self.availability = AvailabilityRecorder(
+            raw_retention=settings.app.storage.availability_raw_retention_hours * 3600,
+            minute_retention=settings.app.storage.availability_minute_retention_days * 86400,
+        )
+
+        self.depletion = DepletionTracker()
+
         self._running = False
         self._known_gifts: set[int] = set()
+        self._snapshots = SnapshotChannel()
+        self._wake = asyncio.Event()
     
     async def start(self) -> None:
-        """Start the monitoring loop."""
-        logger.info("starting_gift_monitor", interval=self.interval)
+        """Start the monitoring pipeline.
+
+        The fetch stage polls the catalog on a fixed schedule and hands
+        each snapshot to the process stage through a one-slot channel.
+        Processing never delays the next fetch; if it falls behind, an
+        unprocessed snapshot is superseded by the newer one.
+        """
+        logger.info(
+            "starting_gift_monitor",
+            interval=self.interval,
+            push_updates=self.updates is not None,
+        )
         
         # Initialize database
         await init_db()
@@ -53,85 +159,225 @@ class GiftMonitor:
         
         # Load known gifts from database
         await self._load_known_gifts()
+        await self.availability.load()
         
         self._running = True
         ACTIVE_MONITORING.set(1)
         
-        while self._running:
-            try:
-                await self._check_cycle()
-            except Exception as e:
-                logger.error("check_cycle_error", error=str(e))
-            
-            await asyncio.sleep(self.interval)
+        if self.updates:
+            self.updates.attach()
+
+        fetcher = asyncio.create_task(self._fetch_loop())
+        try:
+            await self._process_loop()
+        finally:
+            fetcher.cancel()
+            if self.updates:
+                self.updates.detach()
     
     async def stop(self) -> None:
-        """Stop the monitoring loop."""
+        """Stop the monitoring pipeline."""
         logger.info("stopping_gift_monitor")
         self._running = False
         ACTIVE_MONITORING.set(0)
+
+        # Wake the process stage; it finishes its current snapshot and exits
+        self._snapshots.close()
+        self._wake.set()
+
+        try:
+            await stats_buffer.flush()
+        except Exception as e:
+            logger.error("daily_stats_flush_failed", error=str(e))
     
     async def _load_known_gifts(self) -> None:
         """Load known gift IDs from database."""
         from sqlalchemy import select
         from src.storage.models import Gift
         
-        async with get_session() as session:
+        async with get_read_session() as session:
             result = await session.execute(select(Gift.id))
             self._known_gifts = {row[0] for row in result.fetchall()}
         
         logger.info("loaded_known_gifts", count=len(self._known_gifts))
     
-    async def _check_cycle(self) -> None:
-        """Perform one check cycle."""
-        start_time = datetime.utcnow()
+    def wake(self) -> None:
+        """Fetch the catalog now instead of waiting for the next poll.
         
-        # Get available gifts
-        gifts = await self.client.get_available_gifts()
+        Signals arriving while a fetch is in flight coalesce into a single
+        follow-up fetch.
+        """
+        self._wake.set()
+
+    async def _fetch_loop(self) -> None:
+        """Fetch stage: poll the catalog every interval seconds.
         
-        if not gifts:
-            logger.debug("no_gifts_available")
-            return
+        Ticks are scheduled from the loop clock rather than after each
+        fetch, so a slow fetch (e.g. a FloodWait) shortens the following
+        sleep instead of shifting every later poll. A wake() cuts the
+        sleep short and restarts the schedule from that fetch.
+        """
+        loop = asyncio.get_running_loop()
+        next_fetch = loop.time()
         
-        GIFTS_CHECKED.inc(len(gifts))
+        while self._running:
+            try:
+                with tracer.span("monitor.fetch") as span:
+                    gifts = await self.client.get_available_gifts()
+                if gifts:
+                    self._snapshots.put(Snapshot(gifts, time.perf_counter(), span))
+                else:
+                    logger.debug("no_gifts_available")
+            except Exception as e:
+                stats_buffer.add(errors=1)
+                logger.error("catalog_fetch_error", error=str(e))
+
+            next_fetch += self.interval
+            now = loop.time()
+            if next_fetch < now:
+                # Missed ticks are skipped, not replayed back to back
+                next_fetch = now
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), next_fetch - now)
+            except TimeoutError:
+                pass
+            else:
+                self._wake.clear()
+                next_fetch = loop.time()
+
+    async def _process_loop(self) -> None:
+        """Process stage: handle the newest snapshot until stopped."""
+        while True:
+            snapshot = await self._snapshots.get()
+            if snapshot is None:
+                return
+
+            PIPELINE_LAG.observe(time.perf_counter() - snapshot.fetched_at)
+            try:
+                await self._process_snapshot(snapshot)
+            except Exception as e:
+                stats_buffer.add(errors=1)
+                logger.error("check_cycle_error", error=str(e))
+
+    async def _process_snapshot(self, snapshot: Snapshot) -> None:
+        """Process one catalog snapshot.
         
-        # Filter and process gifts
+        The latency-critical fast path (normalize, filter, prioritize and
+        hand matching gifts to the purchase callbacks) runs before the
+        slow path, so no disk I/O precedes a purchase. Purchase tasks
+        created by the callbacks join the snapshot's trace.
+        """
+        start_time = time.perf_counter()
+        gifts = snapshot.gifts
+
+        with tracer.span("monitor.process", parent=snapshot.trace, gifts=len(gifts)) as span:
+            new_gifts, matching_gifts = self._scan(gifts, seen_at=snapshot.fetched_at)
+            span.set_attribute("new_gifts", len(new_gifts))
+            span.set_attribute("matching_gifts", len(matching_gifts))
+
+            # Process matching gifts (sorted by priority)
+            if matching_gifts:
+                self._dispatch(matching_gifts)
+
+            fast_path_duration = time.perf_counter() - start_time
+
+            # Let dispatched purchase tasks reach send_gift before any disk I/O
+            await asyncio.sleep(0)
+            with tracer.span("monitor.slow_path"):
+                await self._slow_path(gifts, new_gifts, matching_gifts, fast_path_duration)
+
+    def _scan(self, gifts: list[Any], seen_at: float | None = None) -> tuple[list[Any], list[Any]]:
+        """Normalize, filter and prioritize one catalog snapshot.
+
+        Args:
+            gifts: Gift objects from Telegram
+            seen_at: perf_counter() time the snapshot arrived (defaults to now)
+
+        Returns:
+            Tuple of (new gifts, matching gifts sorted by priority)
+        """
+        seen_at = time.perf_counter() if seen_at is None else seen_at
         new_gifts = []
         matching_gifts = []
+        matching_ids: list[int] = []
+        matching_priorities: list[float] = []
         
         for gift in gifts:
-            gift_id = gift.get("id") or gift.id if hasattr(gift, "id") else None
+            gift_id = getattr(gift, "id", gift.get("id") if isinstance(gift, dict) else None)
             if not gift_id:
                 continue
             
+            # Record sell-out history (only changes are queued)
+            available_amount = getattr(gift, "available_amount", gift.get("available_amount") if isinstance(gift, dict) else None)
+            priority = 0.0
+            if available_amount is not None:
+                self.availability.observe(gift_id, available_amount)
+                total_amount = getattr(gift, "total_amount", gift.get("total_amount") if isinstance(gift, dict) else 0)
+                priority = self.depletion.observe(gift_id, available_amount, total_amount or 0, delay=self.interval)
+
             # Check if new
             if gift_id not in self._known_gifts:
                 new_gifts.append(gift)
                 self._known_gifts.add(gift_id)
+                drop_latency.mark(gift_id, FIRST_SEEN, at=seen_at)
             
             # Check if matches our criteria
             if self._matches_criteria(gift):
+                # Gifts already listed at startup count from the first snapshot they match in
+                drop_latency.mark(gift_id, FIRST_SEEN, at=seen_at)
+                drop_latency.mark(gift_id, MATCHED)
                 matching_gifts.append(gift)
+                matching_ids.append(gift_id)
+                matching_priorities.append(priority)
         
-        # Store new gifts in database
-        if new_gifts:
-            await self._store_gifts(new_gifts)
-            logger.info("new_gifts_discovered", count=len(new_gifts))
-        
-        # Process matching gifts (sorted by priority)
         if matching_gifts:
-            matching_gifts = self._sort_by_priority(matching_gifts)
-            
+            matching_gifts = self._sort_by_priority(matching_gifts, matching_ids, matching_priorities)
+
+        return new_gifts, matching_gifts
+
+    def _dispatch(self, matching_gifts: list[Any]) -> None:
+        """Hand matching gifts to the purchase callbacks."""
+        for gift in matching_gifts:
+            drop_latency.mark(getattr(gift, "id", gift.get("id") if isinstance(gift, dict) else None), ENQUEUED)
+
+        if self.on_gift_batch:
+            self.on_gift_batch(matching_gifts)
+
+        if self.on_new_gift:
             for gift in matching_gifts:
-                if self.on_new_gift:
-                    self.on_new_gift(gift)
+                self.on_new_gift(gift)
+
+    async def _slow_path(
+        self,
+        gifts: list[Any],
+        new_gifts: list[Any],
+        matching_gifts: list[Any],
+        fast_path_duration: float,
+    ) -> None:
+        """Persist, record metrics and log a cycle after dispatch."""
+        start_time = time.perf_counter()
         
-        # Update metrics
+        GIFTS_CHECKED.inc(len(gifts))
+        stats_buffer.add(gifts_checked=len(gifts))
         GIFTS_AVAILABLE.set(len(matching_gifts))
         set_health_status(last_check=datetime.utcnow())
         
+        try:
+            # Store new gifts in database
+            if new_gifts:
+                await self._store_gifts(new_gifts)
+                logger.info("new_gifts_discovered", count=len(new_gifts))
+
+            await self.availability.flush()
+            await stats_buffer.maybe_flush()
+            await self.availability.maybe_downsample()
+        except Exception as e:
+            stats_buffer.add(errors=1)
+            logger.error("cycle_persistence_failed", error=str(e))
+
         # Record cycle duration
-        duration = (datetime.utcnow() - start_time).total_seconds()
+        duration = fast_path_duration + (time.perf_counter() - start_time)
         CHECK_CYCLE_DURATION.observe(duration)
         
         logger.debug(
@@ -139,6 +385,7 @@ class GiftMonitor:
             total_gifts=len(gifts),
             new_gifts=len(new_gifts),
             matching_gifts=len(matching_gifts),
+            fast_path_seconds=fast_path_duration,
             duration_seconds=duration,
         )
     
@@ -182,11 +429,22 @@ class GiftMonitor:
         
         return False
     
-    def _sort_by_priority(self, gifts: list[Any]) -> list[Any]:
-        """Sort gifts by priority (rarest first).
+    def _sort_by_priority(
+        self,
+        gifts: list[Any],
+        gift_ids: list[int] | None = None,
+        priorities: list[float] | None = None,
+    ) -> list[Any]:
+        """Sort gifts by priority (highest expected loss from waiting first).
+
+        Priorities come from the depletion tracker, which is updated once
+        per gift per cycle; gifts with no observed sales fall back to
+        rarest first.
         
         Args:
             gifts: List of gift objects
+            gift_ids: IDs of the gifts, if already extracted
+            priorities: Tracker priorities of the gifts, if already computed
             
         Returns:
             Sorted list
@@ -194,29 +452,40 @@ class GiftMonitor:
         if not self.gift_config.prioritize_low_supply:
             return gifts
         
-        def get_total_amount(gift: Any) -> int:
-            return getattr(gift, "total_amount", gift.get("total_amount") if isinstance(gift, dict) else float("inf"))
+        if gift_ids is None:
+            gift_ids = [
+                getattr(gift, "id", gift.get("id") if isinstance(gift, dict) else None)
+                for gift in gifts
+            ]
+        if priorities is None:
+            priorities = [self.depletion.priority(gift_id) for gift_id in gift_ids]
         
-        return sorted(gifts, key=get_total_amount)
+        order = self.depletion.rank(gift_ids, priorities)
+        return list(map(gifts.__getitem__, order))
     
     async def _store_gifts(self, gifts: list[Any]) -> None:
-        """Store gifts in the database.
+        """Store gifts in the database in a single statement.
         
         Args:
             gifts: List of gift objects
         """
-        async with get_session() as session:
-            for gift in gifts:
-                gift_data = {
-                    "name": getattr(gift, "title", gift.get("title") if isinstance(gift, dict) else "Unknown"),
-                    "price": getattr(gift, "stars", gift.get("stars") if isinstance(gift, dict) else 0),
-                    "total_amount": getattr(gift, "total_amount", gift.get("total_amount") if isinstance(gift, dict) else 0),
-                    "available_amount": getattr(gift, "available_amount", gift.get("available_amount") if isinstance(gift, dict) else 0),
-                    "is_limited": getattr(gift, "is_limited", gift.get("is_limited") if isinstance(gift, dict) else False),
-                    "is_sold_out": getattr(gift, "is_sold_out", gift.get("is_sold_out") if isinstance(gift, dict) else False),
-                    "upgrade_price": getattr(gift, "upgrade_stars", gift.get("upgrade_stars") if isinstance(gift, dict) else None),
-                }
-                
-                gift_id = getattr(gift, "id", gift.get("id") if isinstance(gift, dict) else None)
-                if gift_id:
-                    await get_or_create_gift(session, gift_id, **gift_data)
+        rows = []
+        for gift in gifts:
+            gift_id = getattr(gift, "id", gift.get("id") if isinstance(gift, dict) else None)
+            if not gift_id:
+                continue
+
+            rows.append({
+                "id": gift_id,
+                "name": getattr(gift, "title", gift.get("title") if isinstance(gift, dict) else "Unknown"),
+                "price": getattr(gift, "stars", gift.get("stars") if isinstance(gift, dict) else 0),
+                "total_amount": getattr(gift, "total_amount", gift.get("total_amount") if isinstance(gift, dict) else 0),
+                "available_amount": getattr(gift, "available_amount", gift.get("available_amount") if isinstance(gift, dict) else 0),
+                "is_limited": getattr(gift, "is_limited", gift.get("is_limited") if isinstance(gift, dict) else False),
+                "is_sold_out": getattr(gift, "is_sold_out", gift.get("is_sold_out") if isinstance(gift, dict) else False),
+                "upgrade_price": getattr(gift, "upgrade_stars", gift.get("upgrade_stars") if isinstance(gift, dict) else None),
+            })
+
+        if rows:
+            async with get_session() as session:
+                await upsert_gifts(session, rows)
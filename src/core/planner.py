@@ -0,0 +1,293 @@
+"""Cycle-wide purchase planning with a bounded knapsack solver."""
+from bisect import bisect_right
+from typing import NamedTuple
+
+from .priority import expected_loss
+
+# Supply used for gifts that report no total_amount (unlimited gifts)
+UNLIMITED_SUPPLY = 10_000_000
+
+# Search nodes explored before the solver settles for its best plan so far
+DEFAULT_MAX_NODES = 20_000
+
+_EPSILON = 1e-9
+
+# Subtrees that cannot improve the incumbent by more than 0.1% are pruned
+_GAP = 1.001
+
+
+class PlanCandidate(NamedTuple):
+    """One (gift, recipient) pair that could receive purchases this cycle."""
+    gift_id: int
+    gift_name: str
+    price: int
+    recipient: str | int
+    quantity: int
+    score: float
+
+
+class PlannedPurchase(NamedTuple):
+    """A candidate together with the number of units allocated to it."""
+    candidate: PlanCandidate
+    quantity: int
+
+    @property
+    def cost(self) -> int:
+        """Total Stars this allocation spends."""
+        return self.candidate.price * self.quantity
+
+
+class PurchasePlan(NamedTuple):
+    """Complete allocation of a cycle's budget."""
+    items: list[PlannedPurchase]
+    skipped: list[PlanCandidate]
+    budget: int
+    total_cost: int
+    total_score: float
+    optimal: bool
+
+
+def rarity_score(price: int, total_amount: int, prioritize_low_supply: bool = True) -> float:
+    """Value of buying one unit of a gift.
+
+    The score is the price weighted by scarcity, so the value per Star
+    spent grows as supply shrinks and rarer gifts win contested budget.
+
+    Args:
+        price: Price per unit in Stars
+        total_amount: Total supply of the gift (0 for unlimited)
+        prioritize_low_supply: Weight by scarcity; otherwise maximize spend
+
+    Returns:
+        Score for a single unit
+    """
+    if not prioritize_low_supply:
+        return float(price)
+
+    supply = total_amount if total_amount > 0 else UNLIMITED_SUPPLY
+    return price * (UNLIMITED_SUPPLY / supply)
+
+
+def urgency_score(price: int, total_amount: int, priority: float) -> float:
+    """Value of buying one unit of a gift given its depletion priority.
+
+    The score is the price times the expected loss from waiting, so the
+    value per Star follows the monitor's priority order and a gift about
+    to sell out wins contested budget over a rarer one that barely sells.
+
+    Args:
+        price: Price per unit in Stars
+        total_amount: Total supply of the gift (0 for unlimited)
+        priority: DepletionTracker priority (0.0 if never observed)
+
+    Returns:
+        Score for a single unit
+    """
+    if priority <= 0:
+        # Not tracked yet: score it like an idle gift of the same supply
+        priority = expected_loss(0.0, 1, total_amount or UNLIMITED_SUPPLY, 0.0)
+    return price * UNLIMITED_SUPPLY * priority
+
+
+class PurchasePlanner:
+    """Allocates a cycle's budget across all matching gifts at once."""
+
+    def __init__(
+        self,
+        reserve_balance: int = 0,
+        daily_limit: int = 0,
+        max_nodes: int = DEFAULT_MAX_NODES,
+    ) -> None:
+        """Initialize the planner.
+
+        Args:
+            reserve_balance: Minimum balance to always keep
+            daily_limit: Max daily spend in Stars (0 = unlimited)
+            max_nodes: Search budget for the branch-and-bound solver
+        """
+        self.reserve_balance = reserve_balance
+        self.daily_limit = daily_limit
+        self.max_nodes = max_nodes
+
+    def available_budget(self, balance: int, daily_spent: int = 0) -> int:
+        """Calculate how many Stars this cycle may spend.
+
+        Args:
+            balance: Current balance
+            daily_spent: Stars already spent today
+
+        Returns:
+            Spendable Stars (never negative)
+        """
+        budget = balance - self.reserve_balance
+        if self.daily_limit > 0:
+            budget = min(budget, self.daily_limit - daily_spent)
+        return max(budget, 0)
+
+    def plan(
+        self,
+        candidates: list[PlanCandidate],
+        balance: int,
+        daily_spent: int = 0,
+    ) -> PurchasePlan:
+        """Build a purchase plan that maximizes total score within budget.
+
+        Args:
+            candidates: Every (gift, recipient) pair matched this cycle
+            balance: Current balance
+            daily_spent: Stars already spent today
+
+        Returns:
+            PurchasePlan with allocations ordered by score density
+        """
+        budget = self.available_budget(balance, daily_spent)
+
+        # Best value per Star first; this is also the execution order
+        order = sorted(
+            (c for c in candidates if c.quantity > 0 and 0 < c.price <= budget),
+            key=lambda c: c.score / c.price,
+            reverse=True,
+        )
+
+        demand = sum(c.price * c.quantity for c in order)
+        if demand <= budget:
+            # Fast path: the budget covers everything
+            counts = [c.quantity for c in order]
+            optimal = True
+        else:
+            counts, optimal = self._solve(order, budget)
+
+        items = [
+            PlannedPurchase(candidate=c, quantity=k)
+            for c, k in zip(order, counts, strict=True)
+            if k > 0
+        ]
+        allocated = {id(item.candidate) for item in items}
+
+        return PurchasePlan(
+            items=items,
+            skipped=[c for c in candidates if id(c) not in allocated],
+            budget=budget,
+            total_cost=sum(item.cost for item in items),
+            total_score=sum(item.candidate.score * item.quantity for item in items),
+            optimal=optimal,
+        )
+
+    def _solve(self, order: list[PlanCandidate], budget: int) -> tuple[list[int], bool]:
+        """Allocate units when demand exceeds the budget.
+
+        Candidates with the same price and score are interchangeable, so
+        they are merged into one knapsack item and the solved units are
+        handed back out in order.
+        """
+        groups: dict[tuple[int, float], list[int]] = {}
+        for index, candidate in enumerate(order):
+            groups.setdefault((candidate.price, candidate.score), []).append(index)
+
+        keys = list(groups)
+        units, optimal = _branch_and_bound(
+            prices=[price for price, _ in keys],
+            values=[score for _, score in keys],
+            limits=[sum(order[i].quantity for i in groups[key]) for key in keys],
+            budget=budget,
+            max_nodes=self.max_nodes,
+        )
+
+        counts = [0] * len(order)
+        for key, remaining in zip(keys, units, strict=True):
+            for index in groups[key]:
+                take = min(order[index].quantity, remaining)
+                counts[index] = take
+                remaining -= take
+
+        return counts, optimal
+
+
+def _branch_and_bound(
+    prices: list[int],
+    values: list[float],
+    limits: list[int],
+    budget: int,
+    max_nodes: int,
+) -> tuple[list[int], bool]:
+    """Solve a bounded knapsack by depth-first branch and bound.
+
+    Items must be sorted by value density (descending). The fractional
+    relaxation used as the upper bound is evaluated in O(log n) from
+    prefix sums, and the greedy fill seeds the incumbent so the search
+    always returns a feasible plan even when the node budget runs out.
+
+    Returns:
+        Tuple of (units per item, whether the plan is proven within the gap)
+    """
+    n = len(prices)
+
+    prefix_w = [0] * (n + 1)
+    prefix_v = [0.0] * (n + 1)
+    for i in range(n):
+        prefix_w[i + 1] = prefix_w[i] + prices[i] * limits[i]
+        prefix_v[i + 1] = prefix_v[i] + values[i] * limits[i]
+
+    def upper_bound(i: int, cap: int) -> float:
+        target = prefix_w[i] + cap
+        j = bisect_right(prefix_w, target, i) - 1
+        bound = prefix_v[j] - prefix_v[i]
+        if j < n:
+            bound += (target - prefix_w[j]) * values[j] / prices[j]
+        return bound
+
+    # Greedy incumbent
+    best = [0] * n
+    best_value = 0.0
+    cap = budget
+    for i in range(n):
+        k = min(limits[i], cap // prices[i])
+        best[i] = k
+        cap -= k * prices[i]
+        best_value += k * values[i]
+
+    choice = [0] * n
+    level = 0
+    cap = budget
+    value = 0.0
+    nodes = 0
+
+    while True:
+        if (
+            level < n
+            and nodes < max_nodes
+            and value + upper_bound(level, cap) > best_value * _GAP + _EPSILON
+        ):
+            k = min(limits[level], cap // prices[level])
+            choice[level] = k
+            cap -= k * prices[level]
+            value += k * values[level]
+            level += 1
+            nodes += 1
+            continue
+
+        if value > best_value + _EPSILON:
+            best_value = value
+            best = choice[:level] + [0] * (n - level)
+
+        if nodes < max_nodes and level > 0:
+            # The bound only shrinks as the previous level gives up units,
+            # so none of its smaller choices can beat the incumbent either
+            k = choice[level - 1]
+            choice[level - 1] = 0
+            cap += k * prices[level - 1]
+            value -= k * values[level - 1]
+
+        # Backtrack to the deepest level that still has units to give up
+        level -= 1
+        while level >= 0 and choice[level] == 0:
+            level -= 1
+        if level < 0 or nodes >= max_nodes:
+            break
+
+        choice[level] -= 1
+        cap += prices[level]
+        value -= values[level]
+        level += 1
+
+    return best, nodes < max_nodes
@@ -0,0 +1,130 @@
+"""Sell-out velocity tracking for gift prioritization."""
+import math
+import time
+
+# Time constant (seconds) of the depletion-rate EWMA
+DEFAULT_TAU = 60.0
+
+# Keeps gifts with no observed sales ordered by scarcity alone
+_RARITY_FLOOR = 1e-9
+
+
+class DepletionTracker:
+    """Estimates how fast each gift is selling out.
+
+    Each observation of available_amount updates an exponentially
+    weighted moving average of the depletion rate in O(1). The weight
+    adapts to the gap between polls, so irregular intervals (FloodWait,
+    slow cycles) do not skew the estimate.
+    """
+
+    def __init__(self, tau: float = DEFAULT_TAU) -> None:
+        """Initialize the tracker.
+
+        Args:
+            tau: EWMA time constant in seconds
+        """
+        self.tau = tau
+
+        # gift_id -> [last_ts, last_available, rate]
+        self._state: dict[int, list[float]] = {}
+        self._priority: dict[int, float] = {}
+
+        # Last ranking, reused while the candidate set is unchanged
+        self._ranked_ids: list[int] = []
+        self._ranked_order: list[int] = []
+
+    def observe(
+        self,
+        gift_id: int,
+        available_amount: int,
+        total_amount: int,
+        delay: float,
+        ts: float | None = None,
+    ) -> float:
+        """Record a polled value and refresh the gift's priority.
+
+        Args:
+            gift_id: Gift ID
+            available_amount: Remaining supply
+            total_amount: Total supply (0 for unlimited)
+            delay: Seconds a purchase would be postponed (one cycle)
+            ts: Observation time (defaults to the monotonic clock)
+
+        Returns:
+            Updated priority (expected loss from delaying)
+        """
+        ts = time.monotonic() if ts is None else ts
+        state = self._state.get(gift_id)
+
+        if state is None:
+            self._state[gift_id] = [ts, available_amount, 0.0]
+            rate = 0.0
+        else:
+            last_ts, last_available, rate = state
+            dt = ts - last_ts
+            if dt > 0:
+                sample = max(last_available - available_amount, 0) / dt
+                alpha = 1.0 - math.exp(-dt / self.tau)
+                rate += alpha * (sample - rate)
+                state[0] = ts
+                state[1] = available_amount
+                state[2] = rate
+
+        priority = expected_loss(rate, available_amount, total_amount, delay)
+        self._priority[gift_id] = priority
+        return priority
+
+    def rate(self, gift_id: int) -> float:
+        """Current depletion rate estimate in units per second."""
+        state = self._state.get(gift_id)
+        return state[2] if state else 0.0
+
+    def time_to_sell_out(self, gift_id: int) -> float:
+        """Estimated seconds until the gift sells out (inf if not selling)."""
+        state = self._state.get(gift_id)
+        if not state or state[2] <= 0:
+            return math.inf
+        return state[1] / state[2]
+
+    def priority(self, gift_id: int) -> float:
+        """Last computed priority for a gift (0.0 if never observed)."""
+        return self._priority.get(gift_id, 0.0)
+
+    def rank(self, gift_ids: list[int], priorities: list[float]) -> list[int]:
+        """Order candidates by priority, highest first.
+
+        Priorities drift slowly between cycles, so the previous ranking is
+        nearly sorted and Timsort re-sorts it in close to linear time. A
+        full sort only happens when the candidate list changes.
+
+        Args:
+            gift_ids: Candidate gift IDs in catalog order
+            priorities: Priority of each candidate (same order)
+
+        Returns:
+            Indices into gift_ids, highest priority first
+        """
+        if gift_ids == self._ranked_ids:
+            order = self._ranked_order
+            order.sort(key=priorities.__getitem__, reverse=True)
+        else:
+            order = sorted(range(len(gift_ids)), key=priorities.__getitem__, reverse=True)
+            self._ranked_ids = gift_ids
+            self._ranked_order = order
+        return order
+
+
+def expected_loss(rate: float, available_amount: int, total_amount: int, delay: float) -> float:
+    """Expected loss from postponing a purchase by `delay` seconds.
+
+    The share of remaining supply that sells during the delay approximates
+    the chance of missing the gift; it is weighted by scarcity so a rare
+    gift outranks a common one selling equally fast.
+
+    Returns:
+        Priority score (higher = buy first)
+    """
+    supply = total_amount if total_amount > 0 else math.inf
+    at_risk = 1.0 if available_amount <= 0 else min(rate * delay / available_amount, 1.0)
+    return (at_risk + _RARITY_FLOOR) / supply
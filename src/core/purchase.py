@@ -3,18 +3,30 @@ import asyncio
 from datetime import datetime
 from typing import Any, NamedTuple
 
-from src.config import get_settings, GiftRange
+from sqlalchemy import select
+
+from src.config import get_settings
+from src.config.settings import GiftRange
 from src.observability import get_logger
+from src.observability.latency import CONFIRMED as SEND_CONFIRMED, SEND_STARTED, drop_latency
 from src.observability.metrics import (
     GIFTS_PURCHASED,
     PURCHASES_FAILED,
     BALANCE,
     PURCHASE_DURATION,
 )
-from src.storage import get_session
+from src.observability.tracing import tracer
+from src.storage import get_session, stats_buffer
 from src.storage.database import record_purchase
+from src.storage.intents import CONFIRMED, FAILED, INTENT, SENT, IntentJournal, new_intent_id
+from src.storage.journal import PurchaseJournal
+from src.storage.models import Purchase
+from src.storage.stats import utc_today
 
 from .client import TelegramClientWrapper
+from .forms import PaymentFormCache
+from .planner import PlanCandidate, PurchasePlan, PurchasePlanner, rarity_score, urgency_score
+from .priority import DepletionTracker
 
 logger = get_logger(__name__)
 
@@ -27,6 +39,9 @@ class PurchaseResult(NamedTuple):
     is_partial: bool
     remaining_balance: int
     error: str | None = None
+    gift_name: str = ""
+    recipient: str | int = ""
+    price: int = 0
 
 
 class PurchaseEngine:
@@ -45,59 +60,253 @@ class PurchaseEngine:
         self.budget_config = settings.app.budget
         self.notification_channel = settings.app.notifications.channel_id
         
+        self.journal = PurchaseJournal(
+            batch_size=settings.app.storage.journal_batch_size,
+            flush_interval=settings.app.storage.journal_flush_interval,
+            max_attempts=settings.app.storage.journal_max_attempts,
+            dead_letter_path=settings.app.storage.journal_dead_letter_path,
+            on_flush=self._on_journal_flush,
+        )
+        self.planner = PurchasePlanner(
+            reserve_balance=self.budget_config.reserve_balance,
+            daily_limit=self.budget_config.daily_limit,
+        )
+        self.forms = client.forms = PaymentFormCache(client, ttl=self.gift_config.payment_form_ttl_seconds)
+        self.intents = IntentJournal(
+            settings.app.storage.intent_journal_path,
+            fsync=settings.app.storage.intent_journal_fsync,
+            compact_after=settings.app.storage.intent_journal_compact_after,
+        )
+
         self._daily_spent = 0
         self._last_reset_date: str | None = None
+        self._recipient_ids: dict[str, int] = {}
+        self._prepare_tasks: set[asyncio.Task[None]] = set()
+
+        # Sell-out rates from the monitor; weights candidate scores when set
+        self.depletion: DepletionTracker | None = None
     
-    async def process_gift(self, gift: Any) -> list[PurchaseResult]:
-        """Process a gift and purchase for all matching recipients.
+    async def process_cycle(self, gifts: list[Any]) -> list[PurchaseResult]:
+        """Plan and execute purchases for every matching gift of a cycle.
+
+        Unlike process_gift, the budget is allocated across all gifts at
+        once so a cheap common gift cannot starve a rarer one.
         
         Args:
-            gift: Gift object from Telegram
+            gifts: Matching gift objects from one check cycle
             
         Returns:
-            List of purchase results
+            List of purchase results, one per candidate
         """
-        results = []
-        
-        # Extract gift properties
-        gift_id = getattr(gift, "id", gift.get("id") if isinstance(gift, dict) else None)
-        gift_name = getattr(gift, "title", gift.get("title") if isinstance(gift, dict) else "Unknown")
-        price = getattr(gift, "stars", gift.get("stars") if isinstance(gift, dict) else 0)
-        
-        if not gift_id or price <= 0:
-            return results
+        with tracer.span("purchase.process_cycle", gifts=len(gifts)):
+            # Gifts known to fail (sold out, account blocked) get no share of the budget
+            candidates = [
+                candidate for candidate in self.build_candidates(gifts)
+                if self.client.can_send(candidate.gift_id)
+            ]
+
+            if not candidates:
+                return []
+
+            balance = await self.client.get_balance()
+            BALANCE.set(balance)
+
+            self._check_daily_reset()
+
+            plan = self.planner.plan(candidates, balance=balance, daily_spent=self._daily_spent)
+
+            # Forms only for allocated units; a burst for every candidate invites flood waits
+            for item in plan.items:
+                self.prepare_forms(item.candidate.gift_id, item.candidate.recipient, item.quantity)
+
+            logger.info(
+                "purchase_plan_built",
+                candidates=len(candidates),
+                allocated=len(plan.items),
+                budget=plan.budget,
+                total_cost=plan.total_cost,
+                optimal=plan.optimal,
+            )
+
+            return await self.execute_plan(plan, balance)
+
+    def build_candidates(self, gifts: list[Any]) -> list[PlanCandidate]:
+        """Expand gifts into (gift, recipient) purchase candidates.
         
-        # Find matching ranges
-        matching_ranges = self._find_matching_ranges(price, gift)
+        Args:
+            gifts: Gift objects from Telegram
+
+        Returns:
+            List of PlanCandidate
+        """
+        candidates = []
         
-        if not matching_ranges:
-            return results
+        for gift in gifts:
+            gift_id = getattr(gift, "id", gift.get("id") if isinstance(gift, dict) else None)
+            gift_name = getattr(gift, "title", gift.get("title") if isinstance(gift, dict) else "Unknown")
+            price = getattr(gift, "stars", gift.get("stars") if isinstance(gift, dict) else 0)
+            total_amount = getattr(gift, "total_amount", gift.get("total_amount") if isinstance(gift, dict) else 0)
+
+            if not gift_id or price <= 0:
+                continue
+
+            if self.depletion is not None and self.gift_config.prioritize_low_supply:
+                score = urgency_score(price, total_amount or 0, self.depletion.priority(gift_id))
+            else:
+                score = rarity_score(price, total_amount or 0, self.gift_config.prioritize_low_supply)
+
+            for range_config in self._find_matching_ranges(price, gift):
+                for recipient in range_config.recipients:
+                    candidates.append(PlanCandidate(
+                        gift_id=gift_id,
+                        gift_name=gift_name,
+                        price=price,
+                        recipient=recipient,
+                        quantity=range_config.quantity_per_recipient,
+                        score=score,
+                    ))
+
+        return candidates
+
+    async def execute_plan(self, plan: PurchasePlan, balance: int) -> list[PurchaseResult]:
+        """Execute every allocation of a purchase plan concurrently.
         
-        # Get current balance
-        balance = await self.client.get_balance()
+        Args:
+            plan: Plan produced by PurchasePlanner
+            balance: Balance the plan was built against
+
+        Returns:
+            List of purchase results (allocated first, then skipped)
+        """
+        results = await asyncio.gather(*(
+            self._purchase_for_recipient(
+                gift_id=item.candidate.gift_id,
+                gift_name=item.candidate.gift_name,
+                price=item.candidate.price,
+                recipient=item.candidate.recipient,
+                quantity=item.candidate.quantity,
+                balance=balance,
+                allocated=item.quantity,
+            )
+            for item in plan.items
+        ))
+
+        # Allocations ran against the same starting balance; chain them
+        executed = []
+        for item, result in zip(plan.items, results, strict=True):
+            balance -= item.candidate.price * result.purchased_quantity
+            executed.append(result._replace(
+                remaining_balance=balance,
+                gift_name=item.candidate.gift_name,
+                recipient=item.candidate.recipient,
+                price=item.candidate.price,
+            ))
         BALANCE.set(balance)
         
-        # Check budget limits
-        self._check_daily_reset()
+        for candidate in plan.skipped:
+            PURCHASES_FAILED.labels(reason="not_allocated").inc()
+            executed.append(PurchaseResult(
+                success=False,
+                purchased_quantity=0,
+                requested_quantity=candidate.quantity,
+                is_partial=False,
+                remaining_balance=balance,
+                error="Not allocated by purchase plan",
+                gift_name=candidate.gift_name,
+                recipient=candidate.recipient,
+                price=candidate.price,
+            ))
         
-        for range_config in matching_ranges:
-            for recipient in range_config.recipients:
-                result = await self._purchase_for_recipient(
-                    gift_id=gift_id,
-                    gift_name=gift_name,
-                    price=price,
-                    recipient=recipient,
-                    quantity=range_config.quantity_per_recipient,
-                    balance=balance,
-                )
-                results.append(result)
-                
-                # Update balance
-                if result.success:
-                    balance = result.remaining_balance
-                    BALANCE.set(balance)
+        return executed
+
+    async def process_gift(self, gift: Any) -> list[PurchaseResult]:
+        """Process a gift and purchase for all matching recipients.
         
-        return results
+        Args:
+            gift: Gift object from Telegram
+
+        Returns:
+            List of purchase results
+        """
+        with tracer.span("purchase.process_gift") as span:
+            results = []
+
+            # Extract gift properties
+            gift_id = getattr(gift, "id", gift.get("id") if isinstance(gift, dict) else None)
+            gift_name = getattr(gift, "title", gift.get("title") if isinstance(gift, dict) else "Unknown")
+            price = getattr(gift, "stars", gift.get("stars") if isinstance(gift, dict) else 0)
+
+            if not gift_id or price <= 0:
+                return results
+            span.set_attribute("gift_id", gift_id)
+
+            # Find matching ranges
+            matching_ranges = self._find_matching_ranges(price, gift)
+
+            if not matching_ranges:
+                return results
+
+            # Get current balance
+            balance = await self.client.get_balance()
+            BALANCE.set(balance)
+
+            # Forms for the later recipients are fetched while the first ones are bought,
+            # but never for more units than the balance covers
+            affordable = balance // price
+            for range_config in matching_ranges:
+                for recipient in range_config.recipients:
+                    count = min(range_config.quantity_per_recipient, affordable)
+                    if count > 0:
+                        self.prepare_forms(gift_id, recipient, count)
+                        affordable -= count
+
+            # Check budget limits
+            self._check_daily_reset()
+
+            for range_config in matching_ranges:
+                for recipient in range_config.recipients:
+                    result = await self._purchase_for_recipient(
+                        gift_id=gift_id,
+                        gift_name=gift_name,
+                        price=price,
+                        recipient=recipient,
+                        quantity=range_config.quantity_per_recipient,
+                        balance=balance,
+                    )
+                    results.append(result._replace(
+                        gift_name=gift_name,
+                        recipient=recipient,
+                        price=price,
+                    ))
+
+                    # Update balance
+                    if result.success:
+                        balance = result.remaining_balance
+                        BALANCE.set(balance)
+
+            return results
+
+    def prepare_forms(self, gift_id: int, recipient: str | int, quantity: int) -> None:
+        """Start fetching payment forms for a candidate in the background.
+
+        Args:
+            gift_id: Gift ID
+            recipient: Username or user ID
+            quantity: Units that may be bought
+        """
+        task = asyncio.create_task(self._prepare_forms(gift_id, recipient, quantity))
+        self._prepare_tasks.add(task)
+        task.add_done_callback(self._prepare_tasks.discard)
+
+    async def _prepare_forms(self, gift_id: int, recipient: str | int, quantity: int) -> None:
+        """Resolve the recipient and queue its payment forms."""
+        recipient_id = await self._resolve_recipient(recipient)
+        if (
+            recipient_id
+            and recipient_id not in self.gift_config.blacklist_recipients
+            and self.client.can_send(gift_id, recipient_id)
+        ):
+            self.forms.prepare(gift_id, recipient_id, quantity)
     
     def _find_matching_ranges(self, price: int, gift: Any) -> list[GiftRange]:
         """Find all gift ranges that match this gift.
@@ -132,6 +341,7 @@ class PurchaseEngine:
         recipient: str | int,
         quantity: int,
         balance: int,
+        allocated: int | None = None,
     ) -> PurchaseResult:
         """Purchase gifts for a specific recipient.
         
@@ -142,6 +352,7 @@ class PurchaseEngine:
             recipient: Username or user ID
             quantity: Desired quantity
             balance: Current balance
+            allocated: Units granted by a purchase plan (caps quantity)
             
         Returns:
             PurchaseResult
@@ -193,6 +404,8 @@ class PurchaseEngine:
         
         # Calculate max affordable
         max_affordable = min(quantity, effective_balance // price)
+        if allocated is not None:
+            max_affordable = min(max_affordable, allocated)
         
         if max_affordable <= 0:
             PURCHASES_FAILED.labels(reason="insufficient_balance").inc()
@@ -207,33 +420,67 @@ class PurchaseEngine:
         
         is_partial = max_affordable < quantity
         
-        # Purchase gifts
+        # Forms for every unit, unless the prefetch already has them coming
+        self.forms.prepare(gift_id, recipient_id, max_affordable)
+
+        # Purchase gifts, one journaled intent per unit
         purchased = 0
+        transaction_ids = []
+        recipient_username = str(recipient) if isinstance(recipient, str) else None
         for _ in range(max_affordable):
-            success = await self.client.send_gift(
+            intent_id = new_intent_id()
+            self.intents.record(
+                intent_id,
+                INTENT,
                 gift_id=gift_id,
+                gift_name=gift_name,
                 recipient_id=recipient_id,
+                recipient_username=recipient_username,
+                price=price,
             )
             
-            if success:
+            try:
+                with tracer.span("purchase.send", gift_id=gift_id, recipient_id=recipient_id, intent_id=intent_id):
+                    form = await self.forms.take(gift_id, recipient_id)
+                    drop_latency.mark(gift_id, SEND_STARTED)
+                    receipt = await self.client.send_gift(
+                        gift_id=gift_id,
+                        recipient_id=recipient_id,
+                        form=form,
+                        on_submit=lambda f, i=intent_id: self.intents.record(i, SENT, form_id=f.form_id),
+                    )
+            except (TimeoutError, OSError) as e:
+                # May have been paid; left as sent for reconciliation
+                stats_buffer.add(errors=1)
+                logger.error("purchase_outcome_unknown", intent_id=intent_id, error=str(e))
+                break
+
+            if receipt:
+                transaction_id = receipt.transaction_id or intent_id
+                self.intents.record(intent_id, CONFIRMED, transaction_id=transaction_id)
+                transaction_ids.append(transaction_id)
+                drop_latency.mark(gift_id, SEND_CONFIRMED)
                 purchased += 1
                 balance -= price
                 self._daily_spent += price
+                stats_buffer.add_purchase(1, price)
             else:
+                self.intents.record(intent_id, FAILED)
+                stats_buffer.add(errors=1)
                 break
         
-        # Record in database
+        # Record in database (write-behind, never waits on disk)
         if purchased > 0:
-            async with get_session() as session:
-                await record_purchase(
-                    session=session,
+            for transaction_id in transaction_ids:
+                self.journal.append(
                     gift_id=gift_id,
                     gift_name=gift_name,
                     recipient_id=recipient_id,
-                    recipient_username=str(recipient) if isinstance(recipient, str) else None,
+                    recipient_username=recipient_username,
                     price=price,
-                    quantity=purchased,
+                    quantity=1,
                     is_partial=is_partial and purchased < quantity,
+                    transaction_id=transaction_id,
                 )
             
             GIFTS_PURCHASED.labels(
@@ -279,8 +526,14 @@ class PurchaseEngine:
             # Remove @ prefix if present
             username = recipient.lstrip("@")
             
+            cached = self._recipient_ids.get(username)
+            if cached:
+                return cached
+
             try:
                 user = await self.client.client.get_users(username)
+                if user:
+                    self._recipient_ids[username] = user.id
                 return user.id if user else None
             except Exception as e:
                 logger.error("recipient_resolution_failed", username=username, error=str(e))
@@ -288,9 +541,91 @@ class PurchaseEngine:
         
         return None
     
+    async def reconcile_intents(self) -> None:
+        """Resolve purchases left in flight by a previous run.
+
+        Confirmed units missing from the database are recorded; units that
+        may have been sent are looked up in the Stars transaction history;
+        units never sent are dropped. The intent log is then compacted to
+        whatever is still unresolved.
+        """
+        intents = self.intents.load()
+        if not intents:
+            self.intents.compact([])
+            return
+
+        confirmed = [i for i in intents.values() if i["state"] == CONFIRMED]
+        in_flight = [i for i in intents.values() if i["state"] == SENT]
+        unresolved = []
+
+        # Payments already attributed to an intent cannot match another one
+        claimed = {i["transaction_id"] for i in confirmed}
+        for intent in in_flight:
+            since = datetime.utcfromtimestamp(intent["ts"] - 60)
+            try:
+                found = await self.client.find_gift_payments(
+                    intent["gift_id"], intent["recipient_id"], since,
+                )
+            except Exception as e:
+                logger.error("intent_lookup_failed", intent_id=intent["id"], error=str(e))
+                unresolved.append(intent)
+                continue
+
+            match = next((t for t in found if t not in claimed), None)
+            if match:
+                intent.update(state=CONFIRMED, transaction_id=match)
+                claimed.add(match)
+                confirmed.append(intent)
+            else:
+                intent["state"] = FAILED
+
+        async with get_session() as session:
+            if confirmed:
+                result = await session.execute(
+                    select(Purchase.transaction_id).where(Purchase.transaction_id.in_(claimed))
+                )
+                stored = {row[0] for row in result.fetchall()}
+                for intent in confirmed:
+                    if intent["transaction_id"] in stored:
+                        continue
+                    await record_purchase(
+                        session,
+                        gift_id=intent["gift_id"],
+                        gift_name=intent["gift_name"],
+                        recipient_id=intent["recipient_id"],
+                        recipient_username=intent.get("recipient_username"),
+                        price=intent["price"],
+                        quantity=1,
+                        transaction_id=intent["transaction_id"],
+                        purchased_at=datetime.utcfromtimestamp(intent["ts"]),
+                    )
+                    stored.add(intent["transaction_id"])
+                    logger.info("intent_recovered", intent_id=intent["id"], gift_id=intent["gift_id"])
+
+        self.intents.compact(unresolved)
+        logger.info(
+            "intents_reconciled",
+            total=len(intents),
+            confirmed=len(confirmed),
+            unresolved=len(unresolved),
+        )
+
+    def _on_journal_flush(self, records: list[dict[str, Any]]) -> None:
+        """Let the intent log drop confirmed units that are now in the database."""
+        self.intents.resolve(record["transaction_id"] for record in records)
+
+    async def restore_daily_budget(self) -> None:
+        """Restore today's spend from DailyStats so daily_limit survives restarts."""
+        today = await stats_buffer.restore()
+
+        self._daily_spent = today.total_spent
+        self._last_reset_date = today.date
+
+        logger.info("daily_budget_restored", date=today.date, spent=self._daily_spent)
+
     def _check_daily_reset(self) -> None:
         """Reset daily spent counter if new day."""
-        today = datetime.utcnow().strftime("%Y-%m-%d")
+        today = utc_today()
         
         if self._last_reset_date != today:
             self._daily_spent = 0
@@ -0,0 +1,59 @@
+"""Latency, error and FloodWait metrics for Telegram RPCs."""
+import asyncio
+import time
+from collections.abc import Awaitable
+from typing import Any, TypeVar
+
+from pyrogram.errors import FloodWait, RPCError
+
+from src.observability.metrics import FLOOD_WAIT_SECONDS, RPC_DURATION, RPC_ERRORS
+from src.observability.tracing import CLIENT, tracer
+
+from .errors import error_id
+
+T = TypeVar("T")
+
+# Histogram children per (method, account); labels() takes a lock on every call
+_timers: dict[tuple[str, str], Any] = {}
+
+
+async def instrumented(method: str, account: str, request: Awaitable[T]) -> T:
+    """Await one RPC and record its latency and outcome.
+
+    Latency is observed for answers and errors alike. Errors are counted
+    by code and Telegram error ID; FloodWait also adds its wait to the
+    method's flood-wait seconds. A request cancelled by its caller (e.g.
+    the losing side of a hedged fetch) is not observed. Inside a sampled
+    trace the request is also recorded as a client span.
+
+    Args:
+        method: Telegram API method, e.g. "payments.getStarGifts"
+        account: Session name the request is sent on
+        request: The pending RPC
+
+    Returns:
+        The RPC result
+    """
+    with tracer.span(method, new_trace=False, kind=CLIENT, account=account):
+        start = time.perf_counter()
+        try:
+            return await request
+        except asyncio.CancelledError:
+            start = None
+            raise
+        except FloodWait as e:
+            FLOOD_WAIT_SECONDS.labels(method=method, account=account).inc(e.value or 0)
+            RPC_ERRORS.labels(method=method, account=account, code=str(e.CODE), error=error_id(e)).inc()
+            raise
+        except RPCError as e:
+            RPC_ERRORS.labels(method=method, account=account, code=str(e.CODE), error=error_id(e)).inc()
+            raise
+        except (TimeoutError, OSError) as e:
+            RPC_ERRORS.labels(method=method, account=account, code="transport", error=type(e).__name__).inc()
+            raise
+        finally:
+            if start is not None:
+                timer = _timers.get((method, account))
+                if timer is None:
+                    timer = _timers[(method, account)] = RPC_DURATION.labels(method=method, account=account)
+                timer.observe(time.perf_counter() - start)
@@ -0,0 +1,99 @@
+"""Update-driven gift detection."""
+from collections.abc import Callable
+from typing import Any
+
+from pyrogram import utils
+
+from src.observability import get_logger
+from src.observability.metrics import PUSH_SIGNALS
+
+from .client import TelegramClientWrapper
+
+logger = get_logger(__name__)
+
+# Any raw update or service action with this in its class name concerns gifts
+_GIFT_MARKER = "StarGift"
+
+
+class UpdateDetector:
+    """Turns Telegram updates into immediate catalog fetches.
+
+    Listens to raw updates and calls on_signal whenever one hints that
+    the gift catalog may have changed: a gift-related update or service
+    message, or a new post in one of the announcement chats. The signal
+    is only a trigger; the catalog fetch itself stays authoritative.
+    """
+
+    def __init__(
+        self,
+        client: TelegramClientWrapper,
+        on_signal: Callable[[], None],
+        announcement_chats: list[int] | None = None,
+        update_types: list[str] | None = None,
+    ) -> None:
+        """Initialize the detector.
+
+        Args:
+            client: Telegram client wrapper
+            on_signal: Called (synchronously) for every catalog signal
+            announcement_chats: Chat IDs whose new posts are signals
+            update_types: Extra raw update class names that are signals
+        """
+        self.client = client
+        self.on_signal = on_signal
+        self.announcement_chats = set(announcement_chats or ())
+        self.update_types = set(update_types or ())
+
+        self._handle: Any = None
+
+    def attach(self) -> None:
+        """Start listening for updates."""
+        if self._handle is None:
+            self._handle = self.client.add_update_handler(self._on_raw_update)
+            logger.info(
+                "update_detector_attached",
+                announcement_chats=len(self.announcement_chats),
+            )
+
+    def detach(self) -> None:
+        """Stop listening for updates."""
+        if self._handle is not None:
+            self.client.remove_update_handler(self._handle)
+            self._handle = None
+
+    async def _on_raw_update(self, _client: Any, update: Any, _users: dict, _chats: dict) -> None:
+        """Raw update callback registered with Pyrogram."""
+        source = self.classify(update)
+        if source:
+            PUSH_SIGNALS.labels(source=source).inc()
+            logger.debug("catalog_signal", source=source, update=type(update).__name__)
+            self.on_signal()
+
+    def classify(self, update: Any) -> str | None:
+        """Decide whether an update signals a catalog change.
+
+        Args:
+            update: Raw Telegram update
+
+        Returns:
+            Signal source ("update", "service_message", "announcement"),
+            or None if the update is unrelated
+        """
+        name = type(update).__name__
+        if name in self.update_types or _GIFT_MARKER in name:
+            return "update"
+
+        message = getattr(update, "message", None)
+        if message is None:
+            return None
+
+        action = getattr(message, "action", None)
+        if action is not None and _GIFT_MARKER in type(action).__name__:
+            return "service_message"
+
+        if self.announcement_chats:
+            channel_id = getattr(getattr(message, "peer_id", None), "channel_id", None)
+            if channel_id is not None and utils.get_channel_id(channel_id) in self.announcement_chats:
+                return "announcement"
+
+        return None
@@ -11,14 +11,19 @@ from rich.text import Text
 from src import __version__
 from src.config import get_settings
 from src.core import TelegramClientWrapper, GiftMonitor, PurchaseEngine
-from src.notifications import NotificationService
+from src.notifications import DailySummaryScheduler, NotificationService, StatsCommand
+from src.storage import configure_engine, init_db
 from src.observability import (
     setup_logging,
     get_logger,
-    start_health_server,
-    start_metrics_server,
+    start_observability_server,
     set_health_status,
 )
+from src.observability.loop import LoopMonitor
+from src.observability.memory import MemoryProfiler, cgroup_memory_limit, memory_guard
+from src.observability.metrics import configure_label_guards
+from src.observability.profiling import StackSampler
+from src.observability.tracing import configure_tracing, tracer
 
 console = Console()
 logger = get_logger(__name__)
@@ -39,13 +44,30 @@ def display_banner() -> None:
     console.print(panel)
 
 
-async def shutdown(signal_received: signal.Signals, monitor: GiftMonitor | None) -> None:
+async def shutdown(
+    signal_received: signal.Signals,
+    monitor: GiftMonitor | None,
+    purchase_engine: PurchaseEngine | None = None,
+    notification_service: NotificationService | None = None,
+) -> None:
     """Handle graceful shutdown."""
     logger.info("shutdown_signal_received", signal=signal_received.name)
     
     if monitor:
         await monitor.stop()
     
+    # Deliver queued notifications before the client's tasks are cancelled
+    if notification_service:
+        await notification_service.stop(
+            timeout=get_settings().app.storage.shutdown_flush_timeout,
+        )
+
+    # Persist journaled purchases before tasks are cancelled
+    if purchase_engine:
+        await purchase_engine.journal.stop(
+            timeout=get_settings().app.storage.shutdown_flush_timeout,
+        )
+
     # Allow tasks to complete
     tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
     for task in tasks:
@@ -65,6 +87,18 @@ async def run() -> None:
     
     # Setup logging
     setup_logging(settings.log_level)
+    configure_label_guards(settings.app.metrics.label_limit, settings.app.metrics.allow)
+
+    tracing = settings.app.tracing
+    if tracing.enabled:
+        configure_tracing(
+            tracing.sample_rate,
+            tracing.path,
+            flush_interval=tracing.flush_interval,
+            max_queue=tracing.max_queue,
+            max_file_mb=tracing.max_file_mb,
+        )
+    tracer.exporter.start()
     
     # Display banner
     display_banner()
@@ -76,18 +110,41 @@ async def run() -> None:
         interval=settings.app.telegram.interval_seconds,
     )
     
-    # Start observability servers
-    start_health_server(settings.health_port)
-    start_metrics_server(settings.metrics_port)
-    logger.info(
-        "observability_started",
-        health_port=settings.health_port,
-        metrics_port=settings.metrics_port,
+    # Health and metrics share one endpoint on the event loop
+    profiler = None
+    if settings.profiling_enabled:
+        profiler = StackSampler(
+            interval=settings.profiling_interval_ms / 1000,
+            max_seconds=settings.profiling_max_seconds,
+        )
+    observability_server = await start_observability_server(
+        settings.health_port,
+        metrics_cache_seconds=settings.metrics_cache_seconds,
+        profiler=profiler,
+        memory_profiler=MemoryProfiler() if settings.memory_debug_enabled else None,
+    )
+    logger.info("observability_started", port=settings.health_port, profiling=profiler is not None)
+
+    memory = settings.app.memory
+    memory_guard.configure(
+        memory.limit_mb * 1024 * 1024 or cgroup_memory_limit(),
+        soft_ratio=memory.soft_limit_ratio,
+        resume_ratio=memory.resume_ratio,
+        interval=memory.check_interval_seconds,
+    )
+    memory_guard.start()
+
+    loop_monitor = LoopMonitor(
+        interval=settings.app.event_loop.probe_interval_ms / 1000,
+        stall_threshold=settings.app.event_loop.stall_threshold_ms / 1000,
     )
+    if settings.app.event_loop.enabled:
+        loop_monitor.start()
     
     set_health_status(status="starting")
     
     monitor: GiftMonitor | None = None
+    purchase_engine: PurchaseEngine | None = None
     
     try:
         async with TelegramClientWrapper() as client:
@@ -95,35 +152,95 @@ async def run() -> None:
             purchase_engine = PurchaseEngine(client)
             notification_service = NotificationService(client)
             
+            # Recover in-flight purchases and today's spend before any purchase can run
+            storage = settings.app.storage
+            configure_engine(
+                mode=storage.engine_mode,
+                synchronous=storage.synchronous,
+                cache_size_kib=storage.cache_size_kib,
+                mmap_size_mb=storage.mmap_size_mb,
+                busy_timeout_ms=storage.busy_timeout_ms,
+                read_pool_size=storage.read_pool_size,
+            )
+            await init_db()
+            await purchase_engine.reconcile_intents()
+            await purchase_engine.restore_daily_budget()
+            purchase_engine.journal.start()
+
+            notification_service.start()
+
+            # Summaries and /stats read the running day counters, never the purchases table
+            notification_settings = settings.app.notifications
+            summary_scheduler = DailySummaryScheduler(
+                notification_service,
+                client,
+                at=notification_settings.daily_summary_time,
+            )
+            if notification_service.enabled and notification_settings.types.daily_summary:
+                summary_scheduler.start()
+
+            stats_command = StatsCommand(client, notification_service)
+            if notification_settings.stats_command:
+                stats_command.attach()
+
             # Create monitor with purchase callback
-            async def on_new_gift(gift):
-                results = await purchase_engine.process_gift(gift)
+            # Notifications are only queued; the outbox delivers them in the background
+            def notify_results(results):
                 for result in results:
                     if result.success:
-                        gift_name = getattr(gift, "title", "Unknown")
-                        await notification_service.send_purchase_success(
-                            gift_name=gift_name,
-                            recipient="Unknown",  # Would need to track this
+                        notification_service.send_purchase_success(
+                            gift_name=result.gift_name,
+                            recipient=result.recipient,
                             quantity=result.purchased_quantity,
-                            price=0,  # Would need to track this
+                            price=result.price,
                             is_partial=result.is_partial,
                         )
+                if results:
+                    notification_service.send_balance_low(results[-1].remaining_balance)
+
+            async def on_new_gift(gift):
+                notify_results(await purchase_engine.process_gift(gift))
             
-            monitor = GiftMonitor(client, on_new_gift=lambda g: asyncio.create_task(on_new_gift(g)))
+            async def on_gift_batch(gifts):
+                notify_results(await purchase_engine.process_cycle(gifts))
+
+            if settings.app.gifts.optimize_purchase_plan:
+                monitor = GiftMonitor(
+                    client,
+                    on_gift_batch=lambda gs: asyncio.create_task(on_gift_batch(gs)),
+                )
+                # Plan with the same sell-out priorities the monitor ranks by
+                purchase_engine.depletion = monitor.depletion
+            else:
+                monitor = GiftMonitor(
+                    client,
+                    on_new_gift=lambda g: asyncio.create_task(on_new_gift(g)),
+                )
             
             # Register signal handlers
             loop = asyncio.get_running_loop()
             for sig in (signal.SIGTERM, signal.SIGINT):
                 loop.add_signal_handler(
                     sig,
-                    lambda s=sig: asyncio.create_task(shutdown(s, monitor)),
+                    lambda s=sig: asyncio.create_task(
+                        shutdown(s, monitor, purchase_engine, notification_service)
+                    ),
                 )
             
             # Send start notification
-            await notification_service.send_start_message()
+            notification_service.send_start_message()
             
             # Start monitoring
-            await monitor.start()
+            try:
+                await monitor.start()
+            finally:
+                stats_command.detach()
+                await summary_scheduler.stop()
+                # Deliver queued notifications while the client is still connected
+                # (a no-op after a signal; shutdown() already drained the outbox)
+                await notification_service.stop(
+                    timeout=settings.app.storage.shutdown_flush_timeout,
+                )
             
     except KeyboardInterrupt:
         logger.info("keyboard_interrupt")
@@ -132,7 +249,16 @@ async def run() -> None:
         set_health_status(status="unhealthy")
         raise
     finally:
+        if purchase_engine:
+            await purchase_engine.journal.stop(
+                timeout=settings.app.storage.shutdown_flush_timeout,
+            )
+            purchase_engine.intents.close()
+        await tracer.exporter.stop(timeout=settings.app.storage.shutdown_flush_timeout)
+        await memory_guard.stop()
+        await loop_monitor.stop()
         set_health_status(status="stopped")
+        await observability_server.stop()
         logger.info("application_stopped")
 
 
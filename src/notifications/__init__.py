@@ -1,4 +1,5 @@
 """Notifications package."""
+from .summary import DailySummaryScheduler, StatsCommand
 from .telegram import NotificationService
 
-__all__ = ["NotificationService"]
+__all__ = ["DailySummaryScheduler", "NotificationService", "StatsCommand"]
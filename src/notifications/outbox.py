@@ -0,0 +1,185 @@
+"""Background notification delivery with digests and rate limiting."""
+import asyncio
+import contextlib
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+
+from pyrogram.errors import FloodWait
+
+from src.observability import get_logger
+from src.observability.memory import memory_guard
+from src.observability.metrics import NOTIFICATION_QUEUE_DEPTH, NOTIFICATIONS_SENT, WORK_SHED
+
+logger = get_logger(__name__)
+
+# Telegram rejects longer messages
+MAX_MESSAGE_LENGTH = 4096
+
+_DIGEST_SEPARATOR = "\n\n➖➖➖\n\n"
+
+
+class NotificationOutbox:
+    """Queues notifications and delivers them from a background task.
+
+    post() never waits on the network. Critical alerts are sent one by
+    one, ahead of everything else; informational messages posted within
+    the same window are merged into a single digest. A token bucket
+    keeps the sender under the channel's message rate, and a FloodWait
+    pauses only the sender. Failed messages are retried with backoff.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str], Awaitable[bool]],
+        max_per_minute: int = 20,
+        digest_window: float = 10.0,
+        max_attempts: int = 3,
+    ) -> None:
+        """Initialize the outbox.
+
+        Args:
+            send: Delivers one message; returns False on failure
+            max_per_minute: Messages allowed per minute
+            digest_window: Seconds informational messages are collected
+            max_attempts: Delivery attempts before a message is dropped
+        """
+        self.send = send
+        self.digest_window = digest_window
+        self.max_attempts = max_attempts
+
+        self._interval = 60.0 / max_per_minute
+        self._next_send = 0.0
+
+        self._critical: deque[tuple[str, int]] = deque()
+        self._info: list[str] = []
+        self._retry: deque[tuple[str, int]] = deque()
+        self._wakeup = asyncio.Event()
+        self._sender: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        return len(self._critical) + len(self._info) + len(self._retry)
+
+    def post(self, text: str, critical: bool = False) -> None:
+        """Queue a notification without waiting for delivery.
+
+        Informational messages are dropped while memory is being shed.
+
+        Args:
+            text: Message text (HTML)
+            critical: Send on its own, ahead of informational messages
+        """
+        if critical:
+            self._critical.append((text, 0))
+            self._wakeup.set()
+        elif memory_guard.shedding:
+            WORK_SHED.labels(kind="notification").inc()
+            return
+        else:
+            self._info.append(text)
+        NOTIFICATION_QUEUE_DEPTH.set(len(self))
+
+    def start(self) -> None:
+        """Start the sender task."""
+        if self._sender is None or self._sender.done():
+            self._sender = asyncio.create_task(self._run(), name="notification-outbox")
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Stop the sender, delivering what is queued within a deadline.
+
+        Args:
+            timeout: Seconds allowed for the final delivery
+        """
+        if self._sender is not None:
+            self._sender.cancel()
+            await asyncio.gather(self._sender, return_exceptions=True)
+            self._sender = None
+
+        try:
+            await asyncio.wait_for(self.drain(), timeout=timeout)
+        except TimeoutError:
+            logger.warning("notification_outbox_stop_timeout", pending=len(self))
+
+    async def drain(self) -> None:
+        """Deliver everything queued right now, respecting the rate limit."""
+        while self._critical:
+            await self._deliver(*self._critical.popleft(), kind="critical")
+
+        while self._retry:
+            await self._deliver(*self._retry.popleft(), kind="retry")
+
+        if self._info:
+            batch, self._info = self._info, []
+            for digest in render_digests(batch):
+                await self._deliver(digest, 0, kind="digest")
+
+    async def _run(self) -> None:
+        """Sender loop: critical messages immediately, digests per window."""
+        window_end = time.monotonic() + self.digest_window
+
+        while True:
+            timeout = max(window_end - time.monotonic(), 0.0)
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            self._wakeup.clear()
+
+            if time.monotonic() >= window_end:
+                await self.drain()
+                window_end = time.monotonic() + self.digest_window
+            else:
+                while self._critical:
+                    await self._deliver(*self._critical.popleft(), kind="critical")
+
+    async def _deliver(self, text: str, attempt: int, kind: str) -> None:
+        """Send one message under the rate limit, requeueing on failure."""
+        delay = self._next_send - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self._next_send = time.monotonic() + self._interval
+
+        try:
+            sent = await self.send(text)
+        except FloodWait as e:
+            # Only the sender waits; purchases keep their own rate budget
+            logger.warning("notification_flood_wait", wait_seconds=e.value)
+            self._next_send = time.monotonic() + e.value
+            sent = False
+        except Exception as e:
+            logger.error("notification_send_error", error=str(e))
+            sent = False
+
+        if sent:
+            NOTIFICATIONS_SENT.labels(kind=kind).inc()
+        elif attempt + 1 < self.max_attempts:
+            self._retry.append((text, attempt + 1))
+            self._next_send = max(self._next_send, time.monotonic() + self._interval * 2 ** attempt)
+        else:
+            logger.error("notification_dropped", attempts=attempt + 1)
+
+        NOTIFICATION_QUEUE_DEPTH.set(len(self))
+
+
+def render_digests(messages: list[str]) -> list[str]:
+    """Merge messages into as few Telegram-sized digests as possible.
+
+    Args:
+        messages: Message texts in posting order
+
+    Returns:
+        Digest texts; a single message is passed through unchanged
+    """
+    digests = []
+    current = ""
+
+    for text in messages:
+        text = text[:MAX_MESSAGE_LENGTH]
+        candidate = f"{current}{_DIGEST_SEPARATOR}{text}" if current else text
+        if len(candidate) > MAX_MESSAGE_LENGTH:
+            digests.append(current)
+            current = text
+        else:
+            current = candidate
+
+    if current:
+        digests.append(current)
+    return digests
@@ -0,0 +1,155 @@
+"""Daily summary scheduling and the /stats command."""
+import asyncio
+from datetime import datetime, time, timedelta
+from typing import Any
+
+from src.observability import get_logger
+from src.observability.latency import DropLatencyTracker, drop_latency
+from src.storage.stats import DailyStatsBuffer, stats_buffer
+
+from .telegram import NotificationService
+
+logger = get_logger(__name__)
+
+
+def seconds_until(at: time, now: datetime) -> float:
+    """Seconds from now until the next time the clock shows at.
+
+    Args:
+        at: Time of day
+        now: Current time, in the same timezone as at
+
+    Returns:
+        Seconds to wait; a full day if at is right now
+    """
+    target = datetime.combine(now.date(), at)
+    if target <= now:
+        target += timedelta(days=1)
+    return (target - now).total_seconds()
+
+
+class DailySummaryScheduler:
+    """Sends the daily summary at a fixed UTC time of day.
+
+    The summary is read from the running day counters and the drop
+    latency tracker, so sending it costs one balance request and no
+    database query.
+    """
+
+    def __init__(
+        self,
+        notifications: NotificationService,
+        client: Any,
+        at: time,
+        counters: DailyStatsBuffer = stats_buffer,
+        latency: DropLatencyTracker = drop_latency,
+    ) -> None:
+        """Initialize the scheduler.
+
+        Args:
+            notifications: Notification service that posts the summary
+            client: TelegramClientWrapper, for the current balance
+            at: UTC time of day to send the summary
+            counters: Running day counters
+            latency: Drop latency tracker for the day's drop-to-purchase times
+        """
+        self.notifications = notifications
+        self.client = client
+        self.at = at
+        self.counters = counters
+        self.latency = latency
+
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        """Start the scheduler in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="daily-summary")
+            logger.info("daily_summary_scheduled", at=self.at.isoformat())
+
+    async def stop(self) -> None:
+        """Stop the scheduler."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def send_summary(self) -> None:
+        """Post today's summary now."""
+        counters = self.counters.snapshot()
+        balance = await self.client.get_balance()
+
+        self.notifications.send_daily_summary(
+            gifts_checked=counters.gifts_checked,
+            gifts_purchased=counters.gifts_purchased,
+            total_spent=counters.total_spent,
+            balance=balance,
+            errors_count=counters.errors_count,
+            drop_latency=self.latency.summary(),
+        )
+        logger.info("daily_summary_sent", date=counters.date)
+
+    async def _run(self) -> None:
+        """Sleep until the configured time, send, repeat."""
+        while True:
+            await asyncio.sleep(seconds_until(self.at, datetime.utcnow()))
+            try:
+                await self.send_summary()
+            except Exception as e:
+                logger.error("daily_summary_failed", error=str(e))
+
+
+class StatsCommand:
+    """Answers /stats from the running day counters.
+
+    The reply never touches the database, so it costs the same whatever
+    the size of the purchase history.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        notifications: NotificationService,
+        counters: DailyStatsBuffer = stats_buffer,
+    ) -> None:
+        """Initialize the command.
+
+        Args:
+            client: TelegramClientWrapper to register with
+            notifications: Notification service that formats the reply
+            counters: Running day counters
+        """
+        self.client = client
+        self.notifications = notifications
+        self.counters = counters
+
+        self._handle: Any = None
+
+    def attach(self) -> None:
+        """Start answering /stats."""
+        if self._handle is None:
+            self._handle = self.client.add_command_handler("stats", self.handle)
+
+    def detach(self) -> None:
+        """Stop answering /stats."""
+        if self._handle is not None:
+            self.client.remove_update_handler(self._handle)
+            self._handle = None
+
+    def render(self) -> str:
+        """Today's counters as a message."""
+        counters = self.counters.snapshot()
+        return self.notifications.render_stats(
+            f"Stats for {counters.date}",
+            gifts_checked=counters.gifts_checked,
+            gifts_purchased=counters.gifts_purchased,
+            total_spent=counters.total_spent,
+            errors_count=counters.errors_count,
+        )
+
+    async def handle(self, _client: Any, message: Any) -> None:
+        """Reply to a /stats message."""
+        try:
+            await message.reply_text(self.render())
+        except Exception as e:
+            logger.error("stats_command_failed", error=str(e))
@@ -3,12 +3,19 @@ from typing import Any
 
 from src.config import get_settings
 from src.observability import get_logger
+from src.observability.latency import DropLatencySummary
+
+from .outbox import NotificationOutbox
 
 logger = get_logger(__name__)
 
 
 class NotificationService:
-    """Sends notifications to Telegram channel."""
+    """Sends notifications to Telegram channel.
+
+    Every send_* method only queues the message in the outbox and returns
+    immediately; delivery happens in the outbox's background task.
+    """
     
     def __init__(self, client: Any) -> None:
         """Initialize the notification service.
@@ -25,8 +32,38 @@ class NotificationService:
         self.language = settings.app.language
         
         self._enabled = self.channel_id != -100
+        self._balance_alerted = False
+
+        self.outbox = NotificationOutbox(
+            self._send,
+            max_per_minute=settings.app.notifications.max_messages_per_minute,
+            digest_window=settings.app.notifications.digest_window_seconds,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        """Whether a notification channel is configured."""
+        return self._enabled
+
+    def start(self) -> None:
+        """Start delivering queued notifications."""
+        if self._enabled:
+            self.outbox.start()
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Deliver what is queued and stop.
+
+        Args:
+            timeout: Seconds allowed for the final delivery
+        """
+        if self._enabled:
+            await self.outbox.stop(timeout)
+
+    async def _send(self, text: str) -> bool:
+        """Deliver one message to the channel."""
+        return await self.client.send_message(self.channel_id, text)
     
-    async def send_start_message(self) -> None:
+    def send_start_message(self) -> None:
         """Send bot startup notification."""
         if not self._enabled:
             return
@@ -37,9 +74,9 @@ class NotificationService:
             "📊 Use /stats for statistics"
         )
         
-        await self.client.send_message(self.channel_id, message)
+        self.outbox.post(message)
     
-    async def send_purchase_success(
+    def send_purchase_success(
         self,
         gift_name: str,
         recipient: str | int,
@@ -63,16 +100,21 @@ class NotificationService:
             f"💵 Total: {price * quantity}⭐"
         )
         
-        await self.client.send_message(self.channel_id, message)
+        self.outbox.post(message)
     
-    async def send_balance_low(self, balance: int) -> None:
-        """Send low balance warning."""
+    def send_balance_low(self, balance: int) -> None:
+        """Send low balance warning once per drop below the threshold."""
         if not self._enabled or not self.types.balance_low:
             return
         
         if balance > self.low_balance_threshold:
+            self._balance_alerted = False
             return
         
+        if self._balance_alerted:
+            return
+        self._balance_alerted = True
+
         message = self._format_message(
             "⚠️ <b>Low Balance Warning</b>\n\n"
             f"💰 Current Balance: {balance}⭐\n"
@@ -80,9 +122,9 @@ class NotificationService:
             "Please top up your balance to continue purchasing."
         )
         
-        await self.client.send_message(self.channel_id, message)
+        self.outbox.post(message, critical=True)
     
-    async def send_error(self, error_type: str, message: str) -> None:
+    def send_error(self, error_type: str, message: str) -> None:
         """Send error notification."""
         if not self._enabled or not self.types.errors:
             return
@@ -92,28 +134,66 @@ class NotificationService:
             f"<code>{message}</code>"
         )
         
-        await self.client.send_message(self.channel_id, notification)
+        self.outbox.post(notification, critical=True)
     
-    async def send_daily_summary(
+    def send_daily_summary(
         self,
         gifts_checked: int,
         gifts_purchased: int,
         total_spent: int,
         balance: int,
+        errors_count: int = 0,
+        drop_latency: DropLatencySummary | None = None,
     ) -> None:
         """Send daily summary notification."""
         if not self._enabled or not self.types.daily_summary:
             return
         
-        message = self._format_message(
-            "📊 <b>Daily Summary</b>\n\n"
+        message = self.render_stats(
+            "Daily Summary",
+            gifts_checked=gifts_checked,
+            gifts_purchased=gifts_purchased,
+            total_spent=total_spent,
+            errors_count=errors_count,
+        )
+
+        message += f"\n💰 Balance: {balance}⭐"
+        if drop_latency is not None:
+            message += (
+                f"\n⏱ Drop to purchase: p50 {drop_latency.p50:.2f}s · "
+                f"p95 {drop_latency.p95:.2f}s · max {drop_latency.max:.2f}s "
+                f"({drop_latency.count} drops)"
+            )
+
+        self.outbox.post(message)
+
+    def render_stats(
+        self,
+        title: str,
+        gifts_checked: int,
+        gifts_purchased: int,
+        total_spent: int,
+        errors_count: int,
+    ) -> str:
+        """Format day counters for the daily summary and /stats.
+
+        Args:
+            title: Heading of the message
+            gifts_checked: Gifts checked today
+            gifts_purchased: Gifts purchased today
+            total_spent: Stars spent today
+            errors_count: Errors today
+
+        Returns:
+            Formatted message
+        """
+        return self._format_message(
+            f"📊 <b>{title}</b>\n\n"
             f"🔍 Gifts Checked: {gifts_checked}\n"
             f"🎁 Gifts Purchased: {gifts_purchased}\n"
             f"💵 Total Spent: {total_spent}⭐\n"
-            f"💰 Balance: {balance}⭐"
+            f"❗ Errors: {errors_count}"
         )
-        
-        await self.client.send_message(self.channel_id, message)
     
     def _format_message(self, message: str) -> str:
         """Format message with common elements.
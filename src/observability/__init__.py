@@ -1,13 +1,13 @@
 """Observability: logging, metrics, and health checks."""
 from .logging import setup_logging, get_logger
-from .metrics import start_metrics_server, GIFTS_CHECKED, GIFTS_PURCHASED, BALANCE
-from .health import start_health_server, set_health_status
+from .metrics import GIFTS_CHECKED, GIFTS_PURCHASED, BALANCE
+from .health import set_health_status
+from .server import start_observability_server
 
 __all__ = [
     "setup_logging",
     "get_logger",
-    "start_metrics_server",
-    "start_health_server",
+    "start_observability_server",
     "set_health_status",
     "GIFTS_CHECKED",
     "GIFTS_PURCHASED",
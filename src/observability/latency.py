@@ -0,0 +1,123 @@
+"""End-to-end latency of gift drops, from first sighting to a paid send."""
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import NamedTuple
+
+from .metrics import DROP_LATENCY, DROP_STAGE_LATENCY
+
+# Stages in pipeline order
+FIRST_SEEN = "first_seen"        # Catalog reply containing the gift arrived
+MATCHED = "matched"              # Gift passed the purchase criteria
+ENQUEUED = "enqueued"            # Handed to the purchase callbacks
+SEND_STARTED = "send_started"    # First send_gift request for the gift went out
+CONFIRMED = "confirmed"          # First send_gift for the gift was paid
+
+STAGES = (FIRST_SEEN, MATCHED, ENQUEUED, SEND_STARTED, CONFIRMED)
+
+
+class DropLatencySummary(NamedTuple):
+    """First-seen to confirmed latency of one day's drops."""
+    date: str
+    count: int
+    p50: float
+    p95: float
+    max: float
+
+
+class DropLatencyTracker:
+    """Records when each gift reaches each stage of the purchase path.
+
+    Only the first time a gift reaches a stage counts. Reaching a stage
+    observes the time since the previous recorded stage in
+    gift_hunter_drop_stage_latency_seconds; confirmation also observes
+    the whole path in gift_hunter_drop_latency_seconds and keeps it for
+    the daily report. Timestamps are perf_counter() seconds, the clock
+    catalog snapshots are stamped with.
+    """
+
+    def __init__(self, max_tracked: int = 1000, max_daily_samples: int = 10000) -> None:
+        """Initialize the tracker.
+
+        Args:
+            max_tracked: Gifts kept in flight; the oldest are forgotten first
+            max_daily_samples: End-to-end samples kept for the daily report
+        """
+        self.max_tracked = max_tracked
+        self.max_daily_samples = max_daily_samples
+
+        self._gifts: OrderedDict[int, dict[str, float]] = OrderedDict()
+        self._date = _utc_today()
+        self._samples: list[float] = []
+
+    def mark(self, gift_id: int, stage: str, at: float | None = None) -> None:
+        """Record that a gift reached a stage.
+
+        Args:
+            gift_id: Gift ID
+            stage: One of STAGES
+            at: perf_counter() timestamp (defaults to now)
+        """
+        at = time.perf_counter() if at is None else at
+
+        stages = self._gifts.get(gift_id)
+        if stages is None:
+            if stage == CONFIRMED:
+                return
+            stages = self._gifts[gift_id] = {}
+            if len(self._gifts) > self.max_tracked:
+                self._gifts.popitem(last=False)
+        elif stage in stages:
+            return
+
+        previous = [stages[s] for s in STAGES[:STAGES.index(stage)] if s in stages]
+        if previous:
+            DROP_STAGE_LATENCY.labels(stage=stage).observe(max(at - previous[-1], 0.0))
+        stages[stage] = at
+
+        if stage == CONFIRMED and FIRST_SEEN in stages:
+            total = max(at - stages[FIRST_SEEN], 0.0)
+            DROP_LATENCY.observe(total)
+            self._record_sample(total)
+
+    def summary(self) -> DropLatencySummary | None:
+        """Today's first-seen to confirmed latency, or None without drops."""
+        self._roll_over()
+        if not self._samples:
+            return None
+
+        samples = sorted(self._samples)
+        return DropLatencySummary(
+            date=self._date,
+            count=len(samples),
+            p50=_quantile(samples, 0.5),
+            p95=_quantile(samples, 0.95),
+            max=samples[-1],
+        )
+
+    def _record_sample(self, seconds: float) -> None:
+        """Keep an end-to-end sample for today's report."""
+        self._roll_over()
+        if len(self._samples) < self.max_daily_samples:
+            self._samples.append(seconds)
+
+    def _roll_over(self) -> None:
+        """Start a new report after midnight UTC."""
+        today = _utc_today()
+        if today != self._date:
+            self._date = today
+            self._samples = []
+
+
+def _utc_today() -> str:
+    """Today's date (UTC), as used by DailyStats."""
+    return datetime.utcnow().strftime("%Y-%m-%d")
+
+
+def _quantile(samples: list[float], q: float) -> float:
+    """Nearest-rank quantile of sorted samples."""
+    return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+
+# Shared tracker for the monitor and purchase engine
+drop_latency = DropLatencyTracker()
@@ -0,0 +1,135 @@
+"""Event loop lag, task count and stall attribution."""
+import asyncio
+import os
+import sys
+import threading
+import time
+from types import FrameType
+
+from .logging import get_logger
+from .metrics import ACTIVE_TASKS, LOOP_LAG, LOOP_STALL_SECONDS, LOOP_STALLS
+from .profiling import collapse
+
+logger = get_logger(__name__)
+
+# Frames under this directory are ours; a stall is attributed to the innermost one
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def stall_site(frame: FrameType | None) -> str:
+    """Where a stalled loop is stuck, as "module.py:function".
+
+    The innermost project frame is preferred over library frames, so a
+    blocking call into logging or sqlite3 is charged to the code that
+    made it.
+
+    Args:
+        frame: Innermost frame of the loop thread
+
+    Returns:
+        Site of the stall ("unknown" without a frame)
+    """
+    innermost = frame
+    while frame is not None:
+        if frame.f_code.co_filename.startswith(_PROJECT_ROOT) and "site-packages" not in frame.f_code.co_filename:
+            innermost = frame
+            break
+        frame = frame.f_back
+    if innermost is None:
+        return "unknown"
+    return f"{os.path.basename(innermost.f_code.co_filename)}:{innermost.f_code.co_name}"
+
+
+class LoopMonitor:
+    """Measures how late the event loop runs its callbacks.
+
+    A probe task sleeps for interval and records how much later than
+    that it woke up; that delay is the time any ready callback waits
+    for the loop. A watchdog thread checks the probe's deadline and,
+    once the loop is stall_threshold late, captures the loop thread's
+    stack while it is still stuck. When the probe wakes, the stall is
+    counted and logged against the innermost project frame of that
+    stack, with its full duration.
+    """
+
+    def __init__(self, interval: float = 0.01, stall_threshold: float = 0.1, task_interval: float = 1.0) -> None:
+        """Initialize the monitor.
+
+        Args:
+            interval: Seconds between probes
+            stall_threshold: Lag at which the loop's stack is captured
+            task_interval: Seconds between task counts
+        """
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.task_interval = task_interval
+
+        self._deadline = float("inf")
+        self._capture: tuple[str, str] | None = None
+        self._thread_id = 0
+        self._probe: asyncio.Task[None] | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """Start the probe and the watchdog on the running loop."""
+        if self._probe is not None:
+            return
+        self._thread_id = threading.get_ident()
+        self._stopped.clear()
+        self._probe = asyncio.create_task(self._run(), name="loop-monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop the probe and the watchdog."""
+        self._stopped.set()
+        if self._probe is not None:
+            self._probe.cancel()
+            await asyncio.gather(self._probe, return_exceptions=True)
+            self._probe = None
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+            self._watchdog = None
+
+    async def _run(self) -> None:
+        """Probe loop: sleep, measure the overshoot, report stalls."""
+        next_count = 0.0
+        while True:
+            start = time.monotonic()
+            self._deadline = start + self.interval
+            await asyncio.sleep(self.interval)
+
+            now = time.monotonic()
+            self._deadline = float("inf")
+            lag = max(now - start - self.interval, 0.0)
+            LOOP_LAG.observe(lag)
+
+            capture, self._capture = self._capture, None
+            if capture is not None:
+                self._report(lag, *capture)
+
+            if now >= next_count:
+                ACTIVE_TASKS.set(len(asyncio.all_tasks()))
+                next_count = now + self.task_interval
+
+    def _report(self, lag: float, site: str, stack: str) -> None:
+        """Count and log a stall."""
+        LOOP_STALLS.labels(site=site).inc()
+        LOOP_STALL_SECONDS.labels(site=site).inc(lag)
+        logger.warning("event_loop_stall", lag_seconds=round(lag, 4), site=site, stack=stack)
+
+    def _watch(self) -> None:
+        """Watchdog thread: capture the loop's stack once it is late enough."""
+        check = min(self.stall_threshold / 2, 0.05)
+        while not self._stopped.wait(check):
+            deadline = self._deadline
+            if self._capture is not None or time.monotonic() - deadline < self.stall_threshold:
+                continue
+
+            frame = sys._current_frames().get(self._thread_id)
+            capture = (stall_site(frame), collapse(frame))
+            del frame
+            # The loop may have caught up while the stack was read
+            if self._deadline == deadline:
+                self._capture = capture
@@ -0,0 +1,224 @@
+"""Memory usage gauges, a soft memory guard and tracemalloc diffs."""
+import asyncio
+import gc
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from .logging import get_logger
+from .metrics import (
+    MEMORY_LIMIT,
+    MEMORY_SHEDDING,
+    MEMORY_USAGE_RATIO,
+    PYTHON_ALLOCATED_BLOCKS,
+    TRACEMALLOC_BYTES,
+)
+from .profiling import PROFILE_DIR, write_artifact
+
+logger = get_logger(__name__)
+
+# cgroup v2, then v1
+_CGROUP_LIMIT_FILES = ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes")
+
+
+def rss_bytes() -> int | None:
+    """Resident set size of this process, or None where /proc is missing."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def cgroup_memory_limit() -> int | None:
+    """Memory limit of the container, or None if it is unlimited."""
+    for path in _CGROUP_LIMIT_FILES:
+        try:
+            with open(path, encoding="ascii") as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        # v2 reports "max", v1 a page-rounded huge number
+        if value == "max" or int(value) >= 1 << 60:
+            return None
+        return int(value)
+    return None
+
+
+class MemoryGuard:
+    """Watches RSS against the memory limit and sheds optional work near it.
+
+    Every interval the guard reads RSS and publishes usage gauges. Above
+    soft_ratio of the limit it turns shedding on: informational
+    notifications, sell-out history and new traces are skipped, and a
+    garbage collection is run. Shedding turns off again below
+    resume_ratio, so it does not flap around the threshold. Purchases
+    are never shed. Without a known limit the guard only publishes
+    gauges.
+    """
+
+    def __init__(
+        self,
+        limit_bytes: int | None = None,
+        soft_ratio: float = 0.85,
+        resume_ratio: float = 0.75,
+        interval: float = 5.0,
+    ) -> None:
+        """Initialize the guard.
+
+        Args:
+            limit_bytes: Memory limit (None for no limit)
+            soft_ratio: Fraction of the limit at which shedding starts
+            resume_ratio: Fraction of the limit below which shedding stops
+            interval: Seconds between checks
+        """
+        self.limit_bytes = limit_bytes
+        self.soft_ratio = soft_ratio
+        self.resume_ratio = resume_ratio
+        self.interval = interval
+
+        self.shedding = False
+        self._task: asyncio.Task[None] | None = None
+
+    def configure(
+        self,
+        limit_bytes: int | None,
+        soft_ratio: float = 0.85,
+        resume_ratio: float = 0.75,
+        interval: float = 5.0,
+    ) -> None:
+        """Replace the limit and thresholds (see __init__)."""
+        self.limit_bytes = limit_bytes
+        self.soft_ratio = soft_ratio
+        self.resume_ratio = resume_ratio
+        self.interval = interval
+        MEMORY_LIMIT.set(limit_bytes or 0)
+
+    def check(self, rss: int | None = None) -> float | None:
+        """Publish memory gauges and update the shedding state.
+
+        Args:
+            rss: Resident set size (read from /proc by default)
+
+        Returns:
+            RSS as a fraction of the limit, or None without a limit
+        """
+        PYTHON_ALLOCATED_BLOCKS.set(sys.getallocatedblocks())
+        if tracemalloc.is_tracing():
+            TRACEMALLOC_BYTES.set(tracemalloc.get_traced_memory()[0])
+
+        rss = rss_bytes() if rss is None else rss
+        if rss is None or not self.limit_bytes:
+            return None
+
+        ratio = rss / self.limit_bytes
+        MEMORY_USAGE_RATIO.set(ratio)
+
+        if not self.shedding and ratio >= self.soft_ratio:
+            self.shedding = True
+            MEMORY_SHEDDING.set(1)
+            logger.warning("memory_pressure_shedding", rss_bytes=rss, limit_bytes=self.limit_bytes)
+            gc.collect()
+        elif self.shedding and ratio < self.resume_ratio:
+            self.shedding = False
+            MEMORY_SHEDDING.set(0)
+            logger.info("memory_pressure_cleared", rss_bytes=rss, limit_bytes=self.limit_bytes)
+        return ratio
+
+    def start(self) -> None:
+        """Start checking in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="memory-guard")
+
+    async def stop(self) -> None:
+        """Stop checking."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        """Check every interval."""
+        while True:
+            self.check()
+            await asyncio.sleep(self.interval)
+
+
+class MemoryProfiler:
+    """Diffs tracemalloc snapshots between calls.
+
+    The first call starts tracemalloc and takes a baseline; each later
+    call reports the allocation sites that grew most since the previous
+    call and becomes the new baseline. Calling it twice a few minutes
+    apart shows what is accumulating. tracemalloc slows allocations while
+    it runs, so it stays off until the first call and stop() turns it
+    off again.
+    """
+
+    def __init__(self, frames: int = 1, output_dir: Path = PROFILE_DIR) -> None:
+        """Initialize the profiler.
+
+        Args:
+            frames: Stack frames stored per allocation
+            output_dir: Directory diffs are written to
+        """
+        self.frames = frames
+        self.output_dir = output_dir
+
+        self._baseline: tracemalloc.Snapshot | None = None
+        self._started = False
+
+    def stop(self) -> None:
+        """Stop tracing and forget the baseline."""
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+        self._baseline = None
+        TRACEMALLOC_BYTES.set(0)
+
+    async def diff(self, top: int = 25) -> tuple[Path | None, str]:
+        """Report allocation growth since the previous call.
+
+        Args:
+            top: Allocation sites listed
+
+        Returns:
+            Tuple of (file written, report); no file for the first call
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started = True
+            self._baseline = None
+
+        snapshot = _snapshot()
+        baseline, self._baseline = self._baseline, snapshot
+        if baseline is None:
+            current, _ = tracemalloc.get_traced_memory()
+            return None, f"tracemalloc started, baseline taken ({current / 1024:.1f} KiB traced)\n"
+
+        stats = snapshot.compare_to(baseline, "lineno")
+        growth = sum(stat.size_diff for stat in stats)
+        report = (
+            f"total {growth / 1024:+.1f} KiB since previous snapshot\n"
+            + "".join(f"{stat}\n" for stat in stats[:top])
+        )
+
+        path = self.output_dir / f"memory-{datetime.utcnow():%Y%m%dT%H%M%S%f}.txt"
+        await asyncio.to_thread(write_artifact, path, report)
+        logger.info("memory_diff_written", path=str(path), growth_bytes=growth)
+        return path, report
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    """Snapshot without tracemalloc's and the import system's own allocations."""
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    ))
+
+
+# Shared guard; consulted by optional work before it runs
+memory_guard = MemoryGuard()
@@ -1,7 +1,110 @@
 """Prometheus metrics for monitoring."""
-from prometheus_client import Counter, Gauge, Histogram, start_http_server, REGISTRY
+from collections.abc import Iterable
+from typing import Any
+
+from prometheus_client import Counter, Gauge, Histogram
 from prometheus_client.core import CollectorRegistry
 
+# Reported instead of label values beyond a guard's limit
+OTHER_LABEL = "other"
+
+
+class LabelGuard:
+    """Bounds the distinct values of one metric label.
+
+    Allow-listed values always keep their own series. Other values are
+    admitted first come, first served until limit of them are in use;
+    later ones are reported as "other". Admitted values are never
+    evicted, since moving a counter to another series breaks its rate.
+    """
+
+    def __init__(self, limit: int = 20, allow: Iterable[Any] = ()) -> None:
+        """Initialize the guard.
+
+        Args:
+            limit: Distinct values admitted besides the allow-list
+            allow: Values that are always kept
+        """
+        self.limit = limit
+        self.allow = {str(value) for value in allow}
+        self._admitted: set[str] = set()
+
+    def __call__(self, value: Any) -> str | None:
+        """Label value to report, or None if it folds into "other"."""
+        value = str(value)
+        if value in self.allow or value in self._admitted:
+            return value
+        if len(self._admitted) < self.limit:
+            self._admitted.add(value)
+            return value
+        return None
+
+
+class GuardedMetric:
+    """A labeled metric whose open-ended labels pass through LabelGuards.
+
+    Drop-in for the wrapped metric's labels(); unguarded labels pass
+    unchanged. The number of label combinations in use is exported as
+    gift_hunter_metric_series.
+    """
+
+    def __init__(self, name: str, metric: Any, **guards: LabelGuard) -> None:
+        """Initialize the guarded metric.
+
+        Args:
+            name: Metric name for the series and folding metrics
+            metric: Labeled Counter, Gauge or Histogram
+            **guards: Guard per label name
+        """
+        self.name = name
+        self.metric = metric
+        self.guards = guards
+        self._series: set[tuple[str, ...]] = set()
+
+    def labels(self, **labels: Any) -> Any:
+        """Child metric for the labels, with guarded values folded."""
+        values = {}
+        for label, value in labels.items():
+            guard = self.guards.get(label)
+            if guard is None:
+                values[label] = str(value)
+                continue
+            kept = guard(value)
+            if kept is None:
+                LABELS_FOLDED.labels(metric=self.name, label=label).inc()
+                kept = OTHER_LABEL
+            values[label] = kept
+
+        key = tuple(values.values())
+        if key not in self._series:
+            self._series.add(key)
+            METRIC_SERIES.labels(metric=self.name).set(len(self._series))
+        return self.metric.labels(**values)
+
+
+_GUARDED: list[GuardedMetric] = []
+
+
+def guarded(name: str, metric: Any, *labels: str) -> GuardedMetric:
+    """Wrap a metric so the given labels have bounded cardinality."""
+    wrapper = GuardedMetric(name, metric, **{label: LabelGuard() for label in labels})
+    _GUARDED.append(wrapper)
+    return wrapper
+
+
+def configure_label_guards(limit: int, allow: dict[str, list[Any]] | None = None) -> None:
+    """Apply the configured limit and allow-lists to every guarded label.
+
+    Args:
+        limit: Distinct values admitted per label besides the allow-list
+        allow: Always-kept values per label name
+    """
+    for wrapper in _GUARDED:
+        for label, guard in wrapper.guards.items():
+            guard.limit = limit
+            guard.allow = {str(value) for value in (allow or {}).get(label, ())}
+
+
 # ============================================
 # Counters (monotonically increasing)
 # ============================================
@@ -11,10 +114,16 @@ GIFTS_CHECKED = Counter(
     "Total number of gifts checked",
 )
 
-GIFTS_PURCHASED = Counter(
+# Per-gift and per-recipient totals live in the purchase_rollup table
+GIFTS_PURCHASED = guarded(
     "gift_hunter_gifts_purchased_total",
-    "Total number of gifts purchased",
-    ["gift_name", "recipient"],
+    Counter(
+        "gift_hunter_gifts_purchased_total",
+        "Total number of gifts purchased",
+        ["gift_name", "recipient"],
+    ),
+    "gift_name",
+    "recipient",
 )
 
 PURCHASES_FAILED = Counter(
@@ -29,6 +138,126 @@ API_REQUESTS = Counter(
     ["method"],
 )
 
+JOURNAL_DEAD_LETTERS = Counter(
+    "gift_hunter_journal_dead_letters_total",
+    "Journaled purchases given up on after repeated write failures",
+)
+
+SNAPSHOTS_DROPPED = Counter(
+    "gift_hunter_snapshots_dropped_total",
+    "Catalog snapshots discarded before processing",
+    ["reason"],
+)
+
+PUSH_SIGNALS = Counter(
+    "gift_hunter_push_signals_total",
+    "Telegram updates that triggered an immediate catalog fetch",
+    ["source"],
+)
+
+HEDGED_REQUESTS = Counter(
+    "gift_hunter_hedged_requests_total",
+    "Requests re-sent on the backup session after the hedge delay",
+    ["method"],
+)
+
+HEDGE_WINS = Counter(
+    "gift_hunter_hedge_wins_total",
+    "Hedged requests answered first by the backup session",
+    ["method"],
+)
+
+PAYMENT_FORMS = Counter(
+    "gift_hunter_payment_forms_total",
+    "Prepared payment form lookups at purchase time",
+    ["result"],
+)
+
+SEND_ERRORS = guarded(
+    "gift_hunter_send_errors_total",
+    Counter(
+        "gift_hunter_send_errors_total",
+        "Failed purchase requests by Telegram error and verdict",
+        ["error", "verdict"],
+    ),
+    "error",
+)
+
+BREAKER_TRIPS = Counter(
+    "gift_hunter_circuit_breaker_trips_total",
+    "Circuit breakers opened by terminal errors",
+    ["scope"],
+)
+
+NOTIFICATIONS_SENT = Counter(
+    "gift_hunter_notifications_sent_total",
+    "Notification messages delivered to the channel",
+    ["kind"],
+)
+
+RECONNECTS = Counter(
+    "gift_hunter_telegram_reconnects_total",
+    "Reconnects performed after a failed keep-alive ping",
+)
+
+RPC_ERRORS = guarded(
+    "gift_hunter_rpc_errors_total",
+    Counter(
+        "gift_hunter_rpc_errors_total",
+        "Failed Telegram RPCs by method, account, error code and error ID",
+        ["method", "account", "code", "error"],
+    ),
+    "error",
+)
+
+FLOOD_WAIT_SECONDS = Counter(
+    "gift_hunter_flood_wait_seconds_total",
+    "Seconds of FloodWait imposed by Telegram, by method and account",
+    ["method", "account"],
+)
+
+SPANS_EXPORTED = Counter(
+    "gift_hunter_spans_exported_total",
+    "Trace spans written to the span file",
+)
+
+SPANS_DROPPED = Counter(
+    "gift_hunter_spans_dropped_total",
+    "Trace spans dropped because the export queue was full or the write failed",
+)
+
+LOOP_STALLS = guarded(
+    "gift_hunter_event_loop_stalls_total",
+    Counter(
+        "gift_hunter_event_loop_stalls_total",
+        "Event loop stalls beyond the threshold, by the code that held the loop",
+        ["site"],
+    ),
+    "site",
+)
+
+LOOP_STALL_SECONDS = guarded(
+    "gift_hunter_event_loop_stall_seconds_total",
+    Counter(
+        "gift_hunter_event_loop_stall_seconds_total",
+        "Seconds the event loop was stalled, by the code that held the loop",
+        ["site"],
+    ),
+    "site",
+)
+
+WORK_SHED = Counter(
+    "gift_hunter_work_shed_total",
+    "Optional work skipped under memory pressure, by kind",
+    ["kind"],
+)
+
+LABELS_FOLDED = Counter(
+    "gift_hunter_metric_labels_folded_total",
+    "Label values reported as \"other\" by a cardinality guard",
+    ["metric", "label"],
+)
+
 # ============================================
 # Gauges (can go up and down)
 # ============================================
@@ -48,6 +277,53 @@ GIFTS_AVAILABLE = Gauge(
     "Number of gifts currently available for purchase",
 )
 
+JOURNAL_QUEUE_DEPTH = Gauge(
+    "gift_hunter_journal_queue_depth",
+    "Purchases waiting in the write-behind journal",
+)
+
+NOTIFICATION_QUEUE_DEPTH = Gauge(
+    "gift_hunter_notification_queue_depth",
+    "Notifications waiting in the outbox",
+)
+
+METRIC_SERIES = Gauge(
+    "gift_hunter_metric_series",
+    "Label combinations in use by a cardinality-guarded metric",
+    ["metric"],
+)
+
+ACTIVE_TASKS = Gauge(
+    "gift_hunter_event_loop_tasks",
+    "Tasks alive on the event loop",
+)
+
+# Process RSS is exported by the default process collector (process_resident_memory_bytes)
+MEMORY_LIMIT = Gauge(
+    "gift_hunter_memory_limit_bytes",
+    "Memory limit the memory guard works against (0 = none)",
+)
+
+MEMORY_USAGE_RATIO = Gauge(
+    "gift_hunter_memory_usage_ratio",
+    "Process RSS as a fraction of the memory limit",
+)
+
+MEMORY_SHEDDING = Gauge(
+    "gift_hunter_memory_shedding",
+    "Whether optional work is being shed under memory pressure (1 = yes)",
+)
+
+PYTHON_ALLOCATED_BLOCKS = Gauge(
+    "gift_hunter_python_allocated_blocks",
+    "Memory blocks currently allocated by the Python allocator",
+)
+
+TRACEMALLOC_BYTES = Gauge(
+    "gift_hunter_tracemalloc_traced_bytes",
+    "Memory traced by tracemalloc while a memory diff session is active",
+)
+
 # ============================================
 # Histograms (distributions)
 # ============================================
@@ -64,14 +340,55 @@ CHECK_CYCLE_DURATION = Histogram(
     buckets=[1.0, 2.5, 5.0, 10.0, 30.0, 60.0],
 )
 
+JOURNAL_FLUSH_DURATION = Histogram(
+    "gift_hunter_journal_flush_duration_seconds",
+    "Time taken to flush a batch of journaled purchases",
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0],
+)
 
-def start_metrics_server(port: int = 9090) -> None:
-    """Start the Prometheus metrics HTTP server.
-    
-    Args:
-        port: Port to expose metrics on (default: 9090)
-    """
-    start_http_server(port)
+PIPELINE_LAG = Histogram(
+    "gift_hunter_pipeline_lag_seconds",
+    "Time a catalog snapshot waits between the fetch and process stages",
+    buckets=[0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0],
+)
+
+CATALOG_FETCH_DURATION = Histogram(
+    "gift_hunter_catalog_fetch_duration_seconds",
+    "Time until a catalog fetch is answered, hedged or not",
+    buckets=[0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.5, 5.0],
+)
+
+RPC_DURATION = Histogram(
+    "gift_hunter_rpc_duration_seconds",
+    "Telegram RPC round-trip time by method and account",
+    ["method", "account"],
+    buckets=[0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0],
+)
+
+DROP_STAGE_LATENCY = Histogram(
+    "gift_hunter_drop_stage_latency_seconds",
+    "Time a gift drop takes to reach a stage from the previous one",
+    ["stage"],
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0],
+)
+
+DROP_LATENCY = Histogram(
+    "gift_hunter_drop_latency_seconds",
+    "Time from first seeing a gift in the catalog to its first paid send",
+    buckets=[0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 30.0],
+)
+
+RECONNECT_DURATION = Histogram(
+    "gift_hunter_telegram_reconnect_duration_seconds",
+    "Time from detecting a dead connection to being warm again",
+    buckets=[0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0],
+)
+
+LOOP_LAG = Histogram(
+    "gift_hunter_event_loop_lag_seconds",
+    "How late the event loop ran a scheduled callback",
+    buckets=[0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5],
+)
 
 
 def reset_metrics() -> None:
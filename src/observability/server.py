@@ -0,0 +1,236 @@
+"""HTTP endpoint for health checks and Prometheus metrics."""
+import asyncio
+import json
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+from urllib.parse import parse_qs
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+from prometheus_client.registry import CollectorRegistry
+
+from .health import get_health_snapshot, uptime_seconds
+from .logging import get_logger
+from .memory import MemoryProfiler
+from .profiling import ProfileBusyError, StackSampler
+
+logger = get_logger(__name__)
+
+_JSON = "application/json"
+_TEXT = "text/plain; charset=utf-8"
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    409: "Conflict",
+    503: "Service Unavailable",
+}
+
+
+class ObservabilityServer:
+    """Serves /health, /health/live, /health/ready and /metrics.
+
+    With a profiler, /debug/profile?seconds=N also samples the event loop
+    for N seconds and answers with the collapsed stacks. With a memory
+    profiler, /debug/memory?top=N diffs tracemalloc snapshots between
+    calls and /debug/memory?stop=1 turns tracemalloc off.
+
+    Runs on the application's event loop instead of in server threads,
+    so probes read the same health snapshot the application published
+    and never hold the GIL against the hot loop. Each request is parsed,
+    answered and closed; the Prometheus exposition is rendered at most
+    once per metrics_cache_seconds however often it is scraped.
+    """
+
+    def __init__(
+        self,
+        host: str = "0.0.0.0",
+        port: int = 8080,
+        metrics_cache_seconds: float = 1.0,
+        registry: CollectorRegistry = REGISTRY,
+        read_timeout: float = 5.0,
+        profiler: StackSampler | None = None,
+        memory_profiler: MemoryProfiler | None = None,
+    ) -> None:
+        """Initialize the server.
+
+        Args:
+            host: Interface to listen on
+            port: Port to listen on
+            metrics_cache_seconds: How long a rendered exposition is reused
+            registry: Prometheus registry to expose
+            read_timeout: Seconds a client has to send its request
+            profiler: Sampler behind /debug/profile (None to disable the route)
+            memory_profiler: Profiler behind /debug/memory (None to disable the route)
+        """
+        self.host = host
+        self.port = port
+        self.metrics_cache_seconds = metrics_cache_seconds
+        self.registry = registry
+        self.read_timeout = read_timeout
+        self.profiler = profiler
+        self.memory_profiler = memory_profiler
+
+        self._server: asyncio.AbstractServer | None = None
+        self._metrics_body = b""
+        self._metrics_rendered_at = float("-inf")
+        self._routes = {
+            "/health": self._health,
+            "/health/live": self._liveness,
+            "/health/ready": self._readiness,
+            "/metrics": self._metrics,
+        }
+        # Slow routes that take query parameters; GET only
+        self._debug_routes: dict[str, Callable[[dict[str, list[str]]], Awaitable[tuple[int, str, bytes]]]] = {}
+        if profiler is not None:
+            self._debug_routes["/debug/profile"] = self._profile
+        if memory_profiler is not None:
+            self._debug_routes["/debug/memory"] = self._memory
+
+    async def start(self) -> None:
+        """Start listening."""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        if self.port == 0:
+            self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """Stop listening."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer one request and close the connection."""
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), self.read_timeout)
+            while True:
+                # Headers are not needed, only consumed
+                line = await asyncio.wait_for(reader.readline(), self.read_timeout)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+
+            status, content_type, body, head_only = await self._respond(request_line)
+            writer.write(
+                f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Cache-Control: no-cache\r\n"
+                "Connection: close\r\n\r\n".encode()
+            )
+            if not head_only:
+                writer.write(body)
+            await writer.drain()
+        except (TimeoutError, ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        except Exception as e:
+            logger.warning("observability_request_failed", error=str(e))
+        finally:
+            writer.close()
+
+    async def _respond(self, request_line: bytes) -> tuple[int, str, bytes, bool]:
+        """Route a request line to (status, content type, body, head only)."""
+        parts = request_line.decode("latin-1").split()
+        if len(parts) != 3:
+            return (400, _JSON, _json({"error": "bad request"}), False)
+
+        method, target, _ = parts
+        if method not in ("GET", "HEAD"):
+            return (405, _JSON, _json({"error": "method not allowed"}), False)
+
+        path, _, query = target.partition("?")
+        debug_route = self._debug_routes.get(path)
+        if debug_route is not None and method == "GET":
+            return (*await debug_route(parse_qs(query)), False)
+
+        route = self._routes.get(path)
+        if route is None:
+            return (404, _JSON, _json({"error": "not found"}), method == "HEAD")
+        return (*route(), method == "HEAD")
+
+    def _health(self) -> tuple[int, str, bytes]:
+        """Full health status."""
+        snapshot = get_health_snapshot()
+        body = _json({**snapshot._asdict(), "uptime_seconds": uptime_seconds()})
+        return (200 if snapshot.status == "healthy" else 503, _JSON, body)
+
+    def _liveness(self) -> tuple[int, str, bytes]:
+        """Kubernetes liveness probe - is the process alive?"""
+        return (200, _JSON, b'{"alive":true}')
+
+    def _readiness(self) -> tuple[int, str, bytes]:
+        """Kubernetes readiness probe - is the service ready to accept traffic?"""
+        ready = get_health_snapshot().ready
+        return (200 if ready else 503, _JSON, b'{"ready":true}' if ready else b'{"ready":false}')
+
+    async def _profile(self, query: dict[str, list[str]]) -> tuple[int, str, bytes]:
+        """CPU profile of the event loop over the requested seconds."""
+        try:
+            seconds = float(query.get("seconds", ["10"])[0])
+        except ValueError:
+            seconds = 0.0
+        if not 0 < seconds <= self.profiler.max_seconds:
+            return (400, _JSON, _json({"error": f"seconds must be in (0, {self.profiler.max_seconds:g}]"}))
+
+        try:
+            _, stacks = await self.profiler.profile(seconds)
+        except ProfileBusyError:
+            return (409, _JSON, _json({"error": "a profile is already running"}))
+        return (200, _TEXT, stacks.encode())
+
+    async def _memory(self, query: dict[str, list[str]]) -> tuple[int, str, bytes]:
+        """Allocation growth since the previous call, or stop tracing."""
+        if query.get("stop", ["0"])[0] not in ("0", ""):
+            self.memory_profiler.stop()
+            return (200, _TEXT, b"tracemalloc stopped\n")
+
+        try:
+            top = int(query.get("top", ["25"])[0])
+        except ValueError:
+            top = 0
+        if not 0 < top <= 500:
+            return (400, _JSON, _json({"error": "top must be in (0, 500]"}))
+
+        _, report = await self.memory_profiler.diff(top)
+        return (200, _TEXT, report.encode())
+
+    def _metrics(self) -> tuple[int, str, bytes]:
+        """Prometheus exposition, reused for metrics_cache_seconds."""
+        now = time.monotonic()
+        if now - self._metrics_rendered_at >= self.metrics_cache_seconds:
+            self._metrics_body = generate_latest(self.registry)
+            self._metrics_rendered_at = now
+        return (200, CONTENT_TYPE_LATEST, self._metrics_body)
+
+
+def _json(data: dict[str, Any]) -> bytes:
+    """Compact JSON body."""
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+async def start_observability_server(
+    port: int = 8080,
+    metrics_cache_seconds: float = 1.0,
+    profiler: StackSampler | None = None,
+    memory_profiler: MemoryProfiler | None = None,
+) -> ObservabilityServer:
+    """Start the health and metrics endpoint on the running event loop.
+
+    Args:
+        port: Port to listen on (default: 8080)
+        metrics_cache_seconds: How long a rendered exposition is reused
+        profiler: Sampler behind /debug/profile (None to disable the route)
+        memory_profiler: Profiler behind /debug/memory (None to disable the route)
+
+    Returns:
+        The running server
+    """
+    server = ObservabilityServer(
+        port=port,
+        metrics_cache_seconds=metrics_cache_seconds,
+        profiler=profiler,
+        memory_profiler=memory_profiler,
+    )
+    await server.start()
+    return server
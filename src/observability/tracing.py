@@ -0,0 +1,391 @@
+"""Sampled span tracing exported as OTLP JSON lines."""
+import asyncio
+import functools
+import json
+import os
+import random
+import time
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
+from typing import Any, TypeVar
+
+from .logging import get_logger
+from .memory import memory_guard
+from .metrics import SPANS_DROPPED, SPANS_EXPORTED, WORK_SHED
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# OTLP span kinds
+INTERNAL = 1
+CLIENT = 3
+
+# OTLP status codes
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+
+class Span:
+    """One timed operation of a trace.
+
+    Used as a context manager: entering makes the span current for the
+    running task (and every task created inside it), leaving ends it and
+    hands it to the exporter. An exception leaving the span marks it
+    failed; cancellation does not.
+    """
+
+    __slots__ = (
+        "tracer", "name", "kind", "trace_id", "span_id", "parent_id",
+        "attributes", "start_ns", "end_ns", "status", "message", "_token",
+    )
+
+    sampled = True
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        trace_id: int,
+        parent_id: int | None,
+        kind: int,
+        attributes: dict[str, Any],
+    ) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = random.getrandbits(64) or 1
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.status = STATUS_UNSET
+        self.message = ""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Attach a str, int, float or bool attribute."""
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type: Any, exc: BaseException | None, tb: Any) -> None:
+        _current.reset(self._token)
+        if exc is not None and not isinstance(exc, asyncio.CancelledError):
+            self.status = STATUS_ERROR
+            self.message = f"{exc_type.__name__}: {exc}"
+        self.end_ns = time.time_ns()
+        self.tracer.exporter.export(self)
+
+    def to_otlp(self) -> dict[str, Any]:
+        """The span in OTLP/JSON encoding."""
+        span: dict[str, Any] = {
+            "traceId": f"{self.trace_id:032x}",
+            "spanId": f"{self.span_id:016x}",
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": {"code": self.status, "message": self.message} if self.status else {},
+        }
+        if self.parent_id is not None:
+            span["parentSpanId"] = f"{self.parent_id:016x}"
+        return span
+
+
+class _NonRecordingSpan:
+    """Stands in for a span that is not sampled.
+
+    Becoming current keeps the spans under it unsampled as well, so a
+    trace is either recorded whole or not at all.
+    """
+
+    __slots__ = ("_token",)
+
+    sampled = False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NonRecordingSpan":
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type: Any, exc: BaseException | None, tb: Any) -> None:
+        _current.reset(self._token)
+
+
+class _NoopSpan:
+    """Span outside any trace; entering and leaving it does nothing."""
+
+    sampled = False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: BaseException | None, tb: Any) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+# Span of the running task; copied into tasks created while it is set
+_current: ContextVar[Span | _NonRecordingSpan | None] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Span | _NonRecordingSpan | None:
+    """The span the running task is inside, if any."""
+    return _current.get()
+
+
+class Tracer:
+    """Starts spans and decides which traces are sampled.
+
+    Sampling is decided once per trace, when its root span starts; the
+    rest of the trace follows that decision. No new traces are sampled
+    while memory is being shed. A disabled tracer (the default) hands out
+    no-op spans.
+    """
+
+    def __init__(self, sample_rate: float = 0.0, exporter: "SpanExporter | None" = None) -> None:
+        """Initialize the tracer.
+
+        Args:
+            sample_rate: Fraction of traces recorded (0 disables tracing)
+            exporter: Where finished spans go
+        """
+        self.sample_rate = sample_rate
+        self.exporter = exporter or SpanExporter()
+
+    def span(
+        self,
+        name: str,
+        *,
+        parent: Any = None,
+        new_trace: bool = True,
+        kind: int = INTERNAL,
+        **attributes: Any,
+    ) -> Span | _NonRecordingSpan | _NoopSpan:
+        """Start a span under the current span (or under parent).
+
+        Args:
+            name: Operation name, e.g. "monitor.process"
+            parent: Span to continue instead of the current one, for work
+                handed between tasks through a queue
+            new_trace: Start a new trace when there is no parent; when
+                False the span is only recorded inside an existing trace
+            kind: INTERNAL or CLIENT (an outgoing request)
+            **attributes: Span attributes
+
+        Returns:
+            Span to use as a context manager
+        """
+        if parent is None:
+            parent = _current.get()
+
+        if parent is None:
+            if not new_trace or self.sample_rate <= 0:
+                return _NOOP
+            if self.sample_rate < 1 and random.random() >= self.sample_rate:
+                return _NonRecordingSpan()
+            if memory_guard.shedding:
+                WORK_SHED.labels(kind="trace").inc()
+                return _NonRecordingSpan()
+            return Span(self, name, random.getrandbits(128) or 1, None, kind, attributes)
+
+        if not parent.sampled:
+            return _NOOP if isinstance(parent, _NoopSpan) else _NonRecordingSpan()
+        return Span(self, name, parent.trace_id, parent.span_id, kind, attributes)
+
+
+class SpanExporter:
+    """Exporter that drops every span; the disabled tracer's default."""
+
+    def export(self, span: Span) -> None:
+        pass
+
+    def start(self) -> None:
+        pass
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        pass
+
+
+class JsonlSpanExporter(SpanExporter):
+    """Writes finished spans to a local file, one OTLP export per line.
+
+    Each line is an ExportTraceServiceRequest in OTLP/JSON encoding, the
+    format of the OpenTelemetry Collector file exporter, so the file can
+    be replayed into any OTLP backend. export() only appends to a bounded
+    queue; a writer task hands batches to a thread for the file write, so
+    the event loop never waits on the disk. Spans arriving while the
+    queue is full are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = 1.0,
+        max_queue: int = 10000,
+        max_file_mb: int = 100,
+        service_name: str = "gift-hunter",
+    ) -> None:
+        """Initialize the exporter.
+
+        Args:
+            path: JSONL file to append to
+            flush_interval: Seconds between writes
+            max_queue: Spans held in memory between writes
+            max_file_mb: Size at which the file is rotated to path + ".1"
+            service_name: service.name resource attribute
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.max_file_bytes = max_file_mb * 1024 * 1024
+
+        self._resource = {"attributes": _otlp_attributes({"service.name": service_name})}
+        self._pending: list[Span] = []
+        self._writer: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def export(self, span: Span) -> None:
+        """Queue a finished span."""
+        if len(self._pending) >= self.max_queue:
+            SPANS_DROPPED.inc()
+            return
+        self._pending.append(span)
+
+    def start(self) -> None:
+        """Start the writer task."""
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._run(), name="span-exporter")
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Stop the writer and write what is left within a deadline.
+
+        Args:
+            timeout: Seconds allowed for the final write
+        """
+        if self._writer is not None:
+            self._writer.cancel()
+            await asyncio.gather(self._writer, return_exceptions=True)
+            self._writer = None
+
+        try:
+            await asyncio.wait_for(self.flush(), timeout=timeout)
+        except TimeoutError:
+            logger.error("span_export_shutdown_timeout", pending=len(self._pending))
+
+    async def flush(self) -> None:
+        """Write every queued span."""
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        line = json.dumps(
+            {"resourceSpans": [{
+                "resource": self._resource,
+                "scopeSpans": [{"scope": {"name": "gift_hunter"}, "spans": [span.to_otlp() for span in batch]}],
+            }]},
+            separators=(",", ":"),
+        )
+        try:
+            await asyncio.to_thread(self._write, line)
+        except OSError as e:
+            SPANS_DROPPED.inc(len(batch))
+            logger.error("span_export_failed", spans=len(batch), error=str(e))
+            return
+        SPANS_EXPORTED.inc(len(batch))
+
+    def _write(self, line: str) -> None:
+        """Append one line, rotating the file when it is full (worker thread)."""
+        try:
+            if os.path.getsize(self.path) >= self.max_file_bytes:
+                os.replace(self.path, self.path + ".1")
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    async def _run(self) -> None:
+        """Writer loop: write queued spans every flush_interval."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    """Attributes as OTLP key/value pairs."""
+    encoded = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            encoded.append({"key": key, "value": {"boolValue": value}})
+        elif isinstance(value, int):
+            encoded.append({"key": key, "value": {"intValue": str(value)}})
+        elif isinstance(value, float):
+            encoded.append({"key": key, "value": {"doubleValue": value}})
+        else:
+            encoded.append({"key": key, "value": {"stringValue": str(value)}})
+    return encoded
+
+
+def traced(name: str) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Record calls of a coroutine function as spans inside existing traces.
+
+    Args:
+        name: Span name
+
+    Returns:
+        Decorator
+    """
+    def decorate(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            with tracer.span(name, new_trace=False):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def configure_tracing(
+    sample_rate: float,
+    path: str,
+    flush_interval: float = 1.0,
+    max_queue: int = 10000,
+    max_file_mb: int = 100,
+) -> Tracer:
+    """Enable the shared tracer with a JSONL exporter.
+
+    Call start() on the returned tracer's exporter once the event loop runs.
+
+    Args:
+        sample_rate: Fraction of traces recorded
+        path: JSONL file to append to
+        flush_interval: Seconds between writes
+        max_queue: Spans held in memory between writes
+        max_file_mb: Size at which the file is rotated
+
+    Returns:
+        The shared tracer
+    """
+    tracer.exporter = JsonlSpanExporter(
+        path,
+        flush_interval=flush_interval,
+        max_queue=max_queue,
+        max_file_mb=max_file_mb,
+    )
+    tracer.sample_rate = sample_rate
+    return tracer
+
+
+# Shared tracer; disabled until configure_tracing() is called
+tracer = Tracer()
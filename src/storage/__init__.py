@@ -1,5 +1,17 @@
 """Storage layer for data persistence."""
-from .database import init_db, get_session
-from .models import Gift, Purchase
+from .database import configure_engine, get_read_session, get_session, init_db
+from .models import DailyStats, Gift, GiftAvailability, Purchase, PurchaseRollup
+from .stats import stats_buffer
 
-__all__ = ["init_db", "get_session", "Gift", "Purchase"]
+__all__ = [
+    "init_db",
+    "get_session",
+    "get_read_session",
+    "configure_engine",
+    "Gift",
+    "Purchase",
+    "DailyStats",
+    "GiftAvailability",
+    "PurchaseRollup",
+    "stats_buffer",
+]
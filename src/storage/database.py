@@ -1,14 +1,19 @@
 """Async database operations with SQLite."""
 from contextlib import asynccontextmanager
+from datetime import datetime
 from pathlib import Path
 from typing import AsyncGenerator
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
 
+from src.observability.tracing import traced, tracer
+
 from .models import Base
 
 # Database configuration
@@ -16,26 +21,116 @@ DATA_DIR = Path("data")
 DATABASE_PATH = DATA_DIR / "gift_hunter.db"
 DATABASE_URL = f"sqlite+aiosqlite:///{DATABASE_PATH}"
 
-# Create async engine with connection pooling
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=False,  # Set to True for SQL debugging
-    pool_pre_ping=True,
-)
+# Prepared statements kept per connection by sqlite3
+STATEMENT_CACHE_SIZE = 256
 
-# Session factory
-async_session_factory = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autoflush=False,
-)
+
+def _create_engine(
+    url: str,
+    pool_size: int,
+    pragmas: dict[str, str | int],
+) -> AsyncEngine:
+    """Create an engine whose connections apply the given pragmas."""
+    new_engine = create_async_engine(
+        url,
+        echo=False,  # Set to True for SQL debugging
+        pool_size=pool_size,
+        max_overflow=0,
+        connect_args={"cached_statements": STATEMENT_CACHE_SIZE},
+    )
+
+    @event.listens_for(new_engine.sync_engine, "connect")
+    def _apply_pragmas(dbapi_connection, _connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return new_engine
+
+
+def configure_engine(
+    mode: str = "wal",
+    path: Path = DATABASE_PATH,
+    synchronous: str = "NORMAL",
+    cache_size_kib: int = 16384,
+    mmap_size_mb: int = 64,
+    busy_timeout_ms: int = 5000,
+    read_pool_size: int = 4,
+) -> None:
+    """(Re)create the writer and reader engines.
+
+    In "wal" mode all writes go through one serialized connection while
+    reads use a separate pool of query-only connections, so readers never
+    contend with the writer for SQLite's lock. "default" keeps a single
+    plain engine for both. Call close_db() first when reconfiguring a
+    running application.
+
+    Args:
+        mode: Engine profile ("wal" or "default")
+        path: SQLite database file
+        synchronous: PRAGMA synchronous level in WAL mode
+        cache_size_kib: Page cache size per connection in KiB
+        mmap_size_mb: Memory-mapped I/O size in MiB
+        busy_timeout_ms: Time to wait on a locked database
+        read_pool_size: Number of read-only connections
+    """
+    global DATABASE_PATH, engine, read_engine, async_session_factory, read_session_factory
+
+    DATABASE_PATH = path
+    url = f"sqlite+aiosqlite:///{path}"
+
+    if mode == "wal":
+        pragmas: dict[str, str | int] = {
+            "journal_mode": "WAL",
+            "synchronous": synchronous,
+            "cache_size": -cache_size_kib,
+            "mmap_size": mmap_size_mb * 1024 * 1024,
+            "busy_timeout": busy_timeout_ms,
+            "temp_store": "MEMORY",
+        }
+        engine = _create_engine(url, pool_size=1, pragmas=pragmas)
+        read_engine = _create_engine(
+            url,
+            pool_size=read_pool_size,
+            pragmas={**pragmas, "query_only": 1},
+        )
+    elif mode == "default":
+        engine = create_async_engine(
+            url,
+            echo=False,
+            pool_pre_ping=True,
+        )
+        read_engine = engine
+    else:
+        raise ValueError(f"Unknown storage engine mode: {mode}")
+
+    async_session_factory = async_sessionmaker(
+        engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autoflush=False,
+    )
+    read_session_factory = async_sessionmaker(
+        read_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autoflush=False,
+    )
+
+
+engine: AsyncEngine
+read_engine: AsyncEngine
+async_session_factory: async_sessionmaker[AsyncSession]
+read_session_factory: async_sessionmaker[AsyncSession]
+
+configure_engine()
 
 
 async def init_db() -> None:
     """Initialize the database and create all tables."""
     # Ensure data directory exists
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    DATABASE_PATH.parent.mkdir(parents=True, exist_ok=True)
     
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -44,6 +139,8 @@ async def init_db() -> None:
 async def close_db() -> None:
     """Close database connections."""
     await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
 
 
 @asynccontextmanager
@@ -52,7 +149,8 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
     session = async_session_factory()
     try:
         yield session
-        await session.commit()
+        with tracer.span("storage.commit", new_trace=False):
+            await session.commit()
     except Exception:
         await session.rollback()
         raise
@@ -60,6 +158,17 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
         await session.close()
 
 
+@asynccontextmanager
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """Get a session for queries, served by the read-only pool."""
+    session = read_session_factory()
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+@traced("storage.get_or_create_gift")
 async def get_or_create_gift(session: AsyncSession, gift_id: int, **kwargs) -> tuple:
     """Get existing gift or create a new one.
     
@@ -86,6 +195,31 @@ async def get_or_create_gift(session: AsyncSession, gift_id: int, **kwargs) -> t
         return gift, True
 
 
+@traced("storage.upsert_gifts")
+async def upsert_gifts(session: AsyncSession, gifts: list[dict]) -> None:
+    """Insert or update many gifts with one executemany statement.
+
+    Args:
+        session: Database session
+        gifts: Gift column values, each including "id"
+    """
+    from sqlalchemy.dialects.sqlite import insert
+
+    from .models import Gift
+
+    stmt = insert(Gift)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Gift.id],
+        set_={
+            **{column: stmt.excluded[column] for column in gifts[0] if column != "id"},
+            # onupdate defaults are not applied to ON CONFLICT updates
+            "last_checked": datetime.utcnow(),
+        },
+    )
+    await session.execute(stmt, gifts)
+
+
+@traced("storage.record_purchase")
 async def record_purchase(
     session: AsyncSession,
     gift_id: int,
@@ -96,10 +230,18 @@ async def record_purchase(
     is_partial: bool = False,
     recipient_username: str | None = None,
     transaction_id: str | None = None,
+    purchased_at: datetime | None = None,
 ) -> None:
-    """Record a purchase in the database."""
+    """Record a purchase in the database.
+
+    The day's DailyStats and PurchaseRollup rows are updated in the same
+    transaction, so spend tracking and per-gift or per-recipient reports
+    never need to aggregate the purchases table.
+    """
     from .models import Purchase
     
+    purchased_at = purchased_at or datetime.utcnow()
+
     purchase = Purchase(
         gift_id=gift_id,
         gift_name=gift_name,
@@ -110,5 +252,162 @@ async def record_purchase(
         total_cost=price * quantity,
         is_partial=is_partial,
         transaction_id=transaction_id,
+        purchased_at=purchased_at,
     )
     session.add(purchase)
+
+    await upsert_daily_stats(
+        session,
+        date=purchased_at.strftime("%Y-%m-%d"),
+        total_spent=price * quantity,
+        gifts_purchased=quantity,
+    )
+    await upsert_purchase_rollup(
+        session,
+        date=purchased_at.strftime("%Y-%m-%d"),
+        gift_id=gift_id,
+        gift_name=gift_name,
+        recipient_id=recipient_id,
+        gifts_purchased=quantity,
+        total_spent=price * quantity,
+    )
+
+
+@traced("storage.upsert_daily_stats")
+async def upsert_daily_stats(
+    session: AsyncSession,
+    date: str,
+    total_spent: int = 0,
+    gifts_purchased: int = 0,
+    gifts_checked: int = 0,
+    errors_count: int = 0,
+) -> None:
+    """Add increments to a day's DailyStats row, creating it if needed.
+
+    Args:
+        session: Database session
+        date: Day in YYYY-MM-DD format
+        total_spent: Stars spent to add
+        gifts_purchased: Gifts purchased to add
+        gifts_checked: Gifts checked to add
+        errors_count: Errors to add
+    """
+    from sqlalchemy.dialects.sqlite import insert
+
+    from .models import DailyStats
+
+    stmt = insert(DailyStats).values(
+        date=date,
+        total_spent=total_spent,
+        gifts_purchased=gifts_purchased,
+        gifts_checked=gifts_checked,
+        errors_count=errors_count,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyStats.date],
+        set_={
+            "total_spent": DailyStats.total_spent + stmt.excluded.total_spent,
+            "gifts_purchased": DailyStats.gifts_purchased + stmt.excluded.gifts_purchased,
+            "gifts_checked": DailyStats.gifts_checked + stmt.excluded.gifts_checked,
+            "errors_count": DailyStats.errors_count + stmt.excluded.errors_count,
+        },
+    )
+    await session.execute(stmt)
+
+
+@traced("storage.get_daily_stats")
+async def get_daily_stats(session: AsyncSession, date: str):
+    """Get a day's DailyStats row via the unique date index.
+
+    Returns:
+        DailyStats or None if nothing was recorded that day
+    """
+    from sqlalchemy import select
+
+    from .models import DailyStats
+
+    result = await session.execute(select(DailyStats).where(DailyStats.date == date))
+    return result.scalar_one_or_none()
+
+
+@traced("storage.upsert_purchase_rollup")
+async def upsert_purchase_rollup(
+    session: AsyncSession,
+    date: str,
+    gift_id: int,
+    gift_name: str,
+    recipient_id: int,
+    gifts_purchased: int,
+    total_spent: int,
+) -> None:
+    """Add a purchase to its day's per-gift, per-recipient rollup row.
+
+    Args:
+        session: Database session
+        date: Day in YYYY-MM-DD format
+        gift_id: Gift ID
+        gift_name: Gift name
+        recipient_id: Recipient user ID
+        gifts_purchased: Gifts purchased to add
+        total_spent: Stars spent to add
+    """
+    from sqlalchemy.dialects.sqlite import insert
+
+    from .models import PurchaseRollup
+
+    stmt = insert(PurchaseRollup).values(
+        date=date,
+        gift_id=gift_id,
+        recipient_id=recipient_id,
+        gift_name=gift_name,
+        gifts_purchased=gifts_purchased,
+        total_spent=total_spent,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PurchaseRollup.date, PurchaseRollup.gift_id, PurchaseRollup.recipient_id],
+        set_={
+            "gift_name": stmt.excluded.gift_name,
+            "gifts_purchased": PurchaseRollup.gifts_purchased + stmt.excluded.gifts_purchased,
+            "total_spent": PurchaseRollup.total_spent + stmt.excluded.total_spent,
+        },
+    )
+    await session.execute(stmt)
+
+
+@traced("storage.get_purchase_breakdown")
+async def get_purchase_breakdown(
+    session: AsyncSession,
+    since: str,
+    until: str | None = None,
+    by: str = "gift",
+) -> list[tuple[int, int, int]]:
+    """Purchases per gift or per recipient from the daily rollup.
+
+    Args:
+        session: Database session
+        since: First day (YYYY-MM-DD), inclusive
+        until: Last day (YYYY-MM-DD), inclusive; open-ended if None
+        by: "gift" or "recipient"
+
+    Returns:
+        (gift or recipient ID, gifts purchased, stars spent), most spent first
+    """
+    from sqlalchemy import func, select
+
+    from .models import PurchaseRollup
+
+    key = {"gift": PurchaseRollup.gift_id, "recipient": PurchaseRollup.recipient_id}[by]
+    spent = func.sum(PurchaseRollup.total_spent)
+
+    query = (
+        select(key, func.sum(PurchaseRollup.gifts_purchased), spent)
+        .where(PurchaseRollup.date >= since)
+        .group_by(key)
+        .order_by(spent.desc())
+    )
+    if until is not None:
+        query = query.where(PurchaseRollup.date <= until)
+
+    result = await session.execute(query)
+    return [tuple(row) for row in result.all()]
+
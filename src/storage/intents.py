@@ -0,0 +1,152 @@
+"""Append-only purchase intent journal on local disk."""
+import json
+import os
+import time
+import uuid
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+from src.observability import get_logger
+
+logger = get_logger(__name__)
+
+# Intent lifecycle
+INTENT = "intent"        # Decided to buy one unit; nothing sent yet
+SENT = "sent"            # Payment submission may have reached Telegram
+CONFIRMED = "confirmed"  # Telegram confirmed the payment
+FAILED = "failed"        # Definitely not paid
+
+TERMINAL_STATES = frozenset({CONFIRMED, FAILED})
+
+
+def new_intent_id() -> str:
+    """Client-side idempotency key for one purchased unit."""
+    return uuid.uuid4().hex
+
+
+class IntentJournal:
+    """Records every purchase unit's state before acting on it.
+
+    Each transition is one JSON line appended with a single write(), so
+    the log survives a process crash at any point: after a restart the
+    last line per intent tells whether a unit was never sent, may have
+    been paid, or was confirmed. Torn trailing lines are ignored.
+
+    Intents still needed for recovery are also kept in memory. Failed
+    intents are dropped at once and confirmed ones by resolve() once
+    their purchase is in the database; when the log holds compact_after
+    lines of such finished intents it is rewritten with the rest.
+    """
+
+    def __init__(self, path: str | Path, fsync: bool = False, compact_after: int = 1000) -> None:
+        """Initialize the journal.
+
+        Args:
+            path: Log file location
+            fsync: Also fsync each record (survives power loss, slower)
+            compact_after: Lines of finished intents that trigger a compaction
+        """
+        self.path = Path(path)
+        self.fsync = fsync
+        self.compact_after = compact_after
+
+        self._fd: int | None = None
+        # Merged records of intents still needed for recovery
+        self._live: dict[str, dict[str, Any]] = {}
+        self._lines = 0
+        # Compaction only starts once the log of a previous run was folded in
+        self._synced = False
+
+    def record(self, intent_id: str, state: str, **fields: Any) -> None:
+        """Append a state transition.
+
+        Args:
+            intent_id: Idempotency key from new_intent_id()
+            state: New state
+            **fields: Details to store (gift, recipient, form, transaction)
+        """
+        if self._fd is None:
+            self._open()
+
+        entry = {"id": intent_id, "state": state, "ts": time.time(), **fields}
+        os.write(self._fd, (json.dumps(entry, separators=(",", ":")) + "\n").encode())
+        if self.fsync:
+            os.fsync(self._fd)
+
+        self._lines += 1
+        if state == FAILED:
+            self._live.pop(intent_id, None)
+        else:
+            self._live.setdefault(intent_id, {}).update(entry)
+
+    def resolve(self, transaction_ids: Iterable[str]) -> None:
+        """Forget confirmed intents whose purchases are now in the database.
+
+        Compacts the log once it holds compact_after lines of finished
+        intents.
+
+        Args:
+            transaction_ids: Transactions of the persisted purchases
+        """
+        persisted = set(transaction_ids)
+        for intent_id, intent in list(self._live.items()):
+            if intent["state"] == CONFIRMED and intent.get("transaction_id") in persisted:
+                del self._live[intent_id]
+
+        if self._synced and self._lines - len(self._live) >= self.compact_after:
+            self.compact(list(self._live.values()))
+
+    def load(self) -> dict[str, dict[str, Any]]:
+        """Fold the log into the latest record per intent.
+
+        Returns:
+            intent_id -> merged fields of all its transitions
+        """
+        intents: dict[str, dict[str, Any]] = {}
+        if not self.path.exists():
+            return intents
+
+        with self.path.open("r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("intent_journal_torn_line", path=str(self.path))
+                    continue
+                intents.setdefault(entry["id"], {}).update(entry)
+
+        return intents
+
+    def compact(self, keep: Iterable[dict[str, Any]]) -> None:
+        """Rewrite the log with only the given (unresolved) intents.
+
+        Args:
+            keep: Merged intent records to carry over
+        """
+        self.close()
+        keep = list(keep)
+
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as file:
+            for entry in keep:
+                file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.path)
+
+        self._live = {entry["id"]: entry for entry in keep}
+        self._lines = len(keep)
+        self._synced = True
+        logger.debug("intent_journal_compacted", path=str(self.path), kept=len(keep))
+
+    def close(self) -> None:
+        """Close the log file."""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _open(self) -> None:
+        """Open the log for appending, creating it if needed."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
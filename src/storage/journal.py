@@ -0,0 +1,217 @@
+"""Write-behind journal that keeps SQLite off the purchase path."""
+import asyncio
+import contextlib
+import json
+import time
+from collections.abc import Callable
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from src.observability import get_logger
+from src.observability.metrics import (
+    JOURNAL_DEAD_LETTERS,
+    JOURNAL_FLUSH_DURATION,
+    JOURNAL_QUEUE_DEPTH,
+)
+
+from .database import get_session, record_purchase
+
+logger = get_logger(__name__)
+
+
+class PurchaseJournal:
+    """Buffers purchase records in memory and persists them in batches.
+
+    Purchases are appended synchronously right after send_gift succeeds.
+    A single writer task flushes them to SQLite in one transaction once
+    batch_size records are pending or flush_interval has passed. When a
+    batch fails, its records are retried one transaction each, so one
+    bad record cannot hold back the others; a record that has failed
+    max_attempts times is appended to the dead-letter file instead of
+    being queued again. on_flush is called with every group of records
+    that reached the database.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 50,
+        flush_interval: float = 1.0,
+        max_attempts: int = 5,
+        dead_letter_path: str | Path = "data/purchase_dead_letters.jsonl",
+        on_flush: Callable[[list[dict[str, Any]]], None] | None = None,
+    ) -> None:
+        """Initialize the journal.
+
+        Args:
+            batch_size: Pending records that trigger an immediate flush
+            flush_interval: Max seconds a record waits before being flushed
+            max_attempts: Failed writes after which a record is dead-lettered
+            dead_letter_path: JSONL file receiving records that cannot be saved
+            on_flush: Called with records once they are persisted
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.dead_letter_path = Path(dead_letter_path)
+        self.on_flush = on_flush
+
+        self._pending: list[dict[str, Any]] = []
+        # Failed writes per pending record, keyed by id() of the record
+        self._failures: dict[int, int] = {}
+        self._wakeup = asyncio.Event()
+        self._writer: asyncio.Task[None] | None = None
+        self._flush_lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def append(self, **purchase: Any) -> None:
+        """Queue a purchase for persistence (see record_purchase for fields)."""
+        purchase.setdefault("purchased_at", datetime.utcnow())
+        self._pending.append(purchase)
+        JOURNAL_QUEUE_DEPTH.set(len(self._pending))
+
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        """Start the writer task."""
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._run(), name="purchase-journal")
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Stop the writer and flush what is left within a deadline.
+
+        Args:
+            timeout: Seconds allowed for the final flush
+        """
+        if self._writer is not None:
+            self._writer.cancel()
+            await asyncio.gather(self._writer, return_exceptions=True)
+            self._writer = None
+
+        try:
+            await asyncio.wait_for(self.flush(), timeout=timeout)
+        except TimeoutError:
+            logger.error("journal_shutdown_flush_timeout", pending=len(self._pending))
+        except Exception as e:
+            logger.error("journal_shutdown_flush_failed", pending=len(self._pending), error=str(e))
+
+    async def flush(self) -> None:
+        """Persist every pending record, in a single transaction if possible.
+
+        Raises:
+            Exception: If any record failed (it is retried on the next flush
+                or dead-lettered)
+        """
+        async with self._flush_lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return
+
+            start_time = time.perf_counter()
+            try:
+                try:
+                    await self._write(batch)
+                except Exception as e:
+                    logger.warning("journal_batch_failed", records=len(batch), error=str(e))
+                    await self._write_each(batch)
+            except BaseException:
+                # Put the batch back ahead of anything appended meanwhile
+                self._pending[:0] = batch
+                raise
+            finally:
+                JOURNAL_QUEUE_DEPTH.set(len(self._pending))
+
+            for purchase in batch:
+                self._failures.pop(id(purchase), None)
+            self._flushed(batch)
+            JOURNAL_FLUSH_DURATION.observe(time.perf_counter() - start_time)
+            logger.debug("journal_flushed", records=len(batch))
+
+    async def _write(self, records: list[dict[str, Any]]) -> None:
+        """Persist records in one transaction."""
+        async with get_session() as session:
+            for purchase in records:
+                await record_purchase(session=session, **purchase)
+
+    async def _write_each(self, batch: list[dict[str, Any]]) -> None:
+        """Persist records one transaction each, requeueing or dead-lettering failures.
+
+        Records leave the batch as they are dealt with, so if the flush is
+        cancelled only the untried ones are put back.
+
+        Raises:
+            Exception: The last write error, once every record was tried
+        """
+        error: Exception | None = None
+        requeue: list[dict[str, Any]] = []
+        written: list[dict[str, Any]] = []
+        try:
+            while batch:
+                purchase = batch[0]
+                try:
+                    await self._write([purchase])
+                except Exception as e:
+                    error = e
+                    failures = self._failures.pop(id(purchase), 0) + 1
+                    if failures < self.max_attempts:
+                        self._failures[id(purchase)] = failures
+                        requeue.append(purchase)
+                    else:
+                        await self._dead_letter(purchase, e)
+                else:
+                    self._failures.pop(id(purchase), None)
+                    written.append(purchase)
+                del batch[0]
+        finally:
+            self._pending[:0] = requeue
+            self._flushed(written)
+
+        if error is not None:
+            raise error
+
+    def _flushed(self, records: list[dict[str, Any]]) -> None:
+        """Report persisted records to on_flush."""
+        if not records or self.on_flush is None:
+            return
+        try:
+            self.on_flush(records)
+        except Exception as e:
+            logger.error("journal_on_flush_failed", records=len(records), error=str(e))
+
+    async def _dead_letter(self, purchase: dict[str, Any], error: Exception | None) -> None:
+        """Give up on a record: log it and append it to the dead-letter file."""
+        JOURNAL_DEAD_LETTERS.inc()
+        logger.error(
+            "journal_record_dead_lettered",
+            attempts=self.max_attempts,
+            transaction_id=purchase.get("transaction_id"),
+            error=str(error),
+        )
+        line = json.dumps({**purchase, "error": str(error)}, default=str)
+        try:
+            await asyncio.to_thread(_append_line, self.dead_letter_path, line)
+        except OSError as e:
+            logger.error("journal_dead_letter_write_failed", record=line, error=str(e))
+
+    async def _run(self) -> None:
+        """Writer loop: flush on size trigger or interval."""
+        while True:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("journal_flush_failed", pending=len(self._pending), error=str(e))
+                await asyncio.sleep(self.flush_interval)
+
+
+def _append_line(path: Path, line: str) -> None:
+    """Append one line, creating the directory (worker thread)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
@@ -86,6 +86,31 @@ class Purchase(Base):
         )
 
 
+class GiftAvailability(Base):
+    """Sell-out history: available_amount change points per gift.
+
+    Rows are written only when the value changes. Recent rows keep
+    full resolution; older ones are folded into minute and hour buckets
+    keyed by the bucket start, so (gift_id, ts) stays unique.
+    """
+
+    __tablename__ = "gift_availability"
+
+    gift_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    ts: Mapped[int] = mapped_column(Integer, primary_key=True)  # Unix seconds
+    available_amount: Mapped[int] = mapped_column(Integer, nullable=False)
+    resolution: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # Bucket seconds
+
+    # Clustered on (gift_id, ts) so range scans read contiguous pages
+    __table_args__ = ({"sqlite_with_rowid": False},)
+
+    def __repr__(self) -> str:
+        return (
+            f"<GiftAvailability(gift_id={self.gift_id}, ts={self.ts}, "
+            f"available={self.available_amount})>"
+        )
+
+
 class DailyStats(Base):
     """Daily statistics for budget tracking."""
     
@@ -100,3 +125,28 @@ class DailyStats(Base):
     
     def __repr__(self) -> str:
         return f"<DailyStats(date={self.date}, spent={self.total_spent})>"
+
+
+class PurchaseRollup(Base):
+    """Daily purchases per gift and recipient.
+
+    Holds the per-gift and per-recipient breakdown that Prometheus
+    labels cannot carry without unbounded series growth.
+    """
+
+    __tablename__ = "purchase_rollup"
+
+    date: Mapped[str] = mapped_column(String(10), primary_key=True)  # YYYY-MM-DD
+    gift_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    recipient_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    gift_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    gifts_purchased: Mapped[int] = mapped_column(Integer, default=0)
+    total_spent: Mapped[int] = mapped_column(Integer, default=0)
+
+    __table_args__ = ({"sqlite_with_rowid": False},)
+
+    def __repr__(self) -> str:
+        return (
+            f"<PurchaseRollup(date={self.date}, gift_id={self.gift_id}, "
+            f"recipient={self.recipient_id}, purchased={self.gifts_purchased})>"
+        )
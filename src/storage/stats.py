@@ -0,0 +1,140 @@
+"""Batched counters for the DailyStats rollup."""
+import time
+from datetime import datetime
+from typing import NamedTuple
+
+from .database import get_daily_stats, get_read_session, get_session, upsert_daily_stats
+
+
+def utc_today() -> str:
+    """Get today's date (UTC) in the DailyStats key format."""
+    return datetime.utcnow().strftime("%Y-%m-%d")
+
+
+class DailyCounters(NamedTuple):
+    """Running totals for one day."""
+    date: str
+    gifts_checked: int = 0
+    gifts_purchased: int = 0
+    total_spent: int = 0
+    errors_count: int = 0
+
+
+class DailyStatsBuffer:
+    """Accumulates high-frequency counters and writes them in one upsert.
+
+    gifts_checked grows every poll, so writing it per cycle would cost a
+    commit every few seconds. Counts are kept per day in memory and
+    flushed once the interval has elapsed.
+
+    Today's running totals are kept alongside, seeded once from the
+    DailyStats row by restore(), so summaries and /stats read them in
+    O(1) instead of querying the database.
+    """
+
+    def __init__(self, flush_interval: float = 60.0) -> None:
+        """Initialize the buffer.
+
+        Args:
+            flush_interval: Seconds between flushes
+        """
+        self.flush_interval = flush_interval
+        self._pending: dict[str, list[int]] = {}
+        self._last_flush = time.monotonic()
+        self._today = DailyCounters(utc_today())
+
+    def add(self, gifts_checked: int = 0, errors: int = 0) -> None:
+        """Count checked gifts and errors for today."""
+        counts = self._pending.setdefault(utc_today(), [0, 0])
+        counts[0] += gifts_checked
+        counts[1] += errors
+
+        today = self._current()
+        self._today = today._replace(
+            gifts_checked=today.gifts_checked + gifts_checked,
+            errors_count=today.errors_count + errors,
+        )
+
+    def add_purchase(self, quantity: int, spent: int) -> None:
+        """Count purchased units in today's totals.
+
+        Purchases reach DailyStats together with their Purchase rows, so
+        only the running totals are updated here.
+        """
+        today = self._current()
+        self._today = today._replace(
+            gifts_purchased=today.gifts_purchased + quantity,
+            total_spent=today.total_spent + spent,
+        )
+
+    def snapshot(self) -> DailyCounters:
+        """Today's running totals."""
+        return self._current()
+
+    async def restore(self) -> DailyCounters:
+        """Seed today's totals from the DailyStats row and unflushed counts.
+
+        Returns:
+            Today's running totals
+        """
+        date = utc_today()
+        async with get_read_session() as session:
+            stats = await get_daily_stats(session, date)
+
+        gifts_checked, errors = self._pending.get(date, (0, 0))
+        self._today = DailyCounters(
+            date=date,
+            gifts_checked=(stats.gifts_checked if stats else 0) + gifts_checked,
+            gifts_purchased=stats.gifts_purchased if stats else 0,
+            total_spent=stats.total_spent if stats else 0,
+            errors_count=(stats.errors_count if stats else 0) + errors,
+        )
+        return self._today
+
+    @property
+    def should_flush(self) -> bool:
+        """Whether pending counts are due to be written."""
+        return bool(self._pending) and (
+            time.monotonic() - self._last_flush >= self.flush_interval
+        )
+
+    async def maybe_flush(self) -> None:
+        """Flush if the flush interval has elapsed."""
+        if self.should_flush:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write all pending counts to DailyStats."""
+        pending, self._pending = self._pending, {}
+        self._last_flush = time.monotonic()
+
+        if not pending:
+            return
+
+        try:
+            async with get_session() as session:
+                for date, (gifts_checked, errors) in pending.items():
+                    await upsert_daily_stats(
+                        session,
+                        date=date,
+                        gifts_checked=gifts_checked,
+                        errors_count=errors,
+                    )
+        except Exception:
+            # Keep the counts for the next attempt
+            for date, (gifts_checked, errors) in pending.items():
+                counts = self._pending.setdefault(date, [0, 0])
+                counts[0] += gifts_checked
+                counts[1] += errors
+            raise
+
+    def _current(self) -> DailyCounters:
+        """Today's totals, starting from zero after midnight UTC."""
+        date = utc_today()
+        if self._today.date != date:
+            self._today = DailyCounters(date)
+        return self._today
+
+
+# Shared buffer for the monitor and purchase engine
+stats_buffer = DailyStatsBuffer()
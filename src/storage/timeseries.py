@@ -0,0 +1,174 @@
+"""Compact gift availability time series with automatic downsampling."""
+import time
+from typing import NamedTuple
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.observability.memory import memory_guard
+from src.observability.metrics import WORK_SHED
+
+from .database import get_read_session, get_session
+from .models import GiftAvailability
+
+# Bucket sizes in seconds (0 = raw change points)
+RAW = 0
+MINUTE = 60
+HOUR = 3600
+
+_ROLLUP = text(
+    "INSERT OR REPLACE INTO gift_availability (gift_id, ts, available_amount, resolution) "
+    "SELECT gift_id, (ts / :bucket) * :bucket, MIN(available_amount), :bucket "
+    "FROM gift_availability WHERE resolution < :bucket AND ts < :cutoff "
+    "GROUP BY gift_id, ts / :bucket"
+)
+_PRUNE = text(
+    "DELETE FROM gift_availability WHERE resolution < :bucket AND ts < :cutoff"
+)
+_LATEST = text(
+    "SELECT gift_id, available_amount, MAX(ts) FROM gift_availability GROUP BY gift_id"
+)
+
+
+class AvailabilityPoint(NamedTuple):
+    """One sample of a gift's remaining supply."""
+    ts: int
+    available_amount: int
+
+
+class AvailabilityRecorder:
+    """Records available_amount only when it changes and ages data out.
+
+    Raw change points are kept for raw_retention seconds, then folded
+    into minute buckets; minute buckets older than minute_retention are
+    folded into hour buckets. Each bucket stores the lowest availability
+    seen in it, which for a selling-out gift is its value at bucket end.
+    """
+
+    def __init__(
+        self,
+        raw_retention: int = 86400,
+        minute_retention: int = 30 * 86400,
+        downsample_interval: float = 600.0,
+    ) -> None:
+        """Initialize the recorder.
+
+        Args:
+            raw_retention: Seconds to keep full-resolution points
+            minute_retention: Seconds to keep minute buckets
+            downsample_interval: Seconds between downsampling passes
+        """
+        self.raw_retention = raw_retention
+        self.minute_retention = minute_retention
+        self.downsample_interval = downsample_interval
+
+        self._last: dict[int, int] = {}
+        self._pending: list[dict[str, int]] = []
+        self._last_downsample = 0.0
+
+    async def load(self) -> None:
+        """Load the latest stored value per gift so restarts don't rewrite them."""
+        async with get_read_session() as session:
+            result = await session.execute(_LATEST)
+            self._last = {gift_id: amount for gift_id, amount, _ in result.fetchall()}
+
+    def observe(self, gift_id: int, available_amount: int, ts: int | None = None) -> bool:
+        """Note a polled value; queue a row only if it changed.
+
+        Nothing is recorded while memory is being shed.
+
+        Returns:
+            True if a change point was queued
+        """
+        if self._last.get(gift_id) == available_amount:
+            return False
+        if memory_guard.shedding:
+            WORK_SHED.labels(kind="availability").inc()
+            return False
+
+        self._last[gift_id] = available_amount
+        self._pending.append({
+            "gift_id": gift_id,
+            "ts": int(time.time()) if ts is None else ts,
+            "available_amount": available_amount,
+            "resolution": RAW,
+        })
+        return True
+
+    async def flush(self) -> None:
+        """Write queued change points in one statement."""
+        rows, self._pending = self._pending, []
+        if not rows:
+            return
+
+        stmt = insert(GiftAvailability)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[GiftAvailability.gift_id, GiftAvailability.ts],
+            set_={"available_amount": stmt.excluded.available_amount},
+        )
+
+        try:
+            async with get_session() as session:
+                await session.execute(stmt, rows)
+        except Exception:
+            self._pending[:0] = rows
+            raise
+
+    async def maybe_downsample(self) -> None:
+        """Downsample if the downsampling interval has elapsed."""
+        if time.monotonic() - self._last_downsample >= self.downsample_interval:
+            await self.downsample()
+
+    async def downsample(self, now: int | None = None) -> None:
+        """Fold aged raw points into minute buckets and minutes into hours.
+
+        Args:
+            now: Current Unix time (defaults to the wall clock)
+        """
+        now = int(time.time()) if now is None else now
+        self._last_downsample = time.monotonic()
+
+        async with get_session() as session:
+            for bucket, retention in ((MINUTE, self.raw_retention), (HOUR, self.minute_retention)):
+                # Align to the bucket so only complete buckets are folded
+                cutoff = (now - retention) // bucket * bucket
+                params = {"bucket": bucket, "cutoff": cutoff}
+                await session.execute(_ROLLUP, params)
+                await session.execute(_PRUNE, params)
+
+
+async def get_availability(
+    session: AsyncSession,
+    gift_id: int,
+    start: int,
+    end: int,
+) -> list[AvailabilityPoint]:
+    """Get a gift's availability points with start <= ts <= end.
+
+    Returns:
+        Points ordered by timestamp, at whatever resolution each age has
+    """
+    stmt = (
+        select(GiftAvailability.ts, GiftAvailability.available_amount)
+        .where(
+            GiftAvailability.gift_id == gift_id,
+            GiftAvailability.ts.between(start, end),
+        )
+        .order_by(GiftAvailability.ts)
+    )
+    result = await session.execute(stmt)
+    return [AvailabilityPoint(ts, amount) for ts, amount in result.fetchall()]
+
+
+def sell_out_velocity(points: list[AvailabilityPoint]) -> float:
+    """Average depletion rate across a series of points.
+
+    Returns:
+        Units sold per second (0.0 with fewer than two points)
+    """
+    if len(points) < 2 or points[-1].ts <= points[0].ts:
+        return 0.0
+
+    sold = points[0].available_amount - points[-1].available_amount
+    return max(sold, 0) / (points[-1].ts - points[0].ts)
@@ -0,0 +1,109 @@
+"""Unit tests for the Telegram connection supervisor."""
+import asyncio
+import os
+
+# Set test environment variables before importing settings
+os.environ["TELEGRAM_API_ID"] = "12345"
+os.environ["TELEGRAM_API_HASH"] = "test_hash_abc123"
+os.environ["TELEGRAM_PHONE_NUMBER"] = "+1234567890"
+
+
+class FakeSession:
+    """Answers pings unless the link is down."""
+
+    def __init__(self):
+        self.name = "test"
+        self.alive = True
+        self.pings = 0
+
+    async def invoke(self, query, **_):
+        self.pings += 1
+        if not self.alive:
+            raise OSError("connection reset")
+        return query
+
+
+class FakeWrapper:
+    """Client wrapper stand-in whose reconnects fail a few times."""
+
+    def __init__(self, failed_reconnects=0):
+        self.client = FakeSession()
+        self.failed_reconnects = failed_reconnects
+        self.reconnects = 0
+        self.warmups = 0
+        self.states = []
+
+    def set_connected(self, connected):
+        self.states.append(connected)
+
+    async def reconnect(self):
+        self.reconnects += 1
+        if self.reconnects > self.failed_reconnects:
+            self.client.alive = True
+
+    async def get_balance(self):
+        self.warmups += 1
+        return 0
+
+
+async def test_dead_connection_is_reconnected_in_background():
+    """Test that a failed ping triggers reconnect with backoff and warm-up."""
+    from src.core.connection import ConnectionSupervisor
+
+    wrapper = FakeWrapper(failed_reconnects=2)
+    supervisor = ConnectionSupervisor(wrapper, ping_interval=0.01, reconnect_floor=0.001)
+    supervisor.start()
+    await asyncio.sleep(0.02)
+    assert wrapper.warmups == 1
+
+    wrapper.client.alive = False
+    await asyncio.sleep(0.1)
+    await supervisor.stop()
+
+    assert wrapper.reconnects == 3
+    assert wrapper.states == [False, True]
+    assert wrapper.warmups == 2
+
+
+async def test_check_now_pings_immediately():
+    """Test that a transport failure report skips the ping interval."""
+    from src.core.connection import ConnectionSupervisor
+
+    wrapper = FakeWrapper()
+    supervisor = ConnectionSupervisor(wrapper, ping_interval=60)
+    supervisor.start()
+    await asyncio.sleep(0.01)
+    assert wrapper.client.pings == 0
+
+    supervisor.check_now()
+    await asyncio.sleep(0.01)
+    await supervisor.stop()
+    assert wrapper.client.pings == 1
+
+
+async def test_stop_during_outage_stops_started_clients():
+    """Test that a shutdown while disconnected still stops the Pyrogram client."""
+    from src.core.client import TelegramClientWrapper
+
+    class Client:
+        name = "test"
+        stopped = False
+
+        async def start(self):
+            pass
+
+        async def stop(self):
+            self.stopped = True
+
+        async def get_me(self):
+            return type("Me", (), {"id": 1, "username": "u", "first_name": "f"})
+
+    wrapper = TelegramClientWrapper()
+    wrapper.client = Client()
+    wrapper.hedge_client = None
+    await wrapper.start()
+
+    wrapper.set_connected(False)
+    await wrapper.stop()
+    assert wrapper.client.stopped
+    assert not wrapper.is_connected
@@ -0,0 +1,106 @@
+"""Unit tests for the purchase error taxonomy and circuit breakers."""
+import os
+
+# Set test environment variables before importing settings
+os.environ["TELEGRAM_API_ID"] = "12345"
+os.environ["TELEGRAM_API_HASH"] = "test_hash_abc123"
+os.environ["TELEGRAM_PHONE_NUMBER"] = "+1234567890"
+
+from types import SimpleNamespace
+
+
+def _error(code, error_id):
+    """Build the error Pyrogram raises for an ID it has no class for.
+
+    Pyrogram passes is_unknown=True, which only appends the ID to
+    unknown_errors.txt in the working directory; it is left off here.
+    """
+    from pyrogram import errors
+
+    cls = {400: errors.BadRequest, 500: errors.InternalServerError}[code]
+    return cls(value=f"[{code} {error_id}]")
+
+
+class FakeSession:
+    """Pyrogram client stand-in failing submissions with queued errors."""
+
+    name = "test_session"
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.submissions = 0
+
+    async def invoke(self, query):
+        if query["_"] == "payments.getPaymentForm":
+            return SimpleNamespace(form_id=1)
+        self.submissions += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return SimpleNamespace(transaction_id="tx")
+
+
+def _wrapper(session):
+    from src.core.client import TelegramClientWrapper
+
+    wrapper = TelegramClientWrapper()
+    wrapper.client = session
+    wrapper._retry_delay = 0
+    return wrapper
+
+
+def test_classify_uses_id_then_code_then_overrides():
+    """Test lookup order of the error taxonomy."""
+    from pyrogram import errors
+
+    from src.core.errors import Scope, Verdict, classify
+
+    sold_out = classify(_error(400, "STARGIFT_USAGE_LIMITED"))
+    assert (sold_out.verdict, sold_out.scope) == (Verdict.TERMINAL, Scope.GIFT)
+    assert classify(errors.PeerIdInvalid()).scope == Scope.RECIPIENT
+    assert classify(_error(500, "SOMETHING_NEW")).verdict == Verdict.BACKOFF
+    assert classify(_error(400, "SOMETHING_NEW")).verdict == Verdict.TERMINAL
+
+    overridden = classify(_error(400, "SOMETHING_NEW"), {"SOMETHING_NEW": Verdict.RETRY_NOW})
+    assert overridden.verdict == Verdict.RETRY_NOW
+
+
+async def test_terminal_error_opens_gift_breaker():
+    """Test that a sold-out gift is neither retried nor sent again."""
+    session = FakeSession(_error(400, "STARGIFT_USAGE_LIMITED"))
+    wrapper = _wrapper(session)
+
+    assert await wrapper.send_gift(7, 42) is None
+    assert session.submissions == 1
+
+    assert await wrapper.send_gift(7, 43) is None
+    assert session.submissions == 1
+    assert wrapper.can_send(8, 42)
+
+
+async def test_transient_error_is_retried():
+    """Test that a server hiccup is retried on the same form."""
+    session = FakeSession(_error(500, "RPC_CALL_FAIL"))
+    wrapper = _wrapper(session)
+
+    receipt = await wrapper.send_gift(7, 42)
+    assert receipt.transaction_id == "tx"
+    assert session.submissions == 2
+
+
+async def test_flood_wait_blocks_the_account_for_its_duration():
+    """Test that a FloodWait is not slept on but opens the account breaker."""
+    import time
+
+    from pyrogram.errors import FloodWait
+
+    from src.core.errors import Scope
+
+    session = FakeSession(FloodWait(value=30))
+    wrapper = _wrapper(session)
+
+    assert await wrapper.send_gift(7, 42) is None
+    assert session.submissions == 1
+    assert not wrapper.can_send(8, 43)
+
+    open_until = wrapper.breakers[Scope.ACCOUNT]._open_until[session.name]
+    assert 25 < open_until - time.monotonic() <= 30
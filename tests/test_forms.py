@@ -0,0 +1,126 @@
+"""Unit tests for prefetched payment forms."""
+import asyncio
+import os
+import time
+
+# Set test environment variables before importing settings
+os.environ["TELEGRAM_API_ID"] = "12345"
+os.environ["TELEGRAM_API_HASH"] = "test_hash_abc123"
+os.environ["TELEGRAM_PHONE_NUMBER"] = "+1234567890"
+
+
+class FakeClient:
+    """Hands out numbered payment forms after a short delay."""
+
+    def __init__(self):
+        self.requests = 0
+
+    async def get_payment_form(self, gift_id, _recipient_id):
+        from src.core.forms import PaymentForm
+
+        self.requests += 1
+        form_id = self.requests
+        await asyncio.sleep(0.01)
+        return PaymentForm(form_id, {"gift_id": gift_id}, time.monotonic())
+
+
+async def test_prepared_forms_are_consumed_once():
+    """Test that each prepared form pays for exactly one unit."""
+    from src.core.forms import PaymentFormCache
+
+    client = FakeClient()
+    cache = PaymentFormCache(client)
+    cache.prepare(1, 42, count=2)
+    cache.prepare(1, 42, count=2)
+
+    first = await cache.take(1, 42)
+    second = await cache.take(1, 42)
+
+    assert {first.form_id, second.form_id} == {1, 2}
+    assert client.requests == 2
+    assert await cache.take(1, 42) is None
+
+
+async def test_expired_forms_are_discarded():
+    """Test that forms older than the TTL are never submitted."""
+    from src.core.forms import PaymentFormCache
+
+    cache = PaymentFormCache(FakeClient(), ttl=0.01)
+    cache.prepare(1, 42)
+    await asyncio.sleep(0.05)
+
+    assert await cache.take(1, 42) is None
+
+
+async def test_failed_fetches_and_invalidation_leave_nothing_behind():
+    """Test that transport errors are absorbed and invalidated pairs are forgotten."""
+    from src.core.forms import PaymentFormCache
+
+    class FailingClient(FakeClient):
+        async def get_payment_form(self, gift_id, _recipient_id):
+            if gift_id == 2:
+                raise TimeoutError
+            return await super().get_payment_form(gift_id, _recipient_id)
+
+    client = FailingClient()
+    cache = PaymentFormCache(client)
+    cache.prepare(2, 42)
+    assert await cache.take(2, 42) is None
+
+    cache.prepare(1, 42, count=2)
+    cache.prepare(1, 43)
+    await asyncio.sleep(0)
+    cache.invalidate(1)
+    await asyncio.sleep(0.02)
+
+    assert await cache.take(1, 42) is None
+    assert cache._ready == {} and cache._pending == {}
+
+
+async def test_form_flood_wait_does_not_block_the_account():
+    """Test that a flood wait on a form fetch leaves the account breaker closed."""
+    from pyrogram.errors import FloodWait
+
+    from src.core.client import TelegramClientWrapper
+
+    class Session:
+        name = "test_session"
+
+        async def invoke(self, _query):
+            raise FloodWait(value=30)
+
+    wrapper = TelegramClientWrapper()
+    wrapper.client = Session()
+
+    assert await wrapper.get_payment_form(1, 42) is None
+    assert wrapper.can_send(1, 42)
+
+
+async def test_cycle_prefetches_forms_for_allocated_units_only():
+    """Test that forms are only requested for units the plan allocated."""
+    from types import SimpleNamespace
+
+    from src.core.planner import PlanCandidate
+    from src.core.purchase import PurchaseEngine
+
+    class Client(FakeClient):
+        def can_send(self, _gift_id, _recipient_id=None):
+            return True
+
+        async def get_balance(self):
+            return 150
+
+        async def send_gift(self, **_):
+            return None
+
+    client = Client()
+    engine = PurchaseEngine(client)
+    engine.intents = SimpleNamespace(record=lambda *_, **__: None)
+    engine.build_candidates = lambda _gifts: [
+        PlanCandidate(1, "A", 100, 42, 3, 1.0),
+        PlanCandidate(2, "B", 100, 43, 3, 0.5),
+    ]
+
+    await engine.process_cycle([object()])
+    await asyncio.sleep(0.02)
+    assert client.requests == 1
@@ -0,0 +1,74 @@
+"""Unit tests for hedged requests."""
+import asyncio
+import os
+
+# Set test environment variables before importing settings
+os.environ["TELEGRAM_API_ID"] = "12345"
+os.environ["TELEGRAM_API_HASH"] = "test_hash_abc123"
+os.environ["TELEGRAM_PHONE_NUMBER"] = "+1234567890"
+
+
+def _responder(value, delay, calls):
+    async def call():
+        calls.append(value)
+        await asyncio.sleep(delay)
+        return value
+    return call
+
+
+def test_threshold_follows_quantile():
+    """Test that the hedge delay is the configured latency quantile."""
+    from src.core.hedging import LatencyTracker
+
+    tracker = LatencyTracker(quantile=0.9, min_samples=10, min_delay=0.0, initial_delay=2.0)
+    assert tracker.threshold() == 2.0
+
+    for i in range(1, 101):
+        tracker.record(i / 1000)
+    assert tracker.threshold() == 0.09
+
+
+async def test_fast_primary_is_not_hedged():
+    """Test that no backup request is sent when the primary is fast."""
+    from src.core.hedging import LatencyTracker, hedged
+
+    calls = []
+    tracker = LatencyTracker(initial_delay=0.05)
+    result = await hedged(
+        "test",
+        _responder("primary", 0.0, calls),
+        _responder("backup", 0.0, calls),
+        tracker,
+    )
+
+    assert result == "primary"
+    assert calls == ["primary"]
+
+
+async def test_slow_primary_loses_to_backup():
+    """Test that a stalled primary is raced and the backup answer wins."""
+    from src.core.hedging import LatencyTracker, hedged
+
+    calls = []
+    tracker = LatencyTracker(initial_delay=0.01)
+    result = await hedged(
+        "test",
+        _responder("primary", 1.0, calls),
+        _responder("backup", 0.01, calls),
+        tracker,
+    )
+
+    assert result == "backup"
+    assert calls == ["primary", "backup"]
+
+
+async def test_failed_backup_falls_back_to_primary():
+    """Test that the primary still answers if the hedge fails."""
+    from src.core.hedging import LatencyTracker, hedged
+
+    async def failing():
+        raise ConnectionError("backup down")
+
+    tracker = LatencyTracker(initial_delay=0.01)
+    result = await hedged("test", _responder("primary", 0.05, []), failing, tracker)
+    assert result == "primary"
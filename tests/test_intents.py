@@ -0,0 +1,106 @@
+"""Unit tests for the purchase intent journal and startup reconciliation."""
+import os
+
+# Set test environment variables before importing settings
+os.environ["TELEGRAM_API_ID"] = "12345"
+os.environ["TELEGRAM_API_HASH"] = "test_hash_abc123"
+os.environ["TELEGRAM_PHONE_NUMBER"] = "+1234567890"
+
+
+class FakeClient:
+    """Reports which in-flight payments Telegram has on record."""
+
+    def __init__(self, payments):
+        self.payments = payments
+
+    async def find_gift_payments(self, gift_id, recipient_id, _since):
+        return self.payments.get((gift_id, recipient_id), [])
+
+
+def _unit(journal, intent_id, gift_id, *states, **fields):
+    from src.storage.intents import INTENT
+
+    journal.record(
+        intent_id, INTENT,
+        gift_id=gift_id, gift_name=f"Gift {gift_id}", recipient_id=42,
+        recipient_username=None, price=100,
+    )
+    for state in states:
+        journal.record(intent_id, state, **fields)
+
+
+def test_journal_folds_states_and_skips_torn_lines(tmp_path):
+    """Test that the latest state wins and a torn tail is ignored."""
+    from src.storage.intents import CONFIRMED, SENT, IntentJournal
+
+    path = tmp_path / "intents.log"
+    journal = IntentJournal(path)
+    _unit(journal, "a", 1, SENT, form_id=7)
+    journal.record("a", CONFIRMED, transaction_id="tx-a")
+    journal.close()
+
+    with path.open("a") as file:
+        file.write('{"id": "b", "sta')
+
+    intents = IntentJournal(path).load()
+    assert list(intents) == ["a"]
+    assert intents["a"]["state"] == CONFIRMED
+    assert intents["a"]["form_id"] == 7
+    assert intents["a"]["transaction_id"] == "tx-a"
+
+
+
+def test_journal_compacts_once_purchases_are_persisted(tmp_path):
+    """Test that persisted and failed units leave the log, in-flight ones stay."""
+    from src.storage.intents import CONFIRMED, FAILED, SENT, IntentJournal
+
+    path = tmp_path / "intents.log"
+    journal = IntentJournal(path, compact_after=10)
+    journal.compact([])
+    _unit(journal, "a", 1, SENT, CONFIRMED, transaction_id="tx-a")
+    _unit(journal, "b", 2, SENT, FAILED)
+    _unit(journal, "c", 3, SENT, CONFIRMED, transaction_id="tx-c")
+    _unit(journal, "d", 4, SENT)
+
+    journal.resolve(["tx-a"])
+    assert len(path.read_text().splitlines()) == 11
+
+    journal.resolve(["tx-c"])
+    assert len(path.read_text().splitlines()) == 1
+    assert journal.load()["d"]["state"] == SENT
+
+    journal.record("d", CONFIRMED, transaction_id="tx-d")
+    journal.close()
+    assert IntentJournal(path).load()["d"]["transaction_id"] == "tx-d"
+
+async def test_reconcile_recovers_in_flight_purchases(tmp_path):
+    """Test that confirmed and found units are recorded exactly once."""
+    from sqlalchemy import select
+
+    from src.core.purchase import PurchaseEngine
+    from src.storage import database
+    from src.storage.intents import CONFIRMED, SENT, IntentJournal
+    from src.storage.models import Purchase
+
+    database.configure_engine(mode="wal", path=tmp_path / "test.db")
+    try:
+        await database.init_db()
+
+        engine = PurchaseEngine(FakeClient({(2, 42): ["tx-b"]}))
+        engine.intents = IntentJournal(tmp_path / "intents.log")
+        _unit(engine.intents, "a", 1, SENT, CONFIRMED, transaction_id="tx-a")
+        _unit(engine.intents, "b", 2, SENT)
+        _unit(engine.intents, "c", 3, SENT)
+        _unit(engine.intents, "d", 4)
+
+        await engine.reconcile_intents()
+        await engine.reconcile_intents()
+
+        async with database.get_read_session() as session:
+            result = await session.execute(select(Purchase.gift_id, Purchase.transaction_id))
+            assert sorted(result.fetchall()) == [(1, "tx-a"), (2, "tx-b")]
+
+        assert engine.intents.load() == {}
+    finally:
+        await database.close_db()
+        database.configure_engine()
@@ -0,0 +1,196 @@
+"""Unit tests for the gift monitor cycle."""
+import asyncio
+import os
+
+# Set test environment variables before importing settings
+os.environ["TELEGRAM_API_ID"] = "12345"
+os.environ["TELEGRAM_API_HASH"] = "test_hash_abc123"
+os.environ["TELEGRAM_PHONE_NUMBER"] = "+1234567890"
+
+
+class FakeClient:
+    """Serves a fixed catalog."""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    async def get_available_gifts(self):
+        return self.catalog
+
+    def add_update_handler(self, callback):
+        self.update_handler = callback
+        return callback
+
+    def remove_update_handler(self, _handle):
+        self.update_handler = None
+
+
+class UpdateNewMessage:
+    """Synthetic raw update carrying a message."""
+
+    def __init__(self, message):
+        self.message = message
+
+
+class MessageService:
+    def __init__(self, action=None, peer_id=None):
+        self.action = action
+        self.peer_id = peer_id
+
+
+class MessageActionStarGift:
+    pass
+
+
+class PeerChannel:
+    def __init__(self, channel_id):
+        self.channel_id = channel_id
+
+
+def _gift(gift_id, price=100, total_amount=10000):
+    return {
+        "id": gift_id,
+        "title": f"Gift {gift_id}",
+        "stars": price,
+        "total_amount": total_amount,
+        "available_amount": total_amount,
+        "is_limited": True,
+        "is_sold_out": False,
+    }
+
+
+async def test_cycle_dispatches_before_persisting():
+    """Test that purchases are dispatched before any database write."""
+    from src.core.monitor import GiftMonitor, Snapshot
+
+    events = []
+    monitor = GiftMonitor(
+        FakeClient([_gift(1), _gift(2, price=999999)]),
+        on_gift_batch=lambda gifts: events.append(("dispatch", [g["id"] for g in gifts])),
+    )
+
+    async def store(gifts):
+        events.append(("store", len(gifts)))
+
+    async def noop():
+        pass
+
+    monitor._store_gifts = store
+    monitor.availability.flush = noop
+    monitor.availability.maybe_downsample = noop
+
+    await monitor._process_snapshot(Snapshot([_gift(1), _gift(2, price=999999)], 0.0))
+    assert events == [("dispatch", [1]), ("store", 2)]
+
+
+async def test_snapshot_channel_keeps_newest():
+    """Test that an unconsumed snapshot is superseded by a newer one."""
+    from src.core.monitor import Snapshot, SnapshotChannel
+
+    channel = SnapshotChannel()
+    assert channel.put(Snapshot([_gift(1)], 0.0)) is False
+    assert channel.put(Snapshot([_gift(2)], 1.0)) is True
+
+    snapshot = await channel.get()
+    assert snapshot.gifts[0]["id"] == 2
+
+    channel.close()
+    assert await channel.get() is None
+
+
+async def test_slow_processing_does_not_delay_fetches():
+    """Test that the fetch stage keeps its schedule while processing lags."""
+    from src.core.monitor import GiftMonitor
+
+    client = FakeClient([_gift(1)])
+    fetches = 0
+
+    async def fetch():
+        nonlocal fetches
+        fetches += 1
+        return client.catalog
+
+    client.get_available_gifts = fetch
+    monitor = GiftMonitor(client)
+    monitor.interval = 0.01
+    processed = 0
+
+    async def process(_snapshot):
+        nonlocal processed
+        processed += 1
+        await asyncio.sleep(0.1)
+
+    monitor._process_snapshot = process
+    monitor._running = True
+
+    fetcher = asyncio.create_task(monitor._fetch_loop())
+    processor = asyncio.create_task(monitor._process_loop())
+    await asyncio.sleep(0.25)
+
+    monitor._running = False
+    monitor._snapshots.close()
+    fetcher.cancel()
+    await processor
+
+    assert fetches >= 10
+    assert processed <= 4
+
+
+
+def test_update_detector_classifies_signals():
+    """Test which synthetic updates count as catalog signals."""
+    from src.core.updates import UpdateDetector
+
+    detector = UpdateDetector(FakeClient([]), on_signal=lambda: None, announcement_chats=[-1000000000777])
+
+    gift_message = UpdateNewMessage(MessageService(action=MessageActionStarGift()))
+    assert detector.classify(gift_message) == "service_message"
+
+    post = UpdateNewMessage(MessageService(peer_id=PeerChannel(777)))
+    assert detector.classify(post) == "announcement"
+
+    other_post = UpdateNewMessage(MessageService(peer_id=PeerChannel(778)))
+    assert detector.classify(other_post) is None
+    assert detector.classify(object()) is None
+
+
+async def test_update_triggers_immediate_fetch():
+    """Test that an injected update fetches without waiting for the poll."""
+    from src.core.monitor import GiftMonitor
+
+    client = FakeClient([_gift(1)])
+    fetches = 0
+
+    async def fetch():
+        nonlocal fetches
+        fetches += 1
+        return client.catalog
+
+    client.get_available_gifts = fetch
+    monitor = GiftMonitor(client)
+    assert monitor.updates is not None
+    assert monitor.interval >= 5
+
+    async def process(_snapshot):
+        pass
+
+    monitor._process_snapshot = process
+    monitor._running = True
+    monitor.updates.attach()
+
+    fetcher = asyncio.create_task(monitor._fetch_loop())
+    processor = asyncio.create_task(monitor._process_loop())
+    await asyncio.sleep(0.01)
+    assert fetches == 1
+
+    update = UpdateNewMessage(MessageService(action=MessageActionStarGift()))
+    await client.update_handler(client, update, {}, {})
+    await asyncio.sleep(0.01)
+    assert fetches == 2
+
+    monitor._running = False
+    monitor._snapshots.close()
+    fetcher.cancel()
+    await processor
+    monitor.updates.detach()
+    assert client.update_handler is None
@@ -0,0 +1,142 @@
+"""Unit tests for notification delivery, summaries and /stats."""
+import asyncio
+import os
+
+# Set test environment variables before importing settings
+os.environ["TELEGRAM_API_ID"] = "12345"
+os.environ["TELEGRAM_API_HASH"] = "test_hash_abc123"
+os.environ["TELEGRAM_PHONE_NUMBER"] = "+1234567890"
+
+
+class FakeChannel:
+    """Records delivered messages; can fail the first few sends."""
+
+    def __init__(self, failures=()):
+        self.sent = []
+        self.failures = list(failures)
+
+    async def send(self, text):
+        if self.failures:
+            failure = self.failures.pop(0)
+            if isinstance(failure, Exception):
+                raise failure
+            return False
+        self.sent.append(text)
+        return True
+
+
+async def test_burst_is_merged_into_one_digest():
+    """Test that informational messages in one window become one message."""
+    from src.notifications.outbox import NotificationOutbox
+
+    channel = FakeChannel()
+    outbox = NotificationOutbox(channel.send, max_per_minute=6000, digest_window=0.05)
+    outbox.start()
+
+    for i in range(50):
+        outbox.post(f"bought {i}")
+    outbox.post("balance low", critical=True)
+
+    await asyncio.sleep(0.01)
+    assert channel.sent == ["balance low"]
+
+    await asyncio.sleep(0.1)
+    await outbox.stop()
+    assert len(channel.sent) == 2
+    assert "bought 0" in channel.sent[1] and "bought 49" in channel.sent[1]
+
+
+async def test_failed_delivery_is_retried():
+    """Test that a FloodWait or failure requeues the message."""
+    from pyrogram.errors import FloodWait
+
+    from src.notifications.outbox import NotificationOutbox
+
+    channel = FakeChannel(failures=[FloodWait(value=0), False])
+    outbox = NotificationOutbox(channel.send, max_per_minute=6000, max_attempts=3)
+
+    outbox.post("error", critical=True)
+    await outbox.drain()
+    await outbox.drain()
+    await outbox.drain()
+
+    assert channel.sent == ["error"]
+    assert len(outbox) == 0
+
+
+def test_digests_respect_message_limit():
+    """Test that oversized digests are split below Telegram's limit."""
+    from src.notifications.outbox import MAX_MESSAGE_LENGTH, render_digests
+
+    digests = render_digests(["x" * 1000] * 10)
+
+    assert len(digests) == 3
+    assert all(len(digest) <= MAX_MESSAGE_LENGTH for digest in digests)
+    assert render_digests(["only"]) == ["only"]
+
+
+def test_daily_summary_waits_for_next_occurrence():
+    """Test the delay until the configured summary time."""
+    from datetime import datetime, time
+
+    from src.notifications.summary import seconds_until
+
+    assert seconds_until(time(23, 55), datetime(2026, 1, 6, 23, 50)) == 300
+    assert seconds_until(time(0, 5), datetime(2026, 1, 6, 23, 50)) == 900
+    assert seconds_until(time(23, 50), datetime(2026, 1, 6, 23, 50)) == 86400
+
+
+async def test_stats_command_answers_from_counters():
+    """Test that /stats replies from the running counters."""
+    from src.notifications import NotificationService, StatsCommand
+    from src.storage.stats import DailyStatsBuffer
+
+    class FakeMessage:
+        def __init__(self):
+            self.replies = []
+
+        async def reply_text(self, text):
+            self.replies.append(text)
+
+    counters = DailyStatsBuffer()
+    counters.add(gifts_checked=7)
+    counters.add_purchase(3, 450)
+
+    command = StatsCommand(None, NotificationService(None), counters=counters)
+    message = FakeMessage()
+    await command.handle(None, message)
+
+    assert "Gifts Checked: 7" in message.replies[0]
+    assert "Gifts Purchased: 3" in message.replies[0]
+    assert "Total Spent: 450⭐" in message.replies[0]
+
+
+async def test_stats_command_ignores_other_users():
+    """Test that /stats is only accepted from the account owner."""
+    from types import SimpleNamespace
+
+    from src.core.client import TelegramClientWrapper
+
+    class FakeClient:
+        me = SimpleNamespace(username="owner")
+
+        def add_handler(self, handler, group=0):
+            self.handler = handler
+            return handler, group
+
+    wrapper = TelegramClientWrapper()
+    wrapper.client = FakeClient()
+
+    async def handle(_client, _message):
+        pass
+
+    handler, _ = wrapper.add_command_handler("stats", handle)
+
+    def message(is_self):
+        return SimpleNamespace(
+            text="/stats", caption=None, outgoing=is_self,
+            from_user=SimpleNamespace(is_self=is_self),
+        )
+
+    assert await handler.filters(wrapper.client, message(True))
+    assert not await handler.filters(wrapper.client, message(False))
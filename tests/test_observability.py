@@ -0,0 +1,428 @@
+"""Unit tests for the health and metrics endpoint."""
+import asyncio
+import os
+
+# Set test environment variables before importing settings
+os.environ["TELEGRAM_API_ID"] = "12345"
+os.environ["TELEGRAM_API_HASH"] = "test_hash_abc123"
+os.environ["TELEGRAM_PHONE_NUMBER"] = "+1234567890"
+
+
+async def _get(port, path):
+    """Send one GET request and return (status, body)."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+
+    response = await reader.read()
+    writer.close()
+
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), body
+
+
+async def test_health_routes_follow_published_snapshot():
+    """Test that probes answer from the current health snapshot."""
+    from src.observability import health
+    from src.observability.server import ObservabilityServer
+
+    server = ObservabilityServer(host="127.0.0.1", port=0)
+    await server.start()
+    previous = health.get_health_snapshot()
+    try:
+        health.set_health_status(status="starting", telegram_connected=False)
+        assert await _get(server.port, "/health/ready") == (503, b'{"ready":false}')
+        assert await _get(server.port, "/health/live") == (200, b'{"alive":true}')
+
+        health.set_health_status(status="healthy", telegram_connected=True, database_connected=True)
+        assert await _get(server.port, "/health/ready") == (200, b'{"ready":true}')
+
+        status, body = await _get(server.port, "/health")
+        assert status == 200 and b'"telegram_connected":true' in body
+
+        assert (await _get(server.port, "/nope"))[0] == 404
+    finally:
+        health._snapshot = previous
+        await server.stop()
+
+
+def test_health_status_is_kept_unless_given():
+    """Test that updating one field does not reset a degraded status."""
+    from datetime import datetime
+
+    from src.observability import health
+
+    previous = health.get_health_snapshot()
+    try:
+        health.set_health_status(status="degraded", telegram_connected=False)
+        health.set_health_status(last_check=datetime.utcnow())
+        health.set_health_status(database_connected=True)
+
+        snapshot = health.get_health_snapshot()
+        assert snapshot.status == "degraded"
+        assert snapshot.database_connected and snapshot.last_check
+    finally:
+        health._snapshot = previous
+
+
+async def test_profile_endpoint_samples_the_event_loop(tmp_path):
+    """Test that /debug/profile returns and writes collapsed stacks of loop work."""
+    import time
+
+    from src.observability.profiling import StackSampler
+    from src.observability.server import ObservabilityServer
+
+    def spin_cycle():
+        end = time.perf_counter() + 0.002
+        while time.perf_counter() < end:
+            pass
+
+    async def busy():
+        while True:
+            spin_cycle()
+            await asyncio.sleep(0)
+
+    profiler = StackSampler(interval=0.001, max_seconds=1.0, output_dir=tmp_path)
+    server = ObservabilityServer(host="127.0.0.1", port=0, profiler=profiler)
+    await server.start()
+    worker = asyncio.create_task(busy())
+    try:
+        first = asyncio.create_task(_get(server.port, "/debug/profile?seconds=0.3"))
+        await asyncio.sleep(0.1)
+        assert (await _get(server.port, "/debug/profile?seconds=0.3"))[0] == 409
+        assert (await _get(server.port, "/debug/profile?seconds=5"))[0] == 400
+
+        status, body = await first
+        assert status == 200
+        assert "test_observability.py:spin_cycle" in body.decode().splitlines()[0]
+        assert [p.read_bytes() for p in tmp_path.glob("cpu-*.collapsed")] == [body]
+    finally:
+        worker.cancel()
+        await server.stop()
+
+    # Off unless a profiler is configured
+    server = ObservabilityServer(host="127.0.0.1", port=0)
+    await server.start()
+    try:
+        assert (await _get(server.port, "/debug/profile?seconds=1"))[0] == 404
+    finally:
+        await server.stop()
+
+
+async def test_metrics_exposition_is_cached():
+    """Test that scrapes within the cache window reuse one rendering."""
+    from prometheus_client import CollectorRegistry, Counter
+
+    from src.observability.server import ObservabilityServer
+
+    registry = CollectorRegistry()
+    hits = Counter("test_hits", "Test counter", registry=registry)
+
+    server = ObservabilityServer(host="127.0.0.1", port=0, metrics_cache_seconds=60, registry=registry)
+    await server.start()
+    try:
+        hits.inc()
+        status, first = await _get(server.port, "/metrics?name=x")
+        hits.inc()
+        _, second = await _get(server.port, "/metrics")
+
+        assert status == 200
+        assert b"test_hits_total 1.0" in first
+        assert second == first
+
+        server.metrics_cache_seconds = 0
+        assert b"test_hits_total 2.0" in (await _get(server.port, "/metrics"))[1]
+    finally:
+        await server.stop()
+
+
+def test_label_guard_folds_values_beyond_limit():
+    """Test that a guarded label keeps allow-listed and first-seen values only."""
+    from prometheus_client import REGISTRY, CollectorRegistry, Counter
+
+    from src.observability.metrics import GuardedMetric, LabelGuard
+
+    registry = CollectorRegistry()
+    counter = Counter("test_purchases", "Test counter", ["gift", "kind"], registry=registry)
+    metric = GuardedMetric("test_purchases", counter, gift=LabelGuard(limit=2, allow=["vip"]))
+
+    for gift in ["a", "b", "c", "d", "vip", "a"]:
+        metric.labels(gift=gift, kind="x").inc()
+
+    assert registry.get_sample_value("test_purchases_total", {"gift": "a", "kind": "x"}) == 2
+    assert registry.get_sample_value("test_purchases_total", {"gift": "other", "kind": "x"}) == 2
+    assert registry.get_sample_value("test_purchases_total", {"gift": "vip", "kind": "x"}) == 1
+    assert registry.get_sample_value("test_purchases_total", {"gift": "c", "kind": "x"}) is None
+    assert REGISTRY.get_sample_value("gift_hunter_metric_series", {"metric": "test_purchases"}) == 4
+
+
+def test_drop_latency_covers_each_stage_and_whole_path():
+    """Test that stage gaps and first-seen to confirmed latency are recorded."""
+    from prometheus_client import REGISTRY
+
+    from src.observability import latency
+
+    def observed(name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0.0
+
+    tracker = latency.DropLatencyTracker()
+    before_total = observed("gift_hunter_drop_latency_seconds_sum")
+    before_send = observed("gift_hunter_drop_stage_latency_seconds_sum", stage="send_started")
+
+    tracker.mark(7, latency.FIRST_SEEN, at=100.0)
+    tracker.mark(7, latency.MATCHED, at=100.01)
+    tracker.mark(7, latency.FIRST_SEEN, at=105.0)  # Later sightings do not count
+    tracker.mark(7, latency.ENQUEUED, at=100.02)
+    tracker.mark(7, latency.SEND_STARTED, at=100.5)
+    tracker.mark(7, latency.CONFIRMED, at=101.0)
+    tracker.mark(7, latency.CONFIRMED, at=102.0)
+    tracker.mark(8, latency.CONFIRMED, at=102.0)  # Never seen: ignored
+
+    assert observed("gift_hunter_drop_latency_seconds_sum") - before_total == 1.0
+    assert round(observed("gift_hunter_drop_stage_latency_seconds_sum", stage="send_started") - before_send, 6) == 0.48
+
+    summary = tracker.summary()
+    assert (summary.count, summary.p50, summary.max) == (1, 1.0, 1.0)
+    assert latency.DropLatencyTracker().summary() is None
+
+
+async def test_rpc_latency_errors_and_flood_wait_are_recorded():
+    """Test that RPCs are timed per method and failures counted by error ID."""
+    import asyncio
+
+    import pytest
+    from prometheus_client import REGISTRY
+    from pyrogram.errors import BadRequest, FloodWait
+
+    from src.core.rpc import instrumented
+
+    def observed(name, **labels):
+        return REGISTRY.get_sample_value(name, {"method": "test.method", "account": "acct", **labels}) or 0.0
+
+    async def answer():
+        return 42
+
+    async def fail(error):
+        raise error
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    assert await instrumented("test.method", "acct", answer()) == 42
+    with pytest.raises(FloodWait):
+        await instrumented("test.method", "acct", fail(FloodWait(value=7)))
+    with pytest.raises(BadRequest):
+        await instrumented("test.method", "acct", fail(BadRequest("PEER_ID_INVALID")))
+
+    task = asyncio.create_task(instrumented("test.method", "acct", hang()))
+    await asyncio.sleep(0)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert observed("gift_hunter_rpc_duration_seconds_count") == 3  # Cancelled call not observed
+    assert observed("gift_hunter_flood_wait_seconds_total") == 7
+    assert observed("gift_hunter_rpc_errors_total", code="420", error="FLOOD_WAIT_X") == 1
+    assert observed("gift_hunter_rpc_errors_total", code="400", error="PEER_ID_INVALID") == 1
+
+
+async def test_spans_follow_tasks_and_export_as_otlp(tmp_path, monkeypatch):
+    """Test that a trace spans created tasks and RPCs and is written as OTLP JSON."""
+    import asyncio
+    import json
+
+    import pytest
+    from pyrogram.errors import BadRequest
+
+    from src.core.rpc import instrumented
+    from src.observability import tracing
+
+    exporter = tracing.JsonlSpanExporter(str(tmp_path / "traces.jsonl"))
+    monkeypatch.setattr(tracing.tracer, "exporter", exporter)
+    monkeypatch.setattr(tracing.tracer, "sample_rate", 1.0)
+
+    async def purchase():
+        with tracing.tracer.span("purchase.send", gift_id=5), pytest.raises(BadRequest):
+            await instrumented("payments.sendStarsForm", "acct", _fail(BadRequest("STARGIFT_USAGE_LIMITED")))
+
+    with tracing.tracer.span("monitor.process") as root:
+        task = asyncio.create_task(purchase())
+    await task
+
+    # Outside a trace nothing is recorded
+    await instrumented("payments.getStarsStatus", "acct", _fail(None))
+
+    await exporter.flush()
+    lines = (tmp_path / "traces.jsonl").read_text().splitlines()
+    assert len(lines) == 1
+    spans = {s["name"]: s for s in json.loads(lines[0])["resourceSpans"][0]["scopeSpans"][0]["spans"]}
+
+    assert set(spans) == {"monitor.process", "purchase.send", "payments.sendStarsForm"}
+    assert {s["traceId"] for s in spans.values()} == {f"{root.trace_id:032x}"}
+    assert "parentSpanId" not in spans["monitor.process"]
+    assert spans["purchase.send"]["parentSpanId"] == spans["monitor.process"]["spanId"]
+    assert spans["payments.sendStarsForm"]["parentSpanId"] == spans["purchase.send"]["spanId"]
+    assert spans["payments.sendStarsForm"]["kind"] == tracing.CLIENT
+    assert spans["payments.sendStarsForm"]["status"]["code"] == tracing.STATUS_ERROR
+    assert spans["purchase.send"]["attributes"] == [{"key": "gift_id", "value": {"intValue": "5"}}]
+
+    # An unsampled root keeps its whole trace out of the file
+    monkeypatch.setattr(tracing.tracer, "sample_rate", 1e-12)
+    with tracing.tracer.span("monitor.process"), tracing.tracer.span("purchase.send") as child:
+        assert not child.sampled
+    assert len(exporter) == 0
+
+
+
+async def test_monitor_pipeline_records_one_trace_per_fetch(tmp_path, monkeypatch):
+    """Test that a fetched snapshot's processing and purchases join the fetch's trace."""
+    import json
+
+    from src.core.monitor import GiftMonitor
+    from src.observability import tracing
+
+    exporter = tracing.JsonlSpanExporter(str(tmp_path / "traces.jsonl"))
+    monkeypatch.setattr(tracing.tracer, "exporter", exporter)
+    monkeypatch.setattr(tracing.tracer, "sample_rate", 1.0)
+
+    class Client:
+        async def get_available_gifts(self):
+            return [{
+                "id": 1, "title": "Gift 1", "stars": 100, "total_amount": 10000,
+                "available_amount": 10000, "is_limited": True, "is_sold_out": False,
+            }]
+
+    async def purchase():
+        with tracing.tracer.span("purchase.process_cycle"):
+            pass
+
+    async def noop(*_):
+        pass
+
+    purchases = []
+    monitor = GiftMonitor(
+        Client(),
+        on_gift_batch=lambda _gifts: purchases.append(asyncio.create_task(purchase())),
+    )
+    monitor.updates = None
+    monitor._store_gifts = noop
+    monitor.availability.flush = noop
+    monitor.availability.maybe_downsample = noop
+    monitor._running = True
+
+    fetcher = asyncio.create_task(monitor._fetch_loop())
+    processor = asyncio.create_task(monitor._process_loop())
+    await asyncio.sleep(0.05)
+    monitor._running = False
+    monitor._snapshots.close()
+    fetcher.cancel()
+    await asyncio.gather(fetcher, processor, *purchases, return_exceptions=True)
+
+    await exporter.flush()
+    spans = [
+        span
+        for line in (tmp_path / "traces.jsonl").read_text().splitlines()
+        for span in json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    ]
+    by_name = {span["name"]: span for span in spans}
+
+    assert set(by_name) == {"monitor.fetch", "monitor.process", "monitor.slow_path", "purchase.process_cycle"}
+    assert len({span["traceId"] for span in spans}) == 1
+    assert "parentSpanId" not in by_name["monitor.fetch"]
+    assert by_name["monitor.process"]["parentSpanId"] == by_name["monitor.fetch"]["spanId"]
+    assert by_name["monitor.slow_path"]["parentSpanId"] == by_name["monitor.process"]["spanId"]
+    assert by_name["purchase.process_cycle"]["parentSpanId"] == by_name["monitor.process"]["spanId"]
+
+async def _fail(error):
+    """RPC stand-in that raises error, or answers when it is None."""
+    if error is not None:
+        raise error
+
+
+async def test_memory_guard_sheds_optional_work_near_the_limit():
+    """Test that informational work is shed above the soft limit until usage falls back."""
+    from src.notifications.outbox import NotificationOutbox
+    from src.observability.memory import memory_guard
+    from src.storage.timeseries import AvailabilityRecorder
+
+    async def send(_text):
+        return True
+
+    outbox = NotificationOutbox(send)
+    recorder = AvailabilityRecorder()
+    memory_guard.configure(1000, soft_ratio=0.85, resume_ratio=0.75)
+    try:
+        assert memory_guard.check(rss=800) == 0.8 and not memory_guard.shedding
+
+        memory_guard.check(rss=900)
+        assert memory_guard.shedding
+        outbox.post("bought a gift")
+        outbox.post("account blocked", critical=True)
+        assert len(outbox) == 1
+        assert not recorder.observe(1, 50)
+
+        memory_guard.check(rss=800)  # Between the thresholds: still shedding
+        assert memory_guard.shedding
+
+        memory_guard.check(rss=700)
+        assert not memory_guard.shedding
+        assert recorder.observe(1, 50)
+    finally:
+        memory_guard.configure(None)
+        memory_guard.shedding = False
+
+
+async def test_memory_endpoint_diffs_tracemalloc_snapshots(tmp_path):
+    """Test that /debug/memory reports allocation growth between calls."""
+    import tracemalloc
+
+    from src.observability.memory import MemoryProfiler
+    from src.observability.server import ObservabilityServer
+
+    server = ObservabilityServer(host="127.0.0.1", port=0, memory_profiler=MemoryProfiler(output_dir=tmp_path))
+    await server.start()
+    try:
+        status, body = await _get(server.port, "/debug/memory")
+        assert status == 200 and body.startswith(b"tracemalloc started")
+
+        leak = [str(i) * 10 for i in range(20000)]
+        status, body = await _get(server.port, "/debug/memory?top=5")
+        assert status == 200
+        assert b"test_observability.py" in body.splitlines()[1]
+        assert [p.read_bytes() for p in tmp_path.glob("memory-*.txt")] == [body]
+
+        assert (await _get(server.port, "/debug/memory?stop=1"))[0] == 200
+        assert not tracemalloc.is_tracing()
+        del leak
+    finally:
+        await server.stop()
+
+
+async def test_loop_stall_is_measured_and_attributed():
+    """Test that a blocking call is observed as lag and charged to its caller."""
+    import time
+
+    from prometheus_client import REGISTRY
+
+    from src.observability.loop import LoopMonitor
+
+    def stalls(site):
+        return REGISTRY.get_sample_value("gift_hunter_event_loop_stalls_total", {"site": site}) or 0.0
+
+    async def block_loop():
+        time.sleep(0.3)
+
+    before_lag = REGISTRY.get_sample_value("gift_hunter_event_loop_lag_seconds_sum") or 0.0
+    before = stalls("test_observability.py:block_loop")
+
+    monitor = LoopMonitor(interval=0.005, stall_threshold=0.05)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        await block_loop()
+        await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+
+    assert stalls("test_observability.py:block_loop") - before == 1
+    assert REGISTRY.get_sample_value("gift_hunter_event_loop_lag_seconds_sum") - before_lag >= 0.25
+    assert REGISTRY.get_sample_value("gift_hunter_event_loop_tasks") >= 1
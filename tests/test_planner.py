@@ -0,0 +1,124 @@
+"""Unit tests for the purchase planner."""
+import itertools
+
+import pytest
+
+
+def _candidate(gift_id, price, quantity, total_amount, recipient=1):
+    from src.core.planner import PlanCandidate, rarity_score
+
+    return PlanCandidate(
+        gift_id=gift_id,
+        gift_name=f"Gift {gift_id}",
+        price=price,
+        recipient=recipient,
+        quantity=quantity,
+        score=rarity_score(price, total_amount),
+    )
+
+
+def test_plan_takes_everything_when_affordable():
+    """Test the fast path when the budget covers all demand."""
+    from src.core.planner import PurchasePlanner
+
+    candidates = [_candidate(1, 100, 2, 10000), _candidate(2, 50, 3, 500000)]
+    plan = PurchasePlanner().plan(candidates, balance=1000)
+
+    assert plan.total_cost == 350
+    assert plan.optimal is True
+    assert not plan.skipped
+
+
+def test_plan_prefers_rare_gift_when_budget_is_short():
+    """Test that a cheap common gift cannot starve a rarer one."""
+    from src.core.planner import PurchasePlanner
+
+    common = _candidate(1, 100, 5, 500000)
+    rare = _candidate(2, 400, 1, 5000)
+    plan = PurchasePlanner().plan([common, rare], balance=500)
+
+    allocation = {item.candidate.gift_id: item.quantity for item in plan.items}
+    assert allocation == {2: 1, 1: 1}
+    assert plan.total_cost == 500
+
+
+def test_plan_prefers_gift_about_to_sell_out():
+    """Test that depletion urgency outweighs rarity when budget is short."""
+    from src.core.planner import PlanCandidate, PurchasePlanner, rarity_score, urgency_score
+    from src.core.priority import DepletionTracker
+
+    tracker = DepletionTracker()
+    # Rare gift that is not selling, common gift with 500 units left and selling fast
+    tracker.observe(1, 4000, 5000, delay=10, ts=0)
+    tracker.observe(1, 4000, 5000, delay=10, ts=10)
+    tracker.observe(2, 900, 50000, delay=10, ts=0)
+    tracker.observe(2, 500, 50000, delay=10, ts=10)
+
+    def plan(score):
+        candidates = [
+            PlanCandidate(gift_id, f"Gift {gift_id}", 100, 1, 1, score(gift_id, total))
+            for gift_id, total in ((1, 5000), (2, 50000))
+        ]
+        return [item.candidate.gift_id for item in PurchasePlanner().plan(candidates, balance=100).items]
+
+    assert plan(lambda _gift_id, total: rarity_score(100, total)) == [1]
+    assert plan(lambda gift_id, total: urgency_score(100, total, tracker.priority(gift_id))) == [2]
+
+
+def test_urgency_score_treats_untracked_gifts_as_idle():
+    """Test the fallback for gifts the tracker has not seen."""
+    from src.core.planner import urgency_score
+    from src.core.priority import expected_loss
+
+    assert urgency_score(100, 5000, 0.0) == urgency_score(100, 5000, expected_loss(0.0, 1, 5000, 0.0))
+    assert urgency_score(100, 5000, 0.0) > urgency_score(100, 0, 0.0) > 0
+
+
+def test_plan_respects_reserve_and_daily_limit():
+    """Test budget derivation from reserve_balance and daily_limit."""
+    from src.core.planner import PurchasePlanner
+
+    planner = PurchasePlanner(reserve_balance=200, daily_limit=1000)
+
+    assert planner.available_budget(balance=1000) == 800
+    assert planner.available_budget(balance=5000, daily_spent=700) == 300
+    assert planner.available_budget(balance=100) == 0
+
+    plan = planner.plan([_candidate(1, 100, 10, 1000)], balance=5000, daily_spent=700)
+    assert plan.total_cost == 300
+
+
+def test_plan_matches_brute_force():
+    """Test that the solver finds the optimal bounded allocation."""
+    from src.core.planner import PurchasePlanner
+
+    candidates = [
+        _candidate(1, 70, 3, 20000),
+        _candidate(2, 45, 2, 8000),
+        _candidate(3, 120, 2, 3000),
+        _candidate(4, 25, 4, 400000),
+    ]
+    budget = 310
+
+    best = 0.0
+    for counts in itertools.product(*(range(c.quantity + 1) for c in candidates)):
+        cost = sum(c.price * k for c, k in zip(candidates, counts, strict=True))
+        if cost <= budget:
+            best = max(best, sum(c.score * k for c, k in zip(candidates, counts, strict=True)))
+
+    plan = PurchasePlanner().plan(candidates, balance=budget)
+
+    assert plan.optimal is True
+    assert plan.total_cost <= budget
+    assert plan.total_score == pytest.approx(best, rel=1e-3)
+
+
+def test_plan_node_budget_still_returns_feasible_plan():
+    """Test that an exhausted search falls back to a feasible plan."""
+    from src.core.planner import PurchasePlanner
+
+    candidates = [_candidate(i, 10 + i % 7, 3, 1000 + i) for i in range(200)]
+    plan = PurchasePlanner(max_nodes=10).plan(candidates, balance=1234)
+
+    assert plan.total_cost <= 1234
+    assert plan.items
@@ -0,0 +1,43 @@
+"""Unit tests for sell-out velocity prioritization."""
+import math
+
+
+def test_depletion_rate_tracks_sales():
+    """Test that the EWMA converges toward the observed depletion rate."""
+    from src.core.priority import DepletionTracker
+
+    tracker = DepletionTracker(tau=10.0)
+    for step in range(30):
+        tracker.observe(1, 10000 - step * 50, 50000, delay=10, ts=step * 5.0)
+
+    assert 9.0 < tracker.rate(1) <= 10.0
+    assert math.isclose(tracker.time_to_sell_out(1), 8550 / tracker.rate(1))
+    assert tracker.time_to_sell_out(2) == math.inf
+
+
+def test_fast_selling_gift_outranks_rarer_idle_gift():
+    """Test that a large gift about to sell out beats a slow rare one."""
+    from src.core.priority import DepletionTracker
+
+    tracker = DepletionTracker(tau=5.0)
+    for step in range(10):
+        tracker.observe(1, 400000 - step * 40000, 500000, delay=10, ts=step * 5.0)
+        tracker.observe(2, 9000, 10000, delay=10, ts=step * 5.0)
+
+    order = tracker.rank([2, 1], [tracker.priority(2), tracker.priority(1)])
+
+    assert order == [1, 0]
+
+
+def test_idle_gifts_fall_back_to_rarest_first():
+    """Test ordering by supply when nothing is selling."""
+    from src.core.priority import DepletionTracker
+
+    tracker = DepletionTracker()
+    priorities = [
+        tracker.observe(gift_id, total, total, delay=10, ts=0.0)
+        for gift_id, total in ((1, 500000), (2, 1000), (3, 20000))
+    ]
+
+    assert tracker.rank([1, 2, 3], priorities) == [1, 2, 0]
+    assert tracker.rank([1, 2, 3], priorities) == [1, 2, 0]
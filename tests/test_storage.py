@@ -1,7 +1,8 @@
 """Unit tests for storage models."""
-import pytest
 from datetime import datetime
 
+import pytest
+
 
 def test_gift_model():
     """Test Gift model creation."""
@@ -93,4 +94,221 @@ def test_daily_stats_model():
     assert stats.total_spent == 5000
 
 
+@pytest.fixture
+async def session():
+    """Provide a session bound to an in-memory database."""
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    from src.storage.models import Base
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
+
+    await engine.dispose()
+
+
+async def test_record_purchase_updates_daily_stats(session):
+    """Test that purchases roll up into DailyStats in the same transaction."""
+    from src.storage.database import get_daily_stats, record_purchase
+
+    today = datetime.utcnow().strftime("%Y-%m-%d")
+
+    await record_purchase(session, gift_id=1, gift_name="A", recipient_id=10, price=100, quantity=2)
+    await record_purchase(session, gift_id=2, gift_name="B", recipient_id=10, price=50, quantity=1)
+    await session.commit()
+
+    stats = await get_daily_stats(session, today)
+
+    assert stats.total_spent == 250
+    assert stats.gifts_purchased == 3
+
+
+async def test_upsert_daily_stats_accumulates(session):
+    """Test that counter upserts add to an existing row."""
+    from src.storage.database import get_daily_stats, upsert_daily_stats
+
+    await upsert_daily_stats(session, date="2026-01-06", gifts_checked=40)
+    await upsert_daily_stats(session, date="2026-01-06", gifts_checked=60, errors_count=1)
+    await session.commit()
+
+    stats = await get_daily_stats(session, "2026-01-06")
+
+    assert stats.gifts_checked == 100
+    assert stats.errors_count == 1
+    assert await get_daily_stats(session, "2026-01-07") is None
+
+
+def test_daily_counters_run_in_memory(monkeypatch):
+    """Test that day totals are kept incrementally and restart at midnight."""
+    from src.storage import stats
+
+    monkeypatch.setattr(stats, "utc_today", lambda: "2026-01-06")
+    buffer = stats.DailyStatsBuffer()
+
+    buffer.add(gifts_checked=40)
+    buffer.add(gifts_checked=60, errors=1)
+    buffer.add_purchase(2, 300)
+
+    assert buffer.snapshot() == stats.DailyCounters("2026-01-06", 100, 2, 300, 1)
+
+    monkeypatch.setattr(stats, "utc_today", lambda: "2026-01-07")
+    assert buffer.snapshot() == stats.DailyCounters("2026-01-07")
+
+
+async def test_purchase_rollup_breaks_down_by_gift_and_recipient(session):
+    """Test that purchases roll up per gift and recipient per day."""
+    from src.storage.database import get_purchase_breakdown, record_purchase
+
+    day = datetime(2026, 1, 6, 12)
+    await record_purchase(session, gift_id=1, gift_name="A", recipient_id=10, price=100, quantity=2, purchased_at=day)
+    await record_purchase(session, gift_id=1, gift_name="A", recipient_id=11, price=100, quantity=1, purchased_at=day)
+    await record_purchase(session, gift_id=2, gift_name="B", recipient_id=10, price=50, quantity=1, purchased_at=day)
+    await session.commit()
+
+    assert await get_purchase_breakdown(session, "2026-01-06") == [(1, 3, 300), (2, 1, 50)]
+    assert await get_purchase_breakdown(session, "2026-01-06", by="recipient") == [(10, 3, 250), (11, 1, 100)]
+    assert await get_purchase_breakdown(session, "2026-01-07") == []
+
+
+async def test_purchase_journal_flushes_in_one_batch(session, monkeypatch):
+    """Test that journaled purchases stay in memory until flushed."""
+    from contextlib import asynccontextmanager
+
+    from sqlalchemy import func, select
+
+    from src.storage import journal as journal_module
+    from src.storage.models import Purchase
+
+    @asynccontextmanager
+    async def test_session():
+        yield session
+        await session.commit()
+
+    monkeypatch.setattr(journal_module, "get_session", test_session)
+
+    journal = journal_module.PurchaseJournal(batch_size=10)
+    for recipient_id in (10, 11, 12):
+        journal.append(gift_id=1, gift_name="A", recipient_id=recipient_id, price=100, quantity=1)
+
+    assert len(journal) == 3
+    assert await session.scalar(select(func.count(Purchase.id))) == 0
+
+    await journal.stop()
+
+    assert len(journal) == 0
+    assert await session.scalar(select(func.count(Purchase.id))) == 3
+
+
+async def test_purchase_journal_dead_letters_a_poisoned_record(session, monkeypatch, tmp_path):
+    """Test that one unsavable record neither blocks the others nor stays queued."""
+    import json
+    from contextlib import asynccontextmanager
+
+    from sqlalchemy import func, select
+
+    from src.storage import journal as journal_module
+    from src.storage.models import Purchase
+
+    @asynccontextmanager
+    async def test_session():
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+    monkeypatch.setattr(journal_module, "get_session", test_session)
+
+    dead_letters = tmp_path / "dead.jsonl"
+    journal = journal_module.PurchaseJournal(max_attempts=2, dead_letter_path=dead_letters)
+    journal.append(gift_id=1, gift_name="A", recipient_id=10, price=100, quantity=1)
+    journal.append(gift_id=1, gift_name="A", recipient_id=11, price=100, quantity=1, transaction_id="bad", bogus=1)
+    journal.append(gift_id=1, gift_name="A", recipient_id=12, price=100, quantity=1)
+
+    with pytest.raises(TypeError):
+        await journal.flush()
+    assert await session.scalar(select(func.count(Purchase.id))) == 2
+    assert len(journal) == 1
+
+    journal.append(gift_id=2, gift_name="B", recipient_id=10, price=50, quantity=1)
+    with pytest.raises(TypeError):
+        await journal.flush()
+
+    assert len(journal) == 0
+    assert await session.scalar(select(func.count(Purchase.id))) == 3
+    assert [json.loads(line)["transaction_id"] for line in dead_letters.read_text().splitlines()] == ["bad"]
+
+
+async def test_wal_engine_profile(tmp_path):
+    """Test WAL pragmas and the read-only pool of the wal engine mode."""
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+
+    from src.storage import database
+
+    database.configure_engine(mode="wal", path=tmp_path / "test.db", busy_timeout_ms=1234)
+    try:
+        await database.init_db()
+
+        async with database.get_session() as session:
+            assert (await session.scalar(text("PRAGMA journal_mode"))) == "wal"
+            assert (await session.scalar(text("PRAGMA busy_timeout"))) == 1234
+
+        async with database.get_read_session() as session:
+            with pytest.raises(OperationalError):
+                await session.execute(text("DELETE FROM gifts"))
+    finally:
+        await database.close_db()
+        database.configure_engine()
+
+
+async def test_availability_recorder_downsamples(tmp_path):
+    """Test change-only writes, bucket rollups and range queries."""
+    from src.storage import database
+    from src.storage.timeseries import (
+        HOUR,
+        AvailabilityRecorder,
+        get_availability,
+        sell_out_velocity,
+    )
+
+    database.configure_engine(mode="wal", path=tmp_path / "test.db")
+    try:
+        await database.init_db()
+        recorder = AvailabilityRecorder(raw_retention=3600, minute_retention=86400)
+
+        now = 1_000 * HOUR
+        start = now - 2 * 86400
+        assert recorder.observe(7, 1000, ts=start) is True
+        assert recorder.observe(7, 1000, ts=start + 5) is False
+        for i in range(1, 13):
+            recorder.observe(7, 1000 - i * 10, ts=start + i * 5)
+        for i in range(1, 13):
+            recorder.observe(7, 500 - i, ts=now - 600 + i * 5)
+        await recorder.flush()
+
+        await recorder.downsample(now=now)
+
+        async with database.get_read_session() as session:
+            points = await get_availability(session, 7, 0, now)
+
+        # Old raw points collapsed into one hour bucket, recent ones untouched
+        assert points[0].ts == start // HOUR * HOUR
+        assert points[0].available_amount == 880
+        assert len(points) == 13
+        assert sell_out_velocity(points[1:]) == pytest.approx(11 / 55)
+
+        reloaded = AvailabilityRecorder()
+        await reloaded.load()
+        assert reloaded.observe(7, 488, ts=now) is False
+    finally:
+        await database.close_db()
+        database.configure_engine()
+
+
 print("✅ All storage tests passed!")